@@ -0,0 +1 @@
+"""Benchmarks for the agent. Run them from the ai-agent directory with `python -m benchmarks.<name>`."""
@@ -0,0 +1,142 @@
+"""Critical-path latency of `explore_plan_action`, before and after parallel classification.
+
+Builds the graph from `configs.explore_plan_action` with every LLM node replaced by a
+stand-in that sleeps for a configurable latency, and compares it with the previous topology
+(exploration, reflection and context building first, classification last). Reports the
+wall time of a full run for a question and for a task.
+
+Usage:
+    python -m benchmarks.critical_path_benchmark [--runs 3] [--scale 0.1]
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, Dict
+
+from langchain_core.messages import AIMessage
+from langgraph.constants import START, END
+from langgraph.graph import StateGraph
+
+from src.agent.core import configs
+from src.agent.core.state import State
+
+# Seconds per node, roughly what the providers take on a medium-sized repository
+DEFAULT_LATENCIES = {
+    "llm_file_explore": 4.0,
+    "determine_input_type": 1.5,
+    "llm_call_evaluator": 8.0,
+    "search_file_contents": 0.2,
+    "build_context": 0.1,
+    "answer_question": 5.0,
+    "make_plan": 12.0,
+    "segment_into_steps": 3.0,
+    "llm_call": 2.0,
+    "run_steps": 2.0,
+    # make_plan plus one step: the segmentation call is gone, the streaming overlap is not modelled
+    "plan_and_run_steps": 14.0,
+    "push_to_git": 1.0,
+}
+
+
+def stand_in_nodes(latencies: Dict[str, float], input_type: str) -> Dict[str, Callable]:
+    def sleeper(name: str, update: dict) -> Callable:
+        def node(state: State):
+            time.sleep(latencies[name])
+            return update
+
+        node.__name__ = name
+        return node
+
+    return {
+        "llm_file_explore": sleeper("llm_file_explore", {"context": "files", "all_file_paths": {"a.py"},
+                                                         "project_structure": "."}),
+        "determine_input_type": sleeper("determine_input_type", {"input_type": input_type}),
+        "search_file_contents": sleeper("search_file_contents", {"all_file_paths": {"b.py"}}),
+        "merge_exploration": lambda state: {"context": "files"},
+        "llm_call_evaluator": sleeper("llm_call_evaluator", {"context": "more files"}),
+        "build_context": sleeper("build_context", {"context": "final context", "agent_metadata": ""}),
+        "answer_question": sleeper("answer_question", {"answer": "answer"}),
+        "make_plan": sleeper("make_plan", {"plan": "plan"}),
+        "segment_into_steps": sleeper("segment_into_steps", {}),
+        "llm_call": sleeper("llm_call", {"messages": [AIMessage(content="done")]}),
+        "run_steps": sleeper("run_steps", {"messages": [AIMessage(content="done")], "step_results": []}),
+        "plan_and_run_steps": sleeper("plan_and_run_steps", {"plan": "plan", "step_results": []}),
+        "push_to_git": sleeper("push_to_git", {}),
+        "await_push": lambda state: {},
+        "tool_node": lambda state: {},
+        "next_step": lambda state: {},
+        "should_continue": lambda state: "push_to_git",
+    }
+
+
+def sequential_topology(nodes: Dict[str, Callable]) -> StateGraph:
+    """The graph as it was before classification moved next to exploration."""
+    graph = StateGraph(State)
+    for name in ("determine_input_type", "answer_question", "llm_call", "segment_into_steps", "next_step",
+                 "llm_file_explore", "llm_call_evaluator", "build_context", "make_plan", "push_to_git"):
+        graph.add_node(name, nodes[name])
+    graph.add_node("environment", nodes["tool_node"])
+
+    graph.add_edge(START, "llm_file_explore")
+    graph.add_edge("llm_file_explore", "llm_call_evaluator")
+    graph.add_edge("llm_call_evaluator", "build_context")
+    graph.add_edge("build_context", "determine_input_type")
+    graph.add_conditional_edges("determine_input_type", configs.route_input,
+                                {"question": "answer_question", "task": "make_plan"})
+    graph.add_edge("answer_question", END)
+    graph.add_edge("make_plan", "segment_into_steps")
+    graph.add_edge("segment_into_steps", "llm_call")
+    graph.add_conditional_edges("llm_call", nodes["should_continue"],
+                                {"Action": "environment", "next_step": "next_step", "push_to_git": "push_to_git"})
+    graph.add_edge("environment", "llm_call")
+    graph.add_edge("next_step", "llm_call")
+    graph.add_edge("push_to_git", END)
+    return graph
+
+
+def parallel_topology(nodes: Dict[str, Callable]) -> StateGraph:
+    """The current `configs.explore_plan_action`, built with stand-in nodes."""
+    originals = {name: getattr(configs, name) for name in nodes}
+    try:
+        for name, node in nodes.items():
+            setattr(configs, name, node)
+        return configs.explore_plan_action()
+    finally:
+        for name, node in originals.items():
+            setattr(configs, name, node)
+
+
+def run(runs: int, scale: float) -> None:
+    latencies = {name: seconds * scale for name, seconds in DEFAULT_LATENCIES.items()}
+    initial_state = {"user_task": "What does the upload route do?", "project_path": ".", "messages": []}
+
+    print(f"{'input':>9} {'sequential s':>13} {'parallel s':>11} {'saved':>7}")
+    for input_type in ("question", "task"):
+        nodes = stand_in_nodes(latencies, input_type)
+        timings = {}
+        for label, build in (("sequential", sequential_topology), ("parallel", parallel_topology)):
+            graph = build(nodes).compile()
+            samples = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                graph.invoke(dict(initial_state))
+                samples.append(time.perf_counter() - started)
+            timings[label] = statistics.median(samples)
+
+        saved = 1 - timings["parallel"] / timings["sequential"]
+        print(f"{input_type:>9} {timings['sequential']:>13.2f} {timings['parallel']:>11.2f} {saved:>6.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=0.1,
+                        help="Multiplier applied to the default node latencies, to keep runs short")
+    args = parser.parse_args()
+
+    run(args.runs, args.scale)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Per-strategy latency of a voice message turn through the chat graph nodes.
+
+Runs `prepare_inputs_node` and `generate_answer_node` for every transcript enhancement
+strategy with the transcription, enhancement, answer and TTS calls replaced by stand-ins
+that sleep for configurable latencies. Reports the time until the answer is available and
+the time until the node returns (which, for the parallel strategy, includes waiting for the
+enhancement to be stored).
+
+Usage:
+    python -m benchmarks.enhancement_benchmark [--runs 5] [--answer-latency 2.0]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from langchain_core.messages import AIMessage
+
+from agent.core import chat_graph
+from agent.core.chat_graph import ENHANCEMENT_STRATEGIES, prepare_inputs_node, generate_answer_node
+
+RAW_TRANSCRIPT = "so um I was thinking about like whether I should uh refactor the the upload code first"
+
+
+@dataclass
+class CachedTranscript:
+    audio_key: str
+    raw_transcript: str
+    enhanced: Dict[str, str] = field(default_factory=dict)
+
+    def enhanced_for(self, model: str) -> Optional[str]:
+        return self.enhanced.get(model)
+
+
+class StandInCache:
+    def __init__(self, transcription_latency: float):
+        self.transcription_latency = transcription_latency
+        self.entries: Dict[str, CachedTranscript] = {}
+
+    async def get_or_transcribe(self, audio_path):
+        if audio_path not in self.entries:
+            await asyncio.sleep(self.transcription_latency)
+            self.entries[audio_path] = CachedTranscript(audio_path, RAW_TRANSCRIPT)
+        return self.entries[audio_path]
+
+    async def get(self, audio_key):
+        return self.entries.get(audio_key)
+
+    async def get_or_enhance(self, entry, model, enhance):
+        if model not in entry.enhanced:
+            entry.enhanced[model] = await enhance(entry.raw_transcript)
+        return entry.enhanced[model]
+
+
+class StandInModel:
+    def __init__(self, latency: float, seconds_per_prompt_kb: float, timings: dict):
+        self.latency = latency
+        self.seconds_per_prompt_kb = seconds_per_prompt_kb
+        self.timings = timings
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency + self.seconds_per_prompt_kb * len(prompt) / 1024)
+        self.timings["answered"] = time.perf_counter()
+        return AIMessage(content="Refactor the upload code first, it unblocks the rest.")
+
+
+async def run_turn(strategy: str, args) -> tuple:
+    timings = {}
+    cache = StandInCache(args.transcription_latency)
+
+    async def enhance(transcript, model):
+        await asyncio.sleep(args.enhancement_latency)
+        return "I am considering whether to refactor the upload code first."
+
+    async def text_to_speech_upload_file(text):
+        return "https://files.example/speech.mp3"
+
+    chat_graph.get_transcript_cache = lambda: cache
+    chat_graph._enhance_transcript = enhance
+    chat_graph._open_router_model = lambda model: StandInModel(args.answer_latency, args.seconds_per_prompt_kb, timings)
+    chat_graph.text_to_speech_upload_file = text_to_speech_upload_file
+
+    state = {
+        "messages": [],
+        "audio_path": f"https://files.example/{strategy}.ogg",
+        "text_input": None,
+        "ai_model": "stand-in/model",
+        "enhancement_strategy": strategy,
+    }
+
+    started = time.perf_counter()
+    state.update(await prepare_inputs_node(state))
+    await generate_answer_node(state)
+    finished = time.perf_counter()
+    return timings["answered"] - started, finished - started
+
+
+async def run(args):
+    print(f"{'strategy':>11} {'answer p50 (s)':>15} {'turn p50 (s)':>13}")
+    for strategy in ENHANCEMENT_STRATEGIES:
+        results = [await run_turn(strategy, args) for _ in range(args.runs)]
+        answer = statistics.median(r[0] for r in results)
+        turn = statistics.median(r[1] for r in results)
+        print(f"{strategy:>11} {answer:>15.2f} {turn:>13.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--transcription-latency", type=float, default=1.0)
+    parser.add_argument("--enhancement-latency", type=float, default=1.5)
+    parser.add_argument("--answer-latency", type=float, default=2.0)
+    parser.add_argument("--seconds-per-prompt-kb", type=float, default=0.05,
+                        help="Extra answer latency per KB of prompt (the inline prompt is longer)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Startup cost of importing the agent package.
+
+Imports each module in a fresh interpreter with `python -X importtime` and reports the
+cumulative import time of the module itself and of its most expensive dependencies, as
+the median over several runs. Run it before and after a change to catch import-time
+regressions (eager client construction, heavy top-level imports).
+
+Usage:
+    python -m benchmarks.import_time [--runs 5] [--top 15] [--modules agent agent.core.ai_models]
+    python -m benchmarks.import_time --json import_time.json
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+DEFAULT_MODULES = ["agent", "agent.core.ai_models", "agent.core.chat_graph", "src.agent.core.configs"]
+
+# import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(code: str) -> Dict[str, int]:
+    """
+    Run code in a fresh interpreter with import timing enabled.
+
+    Returns:
+        Cumulative import time in microseconds of every module imported
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Running `{code}` failed:\n{process.stderr[-2000:]}")
+
+    cumulative = {}
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative
+
+
+def benchmark(module: str, runs: int) -> Dict[str, float]:
+    """Median cumulative import time in milliseconds per imported module."""
+    # Modules the interpreter imports at startup (site, encodings, ...) are not part of the cost
+    startup = set(measure("pass"))
+    samples: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(runs):
+        for name, micros in measure(f"import {module}").items():
+            if name not in startup:
+                samples[name].append(micros)
+    return {name: statistics.median(values) / 1000 for name, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Most expensive dependencies to list per module")
+    parser.add_argument("--json", help="Write the totals to this file")
+    args = parser.parse_args()
+
+    totals = {}
+    for module in args.modules:
+        timings = benchmark(module, args.runs)
+        total = timings.get(module, 0.0)
+        totals[module] = total
+
+        print(f"\n{module}: {total:.1f} ms (median of {args.runs})")
+        top_level = sorted(
+            ((name, ms) for name, ms in timings.items() if name != module and "." not in name),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        for name, ms in top_level[:args.top]:
+            print(f"    {ms:>9.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(totals, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
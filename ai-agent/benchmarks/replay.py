@@ -0,0 +1,247 @@
+"""Offline LLM replay for the benchmarks.
+
+A cassette is a JSON file of recorded LLM interactions. Each interaction names the prompt it
+answers (substrings that must, or must not, appear in the prompt), the response (content,
+tool calls, token usage) and the latency distribution of the call as p50/p95 seconds:
+
+    {
+      "interactions": [
+        {
+          "name": "classify",
+          "match": ["determines whether a user input is a question or a task"],
+          "unless": [],
+          "latency": {"p50": 0.8, "p95": 1.6},
+          "first_token": {"p50": 0.3, "p95": 0.6},
+          "response": {"content": "task", "tool_calls": [], "usage": {"input_tokens": 250, "output_tokens": 1}}
+        }
+      ],
+      "services": {"text_to_speech": {"p50": 1.2, "p95": 2.4}}
+    }
+
+The first interaction whose patterns fit the prompt is replayed. `${project_path}` in
+responses is replaced by the target repository, and `${tool_call_id}` by a fresh id. Without
+recorded usage the tokens are estimated from the prompt and response size, so token counts
+still follow the size of the context.
+
+`ReplayChatModel` replays a cassette with latencies drawn from a log-normal distribution
+fitted to each interaction's p50 and p95, and `CassetteRecorder` writes a cassette from a
+live run.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import PrivateAttr
+
+# z-score of the 95th percentile of a normal distribution
+Z_95 = 1.645
+STREAM_CHUNK_CHARS = 24
+
+
+class Latency:
+    """Log-normal latency fitted to a p50 and p95, in seconds."""
+
+    def __init__(self, p50: float, p95: Optional[float] = None):
+        self.p50 = p50
+        self.mu = math.log(max(p50, 1e-6))
+        self.sigma = math.log(max(p95 or p50, p50, 1e-6) / max(p50, 1e-6)) / Z_95
+
+    def sample(self, rng: random.Random, scale: float = 1.0) -> float:
+        if self.p50 <= 0 or scale <= 0:
+            return 0.0
+        return rng.lognormvariate(self.mu, self.sigma) * scale
+
+
+class Cassette:
+    """Recorded interactions of one graph, see the module docstring for the format."""
+
+    def __init__(self, data: Dict[str, Any], variables: Optional[Dict[str, str]] = None):
+        self.interactions: List[Dict[str, Any]] = data.get("interactions", [])
+        self.services: Dict[str, Dict[str, float]] = data.get("services", {})
+        self.variables = dict(variables or {})
+        self.misses: List[str] = []
+
+    @classmethod
+    def load(cls, path: str, variables: Optional[Dict[str, str]] = None) -> "Cassette":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), variables)
+
+    def find(self, prompt: str) -> Dict[str, Any]:
+        for interaction in self.interactions:
+            if all(p in prompt for p in interaction.get("match", [])) and \
+                    not any(p in prompt for p in interaction.get("unless", [])):
+                return interaction
+        self.misses.append(prompt[:200])
+        raise KeyError(f"No recorded interaction for the prompt starting with: {prompt[:120]!r}")
+
+    def substitute(self, value: Any) -> Any:
+        if isinstance(value, str):
+            for name, replacement in self.variables.items():
+                value = value.replace(f"${{{name}}}", replacement)
+            return value.replace("${tool_call_id}", f"call_{uuid.uuid4().hex[:12]}")
+        if isinstance(value, list):
+            return [self.substitute(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.substitute(item) for key, item in value.items()}
+        return value
+
+    def service_latency(self, name: str) -> Latency:
+        recorded = self.services.get(name, {"p50": 0.0})
+        return Latency(recorded["p50"], recorded.get("p95"))
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(m.content if isinstance(m.content, str) else json.dumps(m.content) for m in messages)
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Chat model answering from a cassette with realistic latency.
+
+    Tools are accepted and ignored (the recorded responses carry the tool calls), and
+    structured output parses the recorded JSON content into the schema. Streamed responses
+    wait for the first token, then spread the rest of the latency over the chunks.
+
+    Args:
+        cassette: The recorded interactions
+        scale: Factor applied to every latency, e.g. 0.05 for quick CI runs
+        seed: Seed of the latency sampling, for reproducible runs
+    """
+
+    cassette: Any
+    scale: float = 1.0
+    seed: int = 0
+    _rng: random.Random = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _sample(self, latency: Optional[Dict[str, float]]) -> float:
+        if not latency:
+            return 0.0
+        with self._lock:
+            return Latency(latency["p50"], latency.get("p95")).sample(self._rng, self.scale)
+
+    def _message(self, prompt: str, interaction: Dict[str, Any]) -> AIMessage:
+        response = self.cassette.substitute(interaction.get("response", {}))
+        content = response.get("content", "")
+        if not isinstance(content, str):
+            content = json.dumps(content)
+        usage = response.get("usage") or {}
+        input_tokens = usage.get("input_tokens", len(prompt) // 4)
+        output_tokens = usage.get("output_tokens", max(1, len(content) // 4))
+        return AIMessage(
+            content=content,
+            tool_calls=[{"name": c["name"], "args": c.get("args", {}), "id": c.get("id") or f"call_{uuid.uuid4().hex[:12]}"}
+                        for c in response.get("tool_calls", [])],
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                            "total_tokens": input_tokens + output_tokens},
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = _prompt_text(messages)
+        interaction = self.cassette.find(prompt)
+        time.sleep(self._sample(interaction.get("latency")))
+        return ChatResult(generations=[ChatGeneration(message=self._message(prompt, interaction))])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        prompt = _prompt_text(messages)
+        interaction = self.cassette.find(prompt)
+        message = self._message(prompt, interaction)
+        total = self._sample(interaction.get("latency"))
+        first_token = min(total, self._sample(interaction.get("first_token")) or total / 4)
+        time.sleep(first_token)
+
+        content = message.content
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)] or [""]
+        delay = (total - first_token) / len(pieces)
+        for position, piece in enumerate(pieces):
+            if position:
+                time.sleep(delay)
+            last = position == len(pieces) - 1
+            chunk = AIMessageChunk(content=piece, usage_metadata=message.usage_metadata if last else None)
+            if run_manager is not None:
+                run_manager.on_llm_new_token(piece, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    def bind_tools(self, tools, **kwargs) -> "ReplayChatModel":
+        return self
+
+    def with_structured_output(self, schema, **kwargs):
+        def parse(message: AIMessage):
+            content = message.content.strip()
+            if content.startswith("```"):
+                content = content.strip("`").removeprefix("json").strip()
+            return schema.model_validate_json(content)
+
+        return self | RunnableLambda(parse)
+
+
+class CassetteRecorder(BaseCallbackHandler):
+    """
+    Records the LLM calls of a live run into a cassette.
+
+    Every call becomes an interaction matching the first line of its prompt, named after the
+    graph node that made it. Calls sharing a first line (e.g. the tool loop of different
+    plan steps) need their `match` patterns refined by hand before replaying.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.interactions: List[Dict[str, Any]] = []
+        self._open: Dict[Any, tuple] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs) -> None:
+        prompt = _prompt_text(messages[0])
+        with self._lock:
+            self._open[run_id] = ((metadata or {}).get("langgraph_node", "llm"), prompt, time.perf_counter(), None)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs) -> None:
+        with self._lock:
+            if run_id in self._open and self._open[run_id][3] is None:
+                node, prompt, started, _ = self._open[run_id]
+                self._open[run_id] = (node, prompt, started, time.perf_counter() - started)
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        with self._lock:
+            opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        node, prompt, started, first_token = opened
+        seconds = round(time.perf_counter() - started, 3)
+        message = response.generations[0][0].message
+        interaction = {
+            "name": node,
+            "match": [prompt.strip().splitlines()[0][:80]] if prompt.strip() else [],
+            "latency": {"p50": seconds, "p95": seconds},
+            "response": {
+                "content": message.content,
+                "tool_calls": [{"name": c["name"], "args": c["args"]} for c in getattr(message, "tool_calls", [])],
+                "usage": dict(getattr(message, "usage_metadata", None) or {}),
+            },
+        }
+        if first_token is not None:
+            interaction["first_token"] = {"p50": round(first_token, 3), "p95": round(first_token, 3)}
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"interactions": self.interactions}, f, indent=2)
@@ -0,0 +1,221 @@
+"""End-to-end latency of the agent graphs, offline, against recorded LLM responses.
+
+Runs `explore_plan_action`, `action` and `simple_graph` from `configs` with every model in
+the registry replaced by a `ReplayChatModel` playing the graph's cassette from
+`benchmarks/cassettes`, over synthetic target repositories of increasing size. LLM latency
+is sampled from the recorded distributions (times `--scale`); everything else is the real
+code: file scanning, indexes, context assembly, the step scheduler, git and graph overhead.
+
+Reports per graph and repository size the end-to-end latency, the per-node wall time, the
+peak Python memory of a run and the prompt bytes sent to the models. With `--scale 0` the
+LLM calls return immediately and the numbers are pure local overhead, which is what CI
+should compare: `--output` writes a JSON report and `--baseline` fails (exit code 1) when a
+result got slower or bigger than the baseline by more than `--tolerance`.
+
+Usage:
+    python -m benchmarks.replay_benchmark [--graphs explore_plan_action action simple_graph]
+        [--sizes 50 200 800] [--runs 3] [--scale 0.1] [--output report.json]
+        [--baseline baseline.json] [--tolerance 0.25]
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from benchmarks.replay import Cassette, ReplayChatModel
+from benchmarks.synthetic_repos import make_repo, reset_repo
+
+CASSETTE_DIR = os.path.join(os.path.dirname(__file__), "cassettes")
+GRAPHS = ("explore_plan_action", "action", "simple_graph")
+# OpenRouter models the chat graph asks for by id, on top of the router's model classes
+OPEN_ROUTER_MODELS = ("google/gemini-2.5-pro", "google/gemini-flash-1.5")
+
+
+def isolate_local_state() -> str:
+    """Point blobs, artefacts, indexes and checkpoints at a scratch directory, before the agent is imported."""
+    scratch = tempfile.mkdtemp(prefix="replay-bench-")
+    for name, directory in (("BLOB_STORE_DIR", "blobs"), ("ARTEFACT_DIR", "artefacts"), ("CODE_INDEX_DIR", "index"),
+                            ("MEMORY_INDEX_DIR", "memory"), ("LOCAL_CHECKPOINT_DB", "checkpoints.sqlite")):
+        os.environ.setdefault(name, os.path.join(scratch, directory))
+    os.environ.setdefault("GIT_PUSH_WAIT_SECONDS", "5")
+    # The replay models are installed after import, warming up the real ones is wasted work
+    os.environ.setdefault("STRUCTURED_OUTPUT_WARMUP", "0")
+    # Some provider clients are built at import and need a key, none of them is called
+    os.environ.setdefault("DEEPINFRA_API_KEY", "replay")
+    # Memory retrieval embeds offline, the benchmark makes no embedding calls
+    os.environ.setdefault("MEMORY_EMBEDDER", "hashing")
+    return scratch
+
+
+def install_replay(model: ReplayChatModel, cassette: Cassette, scale: float) -> None:
+    """Serve every registered model from the replay model and stub text to speech."""
+    from src.agent.core import chat_graph, router
+
+    names = {name for members in router.EQUIVALENCE_CLASSES.values() for name in members}
+    names.update(f"openrouter:{model_id}" for model_id in OPEN_ROUTER_MODELS + (chat_graph.MEMORY_SUMMARY_MODEL,))
+    # The graphs are loaded as `src.agent...`, `run_graph` and the tests load the package as `agent...`
+    for package in ("src.agent", "agent"):
+        try:
+            ai_models = importlib.import_module(f"{package}.core.ai_models")
+            llm_tools = importlib.import_module(f"{package}.tools.llm_tools")
+        except ImportError:
+            continue
+        for name in names | set(ai_models.registry._factories):
+            ai_models.registry.override(name, model)
+        llm_tools.llm_with_tools = None
+
+    rng = random.Random(0)
+    speech_latency = cassette.service_latency("text_to_speech")
+
+    async def text_to_speech_upload_file(text: str) -> str:
+        await asyncio.sleep(speech_latency.sample(rng, scale))
+        return "replay://speech.mp3"
+
+    chat_graph.text_to_speech_upload_file = text_to_speech_upload_file
+
+
+def graph_inputs(graph_name: str, data: Dict[str, Any], repo: str) -> Dict[str, Any]:
+    from src.agent.tools.file_utils import get_project_structure_as_string
+
+    if graph_name == "simple_graph":
+        return {"text_input": data["task"], "messages": []}
+    inputs = {"user_task": data["task"], "project_path": repo, "messages": []}
+    if graph_name == "action":
+        inputs.update(plan=data["plan"], agent_metadata="",
+                      project_structure=get_project_structure_as_string(repo))
+    return inputs
+
+
+def run_once(graph, inputs: Dict[str, Any], config: Dict[str, Any], measure_memory: bool = False) -> Dict[str, Any]:
+    if measure_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    asyncio.run(graph.ainvoke(inputs, config))
+    seconds = time.perf_counter() - started
+    result = {"seconds": seconds}
+    if measure_memory:
+        result["peak_mib"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result
+
+
+def bench_graph(graph_name: str, sizes: List[int], runs: int, warmup: int, scale: float,
+                repos: Dict[int, str]) -> List[Dict[str, Any]]:
+    from src.agent.core import configs
+    from src.agent.utils.instrumentation import GraphInstrumentation
+
+    with open(os.path.join(CASSETTE_DIR, f"{graph_name}.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    results = []
+    for size in sizes:
+        repo = repos[size]
+        cassette = Cassette(data, {"project_path": repo})
+        install_replay(ReplayChatModel(cassette=cassette, scale=scale, seed=size), cassette, scale)
+        handler = GraphInstrumentation(write_reports=False)
+        graph = getattr(configs, graph_name)().compile().with_config(callbacks=[handler])
+
+        samples, reports = [], []
+        for position in range(warmup + runs + 1):
+            config = {"configurable": {"thread_id": f"bench-{graph_name}-{size}", "run_id": str(position)},
+                      "recursion_limit": 100}
+            # The last run only measures memory, tracing slows the others down
+            measure_memory = position == warmup + runs
+            sample = run_once(graph, graph_inputs(graph_name, data, repo), config, measure_memory)
+            if graph_name != "simple_graph":
+                reset_repo(repo)
+            if measure_memory:
+                peak_mib = sample["peak_mib"]
+            elif position >= warmup:
+                samples.append(sample["seconds"])
+                reports.append(handler.recent_reports()[-1])
+
+        if cassette.misses:
+            print(f"   > {len(cassette.misses)} prompts had no recorded interaction, first: {cassette.misses[0]!r}")
+        node_names = {name for report in reports for name in report["nodes"]}
+        results.append({
+            "graph": graph_name,
+            "files": size,
+            "runs": len(samples),
+            "p50_seconds": statistics.median(samples),
+            "max_seconds": max(samples),
+            "peak_mib": peak_mib,
+            "prompt_kib": statistics.median(r["totals"]["context_bytes"] for r in reports) / 1024,
+            "input_tokens": statistics.median(r["totals"]["input_tokens"] for r in reports),
+            "nodes": {name: statistics.median(r["nodes"].get(name, {}).get("wall_seconds", 0.0) for r in reports)
+                      for name in sorted(node_names)},
+        })
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"{'graph':>20} {'files':>6} {'p50 s':>8} {'max s':>8} {'peak MiB':>9} {'prompt KiB':>11} {'tokens in':>10}")
+    for r in results:
+        print(f"{r['graph']:>20} {r['files']:>6} {r['p50_seconds']:>8.3f} {r['max_seconds']:>8.3f} "
+              f"{r['peak_mib']:>9.1f} {r['prompt_kib']:>11.1f} {r['input_tokens']:>10.0f}")
+        slowest = sorted(r["nodes"].items(), key=lambda item: -item[1])[:4]
+        print(f"{'':>28}" + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in slowest))
+
+
+def regressions(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """Results worse than the baseline by more than `tolerance`, for the metrics that should not grow."""
+    previous = {(r["graph"], r["files"]): r for r in baseline}
+    found = []
+    for r in results:
+        before = previous.get((r["graph"], r["files"]))
+        if before is None:
+            continue
+        for metric in ("p50_seconds", "peak_mib", "prompt_kib"):
+            # Small absolute values are noise, e.g. a few milliseconds of scheduling
+            if r[metric] > before[metric] * (1 + tolerance) and r[metric] - before[metric] > 0.01:
+                found.append(f"{r['graph']} ({r['files']} files): {metric} {before[metric]:.3f} -> {r[metric]:.3f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graphs", nargs="+", choices=GRAPHS, default=list(GRAPHS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[50, 200, 800], help="Files per synthetic repo")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="Runs per size not counted, e.g. for index builds")
+    parser.add_argument("--scale", type=float, default=0.1, help="Factor on the recorded LLM latencies, 0 for none")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    scratch = isolate_local_state()
+    repos = {size: os.path.join(scratch, f"repo_{size}") for size in args.sizes}
+    for size, repo in repos.items():
+        make_repo(repo, size, seed=size)
+
+    results = []
+    for graph_name in args.graphs:
+        print(f"Running {graph_name}...")
+        results.extend(bench_graph(graph_name, args.sizes, args.runs, args.warmup, args.scale, repos))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"scale": args.scale, "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            found = regressions(results, json.load(f)["results"], args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Checkpoint size and write time with large state fields inline versus as blob references.
+
+Runs a graph shaped like `explore_plan_action` (exploration, merge, reflection, context
+building, then a number of agent steps) twice with a checkpointer: once with `context`,
+`project_structure` and `agent_metadata` as plain strings in the state and once with the
+blob store references the nodes now write. The field contents are built from the files of
+a real project. Reports the bytes serialised by the checkpointer, the time spent in
+`put`, and the size of a full state snapshot (what the LangGraph server stores and sends
+for every step).
+
+Usage:
+    python -m benchmarks.state_blob_benchmark [--project-path src] [--agent-steps 20]
+"""
+
+import argparse
+import operator
+import os
+import tempfile
+import time
+from typing import Annotated, Callable, Dict, TypedDict
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.constants import START, END
+from langgraph.graph import StateGraph
+
+from src.agent.persistence.blobs import BlobStore
+
+
+class BenchState(TypedDict):
+    context: str
+    project_structure: str
+    agent_metadata: str
+    steps: Annotated[list, operator.add]
+
+
+class MeasuringSaver(InMemorySaver):
+    """In-memory checkpointer that records how many bytes and how much time its writes take."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_written = 0
+        self.put_seconds = 0.0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        started = time.perf_counter()
+        result = super().put(config, checkpoint, metadata, new_versions)
+        self.put_seconds += time.perf_counter() - started
+        thread_id = config["configurable"]["thread_id"]
+        namespace = config["configurable"].get("checkpoint_ns", "")
+        for channel, version in new_versions.items():
+            self.bytes_written += len(self.blobs[(thread_id, namespace, channel, version)][1])
+        return result
+
+
+def project_texts(project_path: str) -> Dict[str, str]:
+    files = []
+    for root, dir_names, file_names in os.walk(project_path):
+        dir_names[:] = [d for d in dir_names if not d.startswith((".", "__"))]
+        files.extend(os.path.join(root, name) for name in file_names if name.endswith((".py", ".md")))
+
+    context = []
+    for path in sorted(files):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            context.append(f"<file path=\"{path}\">\n{f.read()}\n</file>\n")
+    context = "".join(context)
+    return {
+        "explored": context[:len(context) // 2],
+        "context": context,
+        "project_structure": "\n".join(sorted(files)) * 4,
+        "agent_metadata": context[:len(context) // 10],
+    }
+
+
+def build(texts: Dict[str, str], store: Callable[[str], str], load: Callable[[str], str], agent_steps: int):
+    def node(name: str, update: Callable[[BenchState], dict]):
+        def run(state: BenchState):
+            return {**update(state), "steps": [name]}
+
+        return run
+
+    def agent_step(state: BenchState):
+        # Agent steps read the large fields but do not change them
+        load(state["context"])
+        load(state["project_structure"])
+        return {"steps": ["agent_step"]}
+
+    def route(state: BenchState):
+        return "agent_step" if state["steps"].count("agent_step") < agent_steps else END
+
+    graph = StateGraph(BenchState)
+    graph.add_node("llm_file_explore", node("llm_file_explore", lambda s: {
+        "context": store(texts["explored"]), "project_structure": store(texts["project_structure"])}))
+    graph.add_node("merge_exploration", node("merge_exploration", lambda s: {"context": store(texts["context"])}))
+    graph.add_node("llm_call_evaluator", node("llm_call_evaluator", lambda s: {"context": store(load(s["context"]))}))
+    graph.add_node("build_context", node("build_context", lambda s: {
+        "context": store(load(s["context"]) + "\n"), "agent_metadata": store(texts["agent_metadata"])}))
+    graph.add_node("agent_step", agent_step)
+
+    graph.add_edge(START, "llm_file_explore")
+    graph.add_edge("llm_file_explore", "merge_exploration")
+    graph.add_edge("merge_exploration", "llm_call_evaluator")
+    graph.add_edge("llm_call_evaluator", "build_context")
+    graph.add_conditional_edges("build_context", route)
+    graph.add_conditional_edges("agent_step", route)
+    return graph
+
+
+def run(project_path: str, agent_steps: int) -> None:
+    texts = project_texts(project_path)
+    print(f"context {len(texts['context']) / 1024:.0f} KiB, project structure "
+          f"{len(texts['project_structure']) / 1024:.0f} KiB, agent metadata {len(texts['agent_metadata']) / 1024:.0f} KiB")
+
+    blob_store = BlobStore(tempfile.mkdtemp(prefix="blob-bench-"))
+    variants = {
+        "inline": (lambda text: text, lambda value: value),
+        "blob refs": (blob_store.put, blob_store.get),
+    }
+
+    print(f"{'state':>10} {'checkpoints':>12} {'written KiB':>12} {'put ms':>8} {'snapshot KiB':>13} {'run s':>7}")
+    for label, (store, load) in variants.items():
+        saver = MeasuringSaver()
+        graph = build(texts, store, load, agent_steps).compile(checkpointer=saver)
+        config = {"configurable": {"thread_id": label}, "recursion_limit": agent_steps + 20}
+
+        started = time.perf_counter()
+        graph.invoke({"context": "", "project_structure": "", "agent_metadata": "", "steps": []}, config)
+        elapsed = time.perf_counter() - started
+
+        checkpoints = list(saver.list(config))
+        snapshot = len(saver.serde.dumps_typed(checkpoints[0].checkpoint["channel_values"])[1])
+        print(f"{label:>10} {len(checkpoints):>12} {saver.bytes_written / 1024:>12.0f} "
+              f"{saver.put_seconds * 1000:>8.1f} {snapshot / 1024:>13.1f} {elapsed:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--project-path", default="src", help="Project whose files fill the large fields")
+    parser.add_argument("--agent-steps", type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.project_path, args.agent_steps)
+
+
+if __name__ == "__main__":
+    main()
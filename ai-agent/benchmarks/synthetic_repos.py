@@ -0,0 +1,106 @@
+"""Synthetic target repositories of a given size for the benchmarks.
+
+Every repository has the same entry points (`app/main.py`, `app/config.py`, `README.md`),
+which the cassettes refer to, plus `files - 3` generated modules in nested packages. The
+content is deterministic for a seed, so runs over the same size are comparable.
+"""
+
+import os
+import random
+import subprocess
+from typing import List
+
+WORDS = ["account", "invoice", "order", "report", "session", "token", "cache", "queue", "user", "price",
+         "stock", "audit", "event", "image", "route", "schema", "budget", "ticket", "review", "export"]
+MODULES_PER_PACKAGE = 12
+
+MAIN = '''import argparse
+
+from app.config import load_config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic service")
+    parser.add_argument("--config", default="config.toml")
+    args = parser.parse_args(argv)
+    config = load_config(args.config)
+    print(f"Starting with {len(config)} settings")
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+CONFIG = '''import os
+
+
+def load_config(path):
+    """Settings from the environment, the file at `path` is optional."""
+    return {key[4:].lower(): value for key, value in os.environ.items() if key.startswith("APP_")}
+'''
+
+
+def _module(rng: random.Random, package: str, index: int) -> str:
+    noun = rng.choice(WORDS)
+    other = rng.choice(WORDS)
+    functions = []
+    for position in range(rng.randint(3, 8)):
+        verb = rng.choice(["load", "save", "validate", "merge", "render", "compute", "sync"])
+        functions.append(f'''
+
+def {verb}_{noun}_{position}(items, limit={rng.randint(5, 500)}):
+    """{verb.capitalize()} {noun} records, at most `limit` of them."""
+    result = []
+    for item in items[:limit]:
+        if item.get("{other}") is not None:
+            result.append({{"{noun}": item["{other}"], "position": {position}}})
+    return result''')
+    return (f'"""{noun.capitalize()} helpers of {package}."""\n\n\n'
+            f"class {noun.capitalize()}{index}:\n"
+            f"    def __init__(self, name):\n        self.name = name\n"
+            + "".join(functions) + "\n")
+
+
+def make_repo(root: str, files: int, seed: int = 0, git: bool = True) -> List[str]:
+    """
+    Write a synthetic repository with about `files` files into `root`.
+
+    Args:
+        root: Target directory, created if needed
+        files: Number of files, at least 3
+        seed: Seed of the generated content
+        git: Initialise a git repository with everything committed, so commits can be benchmarked
+
+    Returns:
+        Paths of the written files
+    """
+    rng = random.Random(seed)
+    paths = {
+        os.path.join(root, "README.md"): "# Synthetic service\n\nRun `python -m app.main`.\n",
+        os.path.join(root, "app", "__init__.py"): "",
+        os.path.join(root, "app", "main.py"): MAIN,
+        os.path.join(root, "app", "config.py"): CONFIG,
+    }
+    for index in range(max(0, files - 3)):
+        package = f"pkg_{index // MODULES_PER_PACKAGE}"
+        paths[os.path.join(root, "app", package, f"module_{index}.py")] = _module(rng, package, index)
+        paths.setdefault(os.path.join(root, "app", package, "__init__.py"), "")
+
+    for path, content in paths.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    if git:
+        for args in (["init", "-q"], ["config", "user.name", "bench"], ["config", "user.email", "bench@example.com"],
+                     ["add", "-A"], ["commit", "-q", "-m", "initial"]):
+            subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+    return sorted(paths)
+
+
+def reset_repo(root: str) -> None:
+    """Drop everything a run changed or committed, back to the initial commit."""
+    initial = subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=root, check=True,
+                             capture_output=True, text=True).stdout.split()[0]
+    subprocess.run(["git", "reset", "-q", "--hard", initial], cwd=root, check=True, capture_output=True)
+    subprocess.run(["git", "clean", "-q", "-fd"], cwd=root, check=True, capture_output=True)
@@ -0,0 +1,64 @@
+"""Wall-clock time of single-request vs. chunked transcription against audio length.
+
+Runs against the local stand-in transcription server, whose latency is modelled as a fixed
+per-request cost plus a cost proportional to the uploaded audio length.
+
+Usage:
+    python -m benchmarks.transcription_benchmark [--lengths 30 120 300 600] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import time
+
+from agent.tools.audio_chunking import transcribe_long_audio
+from agent.tools.audio_utils import atranscribe_audio
+from agent.tools.http_clients import close_http_clients
+from tests.support.transcription_server import FakeTranscriptionServer, make_marker_wav
+
+
+async def run(lengths, window_seconds, overlap_seconds, concurrency, base_latency, seconds_per_audio_second):
+    print(f"{'audio (s)':>10} {'single (s)':>11} {'chunked (s)':>12} {'speedup':>8} {'chunks':>7} {'match':>6}")
+
+    async with FakeTranscriptionServer(base_latency, seconds_per_audio_second) as server:
+        for length in lengths:
+            audio, expected = make_marker_wav(length)
+
+            started = time.perf_counter()
+            single = await atranscribe_audio(audio, filename="audio.wav", url=server.url)
+            single_time = time.perf_counter() - started
+
+            requests_before = server.requests
+            started = time.perf_counter()
+            chunked = await transcribe_long_audio(
+                audio,
+                window_seconds=window_seconds,
+                overlap_seconds=overlap_seconds,
+                max_concurrency=concurrency,
+                transcribe=lambda chunk, filename: atranscribe_audio(chunk, filename=filename, url=server.url),
+            )
+            chunked_time = time.perf_counter() - started
+
+            print(f"{length:>10.0f} {single_time:>11.2f} {chunked_time:>12.2f} "
+                  f"{single_time / chunked_time:>7.1f}x {server.requests - requests_before:>7} "
+                  f"{str(single == expected and chunked == expected):>6}")
+
+    await close_http_clients()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=float, nargs="+", default=[30, 60, 120, 300, 600])
+    parser.add_argument("--window", type=float, default=60.0, help="Chunk length in seconds")
+    parser.add_argument("--overlap", type=float, default=2.0, help="Overlap of fixed-window cuts in seconds")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--base-latency", type=float, default=0.3, help="Fixed seconds per request")
+    parser.add_argument("--rtf", type=float, default=0.01,
+                        help="Server processing seconds per second of audio (real-time factor)")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.lengths, args.window, args.overlap, args.concurrency, args.base_latency, args.rtf))
+
+
+if __name__ == "__main__":
+    main()
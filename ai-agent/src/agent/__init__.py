@@ -10,7 +10,7 @@ from .core.state import State
 from .models.task_models import Task, TaskList
 
 # Tools
-from .tools.llm_tools import llm_with_tools, str_replace, run_bash_command, create_file, view_file
+from .tools.llm_tools import get_llm_with_tools, str_replace, run_bash_command, create_file, view_file, search_code
 from .tools.file_utils import get_project_structure_as_string, concat_files_in_str, concat_folder_to_file
 
 # Models
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 import os
-from typing import Literal
+from typing import Annotated, Callable, List, Literal, Optional, TypedDict
 
-from langchain_core.messages import SystemMessage, ToolMessage, HumanMessage
-from langgraph.constants import END
+from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.constants import START, END
+from langgraph.graph import StateGraph, add_messages
 
 from .state import State
-from ..tools.llm_tools import llm_with_tools, tools_by_name
-from ..prompts.prompts import agent_instruction
-from .ai_models import kimi_llm, gpt5
+from ..tools.llm_tools import get_llm_with_tools, tools_by_name
+from ..tools.touched_files import merge_touched_files
+from ..prompts.prompts import agent_instruction, make_plan_steps_instruction
+from .router import get_router
 from ..models.step_models import Step, StepList
+from ..persistence import get_blob_store, get_artefact_store, run_scope
+from .step_dag import DagRun, run_step_dag
+from .plan_stream import parse_step_stream, render_plan
 
 
 def segment_into_steps(state: State):
@@ -18,7 +24,7 @@ def segment_into_steps(state: State):
     Segment the plan into steps.
     """
     plan = state["plan"]
-    agent_metadata = state.get("agent_metadata", "")
+    agent_metadata = get_blob_store().get(state.get("agent_metadata"))
 
     from ..prompts.prompts import segment_plan_into_steps
     formatted_prompt = segment_plan_into_steps.format(
@@ -26,10 +32,8 @@ def segment_into_steps(state: State):
         agent_metadata=agent_metadata,
     )
 
-    structured_llm = gpt5.with_structured_output(StepList)
-
     print("Invoking LLM to segment plan into steps...")
-    result = structured_llm.invoke(formatted_prompt)
+    result = get_router().invoke("planner", formatted_prompt, schema=StepList)
 
     # Initialize step_message_indices with the first step starting at index 0
     step_message_indices = {0: len(state.get("messages", []))}
@@ -64,10 +68,10 @@ def llm_call(state: State):
         previous_steps=previous_steps,
         plan=state.get("plan", ""),
         action_history="\n".join([str(msg) for msg in current_step_messages]),
-        project_structure=state.get("project_structure", ""),
+        project_structure=get_blob_store().get(state.get("project_structure")),
     )
 
-    messages = llm_with_tools.invoke(formatted_instruction)
+    messages = get_llm_with_tools().invoke(formatted_instruction)
 
     return {
         "messages": [messages]
@@ -99,11 +103,14 @@ def tool_node(state: dict):
     """Performs the tool call"""
 
     result = []
+    touched = []
     for tool_call in state["messages"][-1].tool_calls:
         tool = tools_by_name[tool_call["name"]]
-        observation = tool.invoke(tool_call["args"])
-        result.append(ToolMessage(content=observation, tool_call_id=tool_call["id"]))
-    return {"messages": result}
+        # Invoked with the whole call the tool returns a ToolMessage, file tools put the paths they wrote in its artifact
+        message = tool.invoke({**tool_call, "type": "tool_call"})
+        touched.extend(message.artifact or [])
+        result.append(message)
+    return {"messages": result, "touched_files": touched}
 
 
 def next_step(state: State):
@@ -118,3 +125,128 @@ def next_step(state: State):
 
     # Increment the current step index
     return {"current_step_index": next_step_index, "step_message_indices": step_message_indices}
+
+
+# Steps that run at the same time, independent steps touching different files
+STEP_MAX_PARALLEL = int(os.getenv("STEP_MAX_PARALLEL", "4"))
+STEP_RECURSION_LIMIT = 100
+
+
+class StepState(TypedDict):
+    messages: Annotated[list, add_messages]
+    step: Step
+    previous_steps: str
+    plan: str
+    project_structure: str
+    touched_files: Annotated[set, merge_touched_files]
+
+
+def step_llm_call(state: StepState):
+    """LLM works on a single step of the plan, with the messages of that step only"""
+    step = state["step"]
+    current_step = step.description
+    if step.files:
+        current_step += "\nFiles of this step: " + ", ".join(step.files)
+
+    formatted_instruction = agent_instruction.format(
+        current_step=current_step,
+        previous_steps=state.get("previous_steps", ""),
+        plan=state.get("plan", ""),
+        action_history="\n".join([str(msg) for msg in state.get("messages", [])]),
+        project_structure=state.get("project_structure", ""),
+    )
+    return {"messages": [get_llm_with_tools().invoke(formatted_instruction)]}
+
+
+def step_should_continue(state: StepState) -> Literal["Action", "__end__"]:
+    """The step is finished once the LLM stops calling tools"""
+    if state["messages"][-1].tool_calls:
+        return "Action"
+    return END
+
+
+def step_agent():
+    """Tool loop for one plan step, run as a subgraph per step"""
+    graph = StateGraph(StepState)
+    graph.add_node("llm_call", step_llm_call)
+    graph.add_node("environment", tool_node)
+    graph.add_edge(START, "llm_call")
+    graph.add_conditional_edges("llm_call", step_should_continue, {"Action": "environment", END: END})
+    graph.add_edge("environment", "llm_call")
+    return graph
+
+
+def _step_executor(plan: Callable[[], str], project_structure: str) -> Callable[[Step, List[Step]], dict]:
+    """Runs one step in its own tool-loop subgraph and returns the step's messages and touched files."""
+    agent = step_agent().compile()
+
+    def execute(step: Step, finished: List[Step]):
+        result = agent.invoke(
+            {
+                "messages": [],
+                "step": step,
+                "previous_steps": "\n".join(f"- {s.description}" for s in finished),
+                "plan": plan(),
+                "project_structure": project_structure,
+            },
+            {"recursion_limit": STEP_RECURSION_LIMIT},
+        )
+        return {"messages": result["messages"], "touched_files": result.get("touched_files") or set()}
+
+    return execute
+
+
+def _step_messages(run: DagRun) -> list:
+    # Messages of each step stay together, in the order the steps finished
+    messages = []
+    for step_id in run.completion_order:
+        messages.extend((run.outcomes[step_id].result or {}).get("messages", []))
+    return messages
+
+
+def _step_touched_files(run: DagRun) -> list:
+    return sorted(path for outcome in run.outcomes.values() for path in (outcome.result or {}).get("touched_files", ()))
+
+
+def plan_and_run_steps(state: State, config: Optional[RunnableConfig] = None):
+    """
+    Stream the plan as structured steps and execute each step as soon as it is complete.
+
+    The planner writes one JSON object per step, so there is no separate segmentation call
+    and the first steps run while the rest of the plan is still being generated.
+    """
+    blobs = get_blob_store()
+    instruction = make_plan_steps_instruction.format(
+        user_task=state["user_task"],
+        context=blobs.get(state["context"]),
+        agent_metadata=blobs.get(state["agent_metadata"]),
+    )
+
+    transcript: List[str] = []
+    # Steps started mid-stream see the plan as far as it has been written
+    execute = _step_executor(lambda: "".join(transcript), blobs.get(state.get("project_structure")))
+
+    print("Streaming the plan and running steps as they arrive...")
+    run = run_step_dag(parse_step_stream(get_router().stream("planner", instruction), transcript), execute,
+                       max_workers=STEP_MAX_PARALLEL)
+    print(f"Ran {len(run.outcomes)} steps with DAG depth {run.depth}, up to {run.max_parallel} at once")
+
+    plan = render_plan(run.steps)
+    get_artefact_store().write(*run_scope(config), "example.md", plan)
+
+    return {
+        "messages": [HumanMessage(content=plan)] + _step_messages(run),
+        "plan": plan,
+        "steps": run.steps,
+        "step_results": run.stats(),
+        "touched_files": _step_touched_files(run),
+        "plan_error": run.stream_error or "",
+    }
+
+
+def route_after_steps(state: State) -> Literal["push_to_git", "__end__"]:
+    """Only push when every step succeeded, a partial change is left for review"""
+    if state.get("plan_error") or any(result["error"] for result in state.get("step_results", [])):
+        print("Some steps failed or were skipped, not pushing")
+        return END
+    return "push_to_git"
@@ -1,64 +1,171 @@
+"""Chat models used by the agent graphs.
+
+Models are built on first use through `get_model`, so importing this module (and the graph
+modules that depend on it) does not import any provider SDK or construct any client.
+"""
+
 import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
 
 load_dotenv()
-api_key = os.getenv("GROQ_API_KEY")
-kimi_llm = ChatGroq(
-    model="moonshotai/kimi-k2-instruct",
-    temperature=0,
-    max_tokens=None,
-    timeout=None,
-    max_retries=2,
-    api_key=api_key,
-)
-
-from langchain_together import ChatTogether
-
-api_key = os.getenv("TOGETHER_API_KEY")
-
-deepseek_llm = ChatTogether(
-    model="deepseek-ai/DeepSeek-R1",
-    temperature=0,
-    max_tokens=1000000,
-    timeout=None,
-    max_retries=2,
-    api_key=api_key,
-)
-
-api_key = os.getenv("GOOGLE_API_KEY")
-
-gemini_flash_lite = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash-lite-preview-06-17",
-    api_key=api_key,
-)
-
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from os import getenv
-from dotenv import load_dotenv
 
-load_dotenv()
+model1 = "qwen/qwen3-coder:free"
+model2 = "qwen/qwen3-235b-a22b-thinking-2507"
+model3 = "openai/gpt-oss-120b"
+model4 = "openai/gpt-5"
 
-template = """Question: {question}
-Answer: Let's think step by step."""
+OPEN_ROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
-prompt = PromptTemplate(template=template, input_variables=["question"])
 
-model1 = "qwen/qwen3-coder:free"
-model2 = "qwen/qwen3-235b-a22b-thinking-2507"
-model3= "openai/gpt-oss-120b"
-model4= "openai/gpt-5"
-open_router_model = ChatOpenAI(
-  api_key=getenv("OPENROUTER_API_KEY"),
-  base_url="https://openrouter.ai/api/v1",
-  model=model4
-)
-
-gpt5 = ChatOpenAI(
-    model="gpt-4.1-2025-04-14",
-    api_key=getenv("OPENAI_API_KEY"),
-)
+def _kimi_llm():
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
+        model="moonshotai/kimi-k2-instruct",
+        temperature=0,
+        max_tokens=None,
+        timeout=None,
+        max_retries=2,
+        api_key=os.getenv("GROQ_API_KEY"),
+    )
+
+
+def _deepseek_llm():
+    from langchain_together import ChatTogether
+
+    return ChatTogether(
+        model="deepseek-ai/DeepSeek-R1",
+        temperature=0,
+        max_tokens=1000000,
+        timeout=None,
+        max_retries=2,
+        api_key=os.getenv("TOGETHER_API_KEY"),
+    )
+
+
+def _gemini_flash_lite():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash-lite-preview-06-17",
+        api_key=os.getenv("GOOGLE_API_KEY"),
+    )
+
+
+def _open_router(model: str):
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        api_key=os.getenv("OPENROUTER_API_KEY"),
+        base_url=OPEN_ROUTER_BASE_URL,
+        model=model,
+    )
+
+
+def _gpt5():
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model="gpt-4.1-2025-04-14",
+        api_key=os.getenv("OPENAI_API_KEY"),
+    )
+
+
+class ModelRegistry:
+    """
+    Named model factories whose models are built once, on first use.
+
+    Nodes run in worker threads, so construction is guarded by a lock. Tests and benchmarks
+    can replace a model with `override` without patching the modules that use it.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        # (model name, schema) -> (model, structured runnable built from it)
+        self._structured: Dict[Tuple[str, type], Tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        with self._lock:
+            self._factories[name] = factory
+            self._models.pop(name, None)
+
+    def override(self, name: str, model: Any) -> None:
+        """Use an already built model (e.g. a fake) for a name."""
+        with self._lock:
+            self._models[name] = model
+
+    def reset(self, name: Optional[str] = None) -> None:
+        """Drop built models (and overrides), so the next lookup goes through the factory again."""
+        with self._lock:
+            if name is None:
+                self._models.clear()
+            else:
+                self._models.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if name not in self._models:
+                if name.startswith("openrouter:"):
+                    self._models[name] = _open_router(name[len("openrouter:"):])
+                elif name in self._factories:
+                    self._models[name] = self._factories[name]()
+                else:
+                    raise KeyError(f"Unknown model '{name}', expected one of {sorted(self._factories)}")
+            return self._models[name]
+
+    def structured(self, name: str, schema: type) -> Any:
+        """
+        The model registered under a name, wrapped with `with_structured_output(schema)`.
+
+        The wrapper (schema conversion, bound tool and output parser) is built once per model
+        and schema and reused by every call. A model replaced through `register`, `override`
+        or `reset` gets a new wrapper on its next use.
+        """
+        model = self.get(name)
+        cached = self._structured.get((name, schema))
+        if cached is not None and cached[0] is model:
+            return cached[1]
+
+        runnable = model.with_structured_output(schema)
+        with self._lock:
+            self._structured[(name, schema)] = (model, runnable)
+        return runnable
+
+
+registry = ModelRegistry()
+registry.register("kimi_llm", _kimi_llm)
+registry.register("deepseek_llm", _deepseek_llm)
+registry.register("gemini_flash_lite", _gemini_flash_lite)
+registry.register("open_router_model", lambda: _open_router(model4))
+registry.register("gpt5", _gpt5)
+
+
+def get_model(name: str) -> Any:
+    """Return the model registered under a name, building it on first use."""
+    return registry.get(name)
+
+
+def get_open_router_model(model: str) -> Any:
+    """Return a shared OpenRouter client for a model id, e.g. "google/gemini-2.5-pro"."""
+    return registry.get(f"openrouter:{model}")
+
+
+def get_structured_model(name: str, schema: type) -> Any:
+    """Return the shared structured-output wrapper of a registered model for a schema."""
+    return registry.structured(name, schema)
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps `from agent.core.ai_models import gpt5` working; the model is still only built when imported
+    if name in registry._factories:
+        return get_model(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,91 +1,129 @@
 from __future__ import annotations
+import asyncio
 import os
 import re
+from typing import Optional
 
 
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
 
+from .ai_models import get_open_router_model, get_structured_model
 from .chat_graph_state import ChatGraphState
-from ..prompts.chat_grap_prompts import generate_answer_instruction
+from .racing import ANSWER_RACE_MAX, ANSWER_RACE_MODELS, race_stream
+from ..models.models import RestructuredText
+from ..prompts.chat_grap_prompts import generate_answer_instruction, generate_answer_from_transcript_instruction, \
+    summarize_conversation_instruction
+from ..memory import advance_memory, format_messages, get_message_index_store
 from ..tools.kokoroko_utils import text_to_speech_upload_file
 
 load_dotenv()
 
-import requests
-import tempfile
-
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
-from ..tools.audio_utils import transcribe_audio
+from langchain_core.runnables import RunnableConfig
+from ..tools.transcript_cache import get_transcript_cache
+from ..tools.http_clients import to_public_file_url
 
 
-class RestructuredText(BaseModel):
-    text: str = Field(..., description="Restructured text")
+load_dotenv()
 
+# How the raw voice transcript is turned into the user message:
+#   sequential - restructure it with an LLM call before answering (the original behaviour)
+#   skip       - answer straight from the raw transcript
+#   parallel   - answer from the raw transcript while the restructuring runs concurrently,
+#                the enhanced text is cached and stored on the human message afterwards
+#   inline     - no separate call, the answer prompt tells the model to interpret the raw transcript
+ENHANCEMENT_STRATEGIES = ("sequential", "skip", "parallel", "inline")
+DEFAULT_ENHANCEMENT_STRATEGY = os.getenv("TRANSCRIPT_ENHANCEMENT", "sequential")
 
-load_dotenv()
 
+# Token budget of the verbatim history window; older turns are folded into a rolling summary
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "6000"))
+MEMORY_SUMMARY_MODEL = os.getenv("MEMORY_SUMMARY_MODEL", "google/gemini-flash-1.5")
+MEMORY_SUMMARY_MAX_WORDS = 400
+# Past messages (outside the window) pulled back into the prompt by similarity to the new message, 0 disables
+MEMORY_RETRIEVAL_TOP_K = int(os.getenv("MEMORY_RETRIEVAL_TOP_K", "4"))
 
-def _transcribe_and_enhance_audio(audio_path: str, model: str) -> str:
-    """
-    Helper to chain transcription and enhancement.
-    Handles both local file paths and remote URLs.
-    """
-    local_audio_path = audio_path
-    temp_file_handle = None
 
-    if audio_path.startswith(('http://', 'https://')):
-        print(f"   > URL detected. Downloading audio from {audio_path}...")
-        try:
-            response = requests.get(audio_path, stream=True)
-            response.raise_for_status()
+def _enhancement_strategy(state: ChatGraphState) -> str:
+    strategy = state.get("enhancement_strategy") or DEFAULT_ENHANCEMENT_STRATEGY
+    if strategy not in ENHANCEMENT_STRATEGIES:
+        raise ValueError(f"Unknown enhancement strategy '{strategy}', expected one of {ENHANCEMENT_STRATEGIES}")
+    return strategy
 
-            temp_file_handle = tempfile.NamedTemporaryFile(delete=False, suffix=".ogg")
 
-            with temp_file_handle as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+def _open_router_model(model: str):
+    return get_open_router_model(model)
 
-            local_audio_path = temp_file_handle.name
-            print(f"   > Audio downloaded to temporary file: {local_audio_path}")
 
-        except requests.exceptions.RequestException as e:
-            raise ConnectionError(f"Failed to download audio from {audio_path}. Error: {e}")
+async def _answer(ai_model: str, instruction: str):
+    """Answer with the requested model, or race it against ANSWER_RACE_MODELS when configured."""
+    candidates = list(dict.fromkeys([ai_model, *ANSWER_RACE_MODELS]))[:max(1, ANSWER_RACE_MAX)]
+    if len(candidates) == 1:
+        return await _open_router_model(ai_model).ainvoke(instruction)
 
-    try:
-        if not os.path.exists(local_audio_path):
-            raise FileNotFoundError(f"Audio file not found: {local_audio_path}")
+    race = await race_stream({name: _open_router_model(name) for name in candidates}, instruction)
+    print(f"   > {race.model} won the race of {len(candidates)} models in {race.seconds:.2f}s")
+    return race.message
 
-        transcript = transcribe_audio(local_audio_path)
-        print(f"   > Raw Transcript: '{transcript[:100]}...'")
 
-        prompt = f"""I want you restructure the information below better. Restructure it the way you find it best. Change some information if you think it is better.
+async def _enhance_transcript(transcript: str, model: str) -> str:
+    """Restructure a raw transcript with the given OpenRouter model."""
+    prompt = f"""I want you restructure the information below better. Restructure it the way you find it best. Change some information if you think it is better.
     Regardless of the input write it in English.
 
     Text:
     "{transcript}"
     """
-        open_router_model = ChatOpenAI(
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1",
-            model=model
-        )
+    structured_llm = get_structured_model(f"openrouter:{model}", RestructuredText)
+
+    response: RestructuredText = await structured_llm.ainvoke(prompt)
+    return response.text
+
+
+async def _transcribe_audio(audio_path: str, model: str, strategy: str) -> tuple[str, str, Optional[str]]:
+    """
+    Transcribe the audio and, depending on the strategy, enhance it.
+    Handles both local file paths and remote URLs; remote audio is streamed straight
+    into the transcription upload without being written to disk.
+
+    Both steps go through the transcript cache, so retries and regenerations of the same
+    audio skip Whisper and, for a model that already enhanced it, the LLM call too.
+
+    Returns:
+        A tuple of (cache key, raw transcript, enhanced transcript or None if not enhanced yet)
+    """
+    cache = get_transcript_cache()
+
+    entry = await cache.get_or_transcribe(audio_path)
+    print(f"   > Raw Transcript: '{entry.raw_transcript[:100]}...'")
 
-        structured_llm = open_router_model.with_structured_output(RestructuredText)
+    if strategy == "sequential":
+        enhanced_text = await cache.get_or_enhance(
+            entry, model, lambda transcript: _enhance_transcript(transcript, model)
+        )
+    else:
+        # An enhancement cached by an earlier run is free, use it whatever the strategy
+        enhanced_text = entry.enhanced_for(model)
 
-        response: RestructuredText = structured_llm.invoke(prompt)
-        enhanced_text = response.text
+    if enhanced_text is not None:
         print(f"   > Enhanced Transcript: '{enhanced_text[:100]}...'")
-        return enhanced_text
+    return entry.audio_key, entry.raw_transcript, enhanced_text
 
-    finally:
-        if temp_file_handle:
-            os.unlink(local_audio_path)
-            print(f"   > Cleaned up temporary file: {local_audio_path}")
+
+async def _enhance_in_background(audio_key: str, transcript: str, model: str) -> Optional[str]:
+    """Enhance a transcript and store it in the cache; failures only cost the enhancement."""
+    cache = get_transcript_cache()
+    try:
+        entry = await cache.get(audio_key)
+        if entry is None:
+            return await _enhance_transcript(transcript, model)
+        return await cache.get_or_enhance(entry, model, lambda raw: _enhance_transcript(raw, model))
+    except Exception as e:
+        print(f"   > Background transcript enhancement failed: {e}")
+        return None
 
 
-def prepare_inputs_node(state: ChatGraphState):
+async def prepare_inputs_node(state: ChatGraphState):
     """
     Prepares the final input string by processing audio and/or text.
     This node handles all three cases: audio-only, text-only, and both.
@@ -94,6 +132,7 @@ def prepare_inputs_node(state: ChatGraphState):
     text_input = state.get("text_input")
     audio_path = state.get("audio_path")
     ai_model = state.get("ai_model", "google/gemini-flash-1.5")
+    strategy = _enhancement_strategy(state)
 
     if ai_model is None:
         ai_model = "google/gemini-flash-1.5"
@@ -103,59 +142,140 @@ def prepare_inputs_node(state: ChatGraphState):
 
     processed_parts = []
     enhanced_transcript = None
+    raw_transcript = None
+    transcript_key = None
 
     if text_input:
         print("   > Text input detected.")
         processed_parts.append(f"{text_input}")
 
     if audio_path:
-        print("   > Audio path detected. Processing audio...")
-        enhanced_transcript = _transcribe_and_enhance_audio(audio_path, ai_model)
-        processed_parts.append(f"{enhanced_transcript}")
+        print(f"   > Audio path detected. Processing audio (enhancement: {strategy})...")
+        transcript_key, raw_transcript, enhanced_transcript = await _transcribe_audio(audio_path, ai_model, strategy)
+        processed_parts.append(f"{enhanced_transcript or raw_transcript}")
 
     final_input = "\n\n".join(processed_parts)
     print(f"   > Final Processed Input: '{final_input[:150]}...'")
 
     return {
         "processed_input": final_input,
-        "enhanced_transcript": enhanced_transcript
+        "enhanced_transcript": enhanced_transcript,
+        "raw_transcript": raw_transcript,
+        "transcript_key": transcript_key,
     }
 
 
-def generate_answer_node(state: ChatGraphState):
+async def _summarize(summary: str, new_messages: str) -> str:
+    instruction = summarize_conversation_instruction.format(
+        summary=summary or "(empty)",
+        messages=new_messages,
+        max_words=MEMORY_SUMMARY_MAX_WORDS,
+    )
+    result = await _open_router_model(MEMORY_SUMMARY_MODEL).ainvoke(instruction)
+    return result.content.split("</think>")[-1].strip()
+
+
+async def update_memory_node(state: ChatGraphState):
+    """
+    Slides the token-budgeted history window and summarises the turns that just fell out of it.
+    Runs in parallel with prepare_inputs_node.
+    """
+    print("---NODE: Updating Memory---")
+    messages = state.get("messages", [])
+    summarized_count = state.get("summarized_count") or 0
+
+    try:
+        update = await advance_memory(
+            messages,
+            state.get("conversation_summary"),
+            summarized_count,
+            MEMORY_TOKEN_BUDGET,
+            _summarize,
+        )
+    except Exception as e:
+        # Keep the previous summary; the window simply stays larger for this turn
+        print(f"   > Summarising history failed: {e}")
+        return {}
+
+    if update.evicted:
+        print(f"   > Summarised {update.evicted} messages, window holds {len(messages) - update.summarized_count}")
+    return {"conversation_summary": update.summary, "summarized_count": update.summarized_count}
+
+
+async def _build_context(state: ChatGraphState, config: Optional[RunnableConfig], query: str) -> str:
+    """Assemble the prompt history: rolling summary, relevant older turns and the recent window."""
+    messages = state["messages"]
+    summarized_count = state.get("summarized_count") or 0
+    summary = state.get("conversation_summary")
+
+    context = format_messages(messages[summarized_count:])
+    if not summary:
+        return context
+
+    sections = [f"Summary of the earlier conversation:\n{summary}"]
+
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    if thread_id and MEMORY_RETRIEVAL_TOP_K > 0:
+        try:
+            positions = await get_message_index_store().arelevant_turns(
+                str(thread_id), messages, query, MEMORY_RETRIEVAL_TOP_K, end=summarized_count
+            )
+        except Exception as e:
+            print(f"   > Retrieving earlier messages failed: {e}")
+            positions = []
+        if positions:
+            sections.append("Relevant earlier messages:\n" + format_messages([messages[i] for i in positions]))
+
+    sections.append(f"Recent messages:\n{context}")
+    return "\n\n".join(sections)
+
+
+async def generate_answer_node(state: ChatGraphState, config: Optional[RunnableConfig] = None):
     """Generates the final answer and attaches the audio_path as metadata."""
     print("---NODE: Generating Answer---")
     user_task = state["processed_input"]
-    messages = state["messages"]
     ai_model = state.get("ai_model", "google/gemini-2.5-pro")
+    strategy = _enhancement_strategy(state)
+    raw_transcript = state.get("raw_transcript")
+    enhanced_transcript = state.get("enhanced_transcript")
 
     if ai_model is None:
         ai_model = "google/gemini-2.5-pro"
 
     audio_path = state.get("audio_path")
 
-    context = "\n".join(
-        f"Human: {m.content}" if isinstance(m, HumanMessage) else f"AI: {m.content}"
-        for m in messages
-    )
+    context = await _build_context(state, config, user_task)
+
+    from_raw_transcript = raw_transcript is not None and enhanced_transcript is None
+    instruction_template = generate_answer_instruction
+    if from_raw_transcript and strategy == "inline":
+        instruction_template = generate_answer_from_transcript_instruction
 
-    instruction = generate_answer_instruction.format(
+    instruction = instruction_template.format(
         user_task=user_task,
         context=context,
     )
 
-    open_router_model = ChatOpenAI(
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-        base_url="https://openrouter.ai/api/v1",
-        model=ai_model
-    )
-    result = open_router_model.invoke(instruction)
+    enhancement = None
+    if from_raw_transcript and strategy == "parallel":
+        # The enhancement uses the same model choice as prepare_inputs_node
+        enhancement_model = state.get("ai_model") or "google/gemini-flash-1.5"
+        enhancement = asyncio.create_task(
+            _enhance_in_background(state.get("transcript_key"), raw_transcript, enhancement_model)
+        )
+
+    result = await _answer(ai_model, instruction)
 
-    audio_path = audio_path.replace("http://files_app:5001", "https://files.nikolanikolovski.com")
+    if enhancement is not None:
+        enhanced_transcript = await enhancement
+        if enhanced_transcript is not None:
+            user_task = user_task.replace(raw_transcript, enhanced_transcript)
 
     human_message_kwargs = {}
     if audio_path:
-        human_message_kwargs["file_url"] = audio_path
+        human_message_kwargs["file_url"] = to_public_file_url(audio_path)
+    if raw_transcript is not None:
+        human_message_kwargs["raw_transcript"] = raw_transcript
 
     human_msg = HumanMessage(
         content=user_task,
@@ -165,7 +285,7 @@ def generate_answer_node(state: ChatGraphState):
     result.content = result.content.split("</think>")[-1]
     result.content = re.sub(r'\n{2,}', '\n', result.content)
 
-    output_audio_file = text_to_speech_upload_file(result.content)
+    output_audio_file = await text_to_speech_upload_file(result.content)
 
     result.additional_kwargs["file_url"] = output_audio_file
 
@@ -173,7 +293,10 @@ def generate_answer_node(state: ChatGraphState):
         "messages": [human_msg, result],
         "processed_input": None,
         "enhanced_transcript": None,
+        "raw_transcript": None,
+        "transcript_key": None,
         "audio_path": None,
         "ai_model": None,
+        "enhancement_strategy": None,
         "text_input": None,
     }
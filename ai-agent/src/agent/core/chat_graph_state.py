@@ -18,6 +18,15 @@ class ChatGraphState(TypedDict):
 
         # Intermediate state for clarity
         enhanced_transcript: The processed text from the audio file (optional).
+        raw_transcript: The Whisper transcript of the audio file (optional).
+        transcript_key: Transcript cache key of the audio file (optional).
+        enhancement_strategy: How the transcript is enhanced - sequential, skip,
+                              parallel or inline (optional, see chat_graph).
+
+        # Conversation memory
+        conversation_summary: Rolling summary of messages[:summarized_count].
+        summarized_count: How many leading messages the summary covers; the
+                          prompt only carries messages[summarized_count:] verbatim.
 
         # Final consolidated input for the generator
         processed_input: The final text (from text, audio, or both) to be used
@@ -29,7 +38,14 @@ class ChatGraphState(TypedDict):
     # Inputs - at least one must be provided
     text_input: Optional[str]
     audio_path: Optional[str]
+    enhancement_strategy: Optional[str]
 
     # Intermediate and final processed data
     enhanced_transcript: Optional[str]
-    processed_input: str
\ No newline at end of file
+    raw_transcript: Optional[str]
+    transcript_key: Optional[str]
+    processed_input: str
+
+    # Conversation memory
+    conversation_summary: Optional[str]
+    summarized_count: int
\ No newline at end of file
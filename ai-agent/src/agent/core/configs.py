@@ -3,11 +3,15 @@ from langgraph.graph import StateGraph
 from typing import Literal
 
 from agent.core.chat_graph_state import ChatGraphState
-from src.agent.core.chat_graph import prepare_inputs_node, generate_answer_node
+from src.agent.persistence import get_local_checkpointer
+from src.agent.utils.instrumentation import instrumented
+from src.agent.core.router import start_structured_output_warmup
+from src.agent.core.chat_graph import prepare_inputs_node, generate_answer_node, update_memory_node
 from src.agent.core.state import State
-from src.agent.core.agent import llm_call, tool_node, should_continue, segment_into_steps, next_step
+from src.agent.core.agent import llm_call, tool_node, should_continue, segment_into_steps, next_step, \
+    plan_and_run_steps, route_after_steps
 from src.agent.core.graph import llm_file_explore, llm_call_evaluator, build_context, make_plan, determine_input_type, \
-    answer_question, push_to_git
+    answer_question, push_to_git, await_push, search_file_contents, merge_exploration
 
 
 def exploration():
@@ -74,7 +78,8 @@ def action():
         {
             "Action": "environment",
             "next_step": "next_step",
-            END: END,
+            # This graph does not commit, the last step ends the run
+            "push_to_git": END,
         },
     )
     graph.add_edge("environment", "llm_call")
@@ -98,52 +103,59 @@ def explore_plan_action():
     graph.add_node("answer_question", answer_question)
 
     # Add nodes for task processing
-    graph.add_node("llm_call", llm_call)
-    graph.add_node("environment", tool_node)
-    graph.add_node("segment_into_steps", segment_into_steps)
-    graph.add_node("next_step", next_step)
     graph.add_node("llm_file_explore", llm_file_explore)
     graph.add_node("llm_call_evaluator", llm_call_evaluator)
     graph.add_node("build_context", build_context)
-    graph.add_node("make_plan", make_plan)
+    graph.add_node("plan_and_run_steps", plan_and_run_steps)
     graph.add_node("push_to_git", push_to_git)
+    graph.add_node("await_push", await_push)
+
 
+    graph.add_node("search_file_contents", search_file_contents)
+    graph.add_node("merge_exploration", merge_exploration)
 
-    # Start with file exploration
+    # Classification and full-text search only need the user task, so they run in parallel with file exploration
     graph.add_edge(START, "llm_file_explore")
-    graph.add_edge("llm_file_explore", "llm_call_evaluator")
-    graph.add_edge("llm_call_evaluator", "build_context")
+    graph.add_edge(START, "search_file_contents")
+    graph.add_edge(START, "determine_input_type")
+    graph.add_edge(["llm_file_explore", "search_file_contents", "determine_input_type"], "merge_exploration")
 
-    # After context is built, determine input type
-    graph.add_edge("build_context", "determine_input_type")
+    # Questions skip the reflection loop, tasks refine the file selection first
+    graph.add_conditional_edges(
+        "merge_exploration",
+        route_input,
+        {
+            "question": "build_context",
+            "task": "llm_call_evaluator",
+        },
+    )
+    graph.add_edge("llm_call_evaluator", "build_context")
 
-    # Add conditional edges based on input type
     graph.add_conditional_edges(
-        "determine_input_type",
+        "build_context",
         route_input,
         {
             "question": "answer_question",
-            "task": "make_plan",
+            "task": "plan_and_run_steps",
         },
     )
 
     # Question answering path
     graph.add_edge("answer_question", END)
-    graph.add_edge("make_plan", "segment_into_steps")
-    graph.add_edge("segment_into_steps", "llm_call")
 
+    # The planner streams structured steps, which start running (in parallel where
+    # independent, each with its own tool loop) before the plan is complete
     graph.add_conditional_edges(
-        "llm_call",
-        should_continue,
+        "plan_and_run_steps",
+        route_after_steps,
         {
-            "Action": "environment",
-            "next_step": "next_step",
             "push_to_git": "push_to_git",
+            END: END,
         },
     )
-    graph.add_edge("environment", "llm_call")
-    graph.add_edge("next_step", "llm_call")
-    graph.add_edge("push_to_git", END)
+    # The commit is local and fast, the push runs in the background and is collected last
+    graph.add_edge("push_to_git", "await_push")
+    graph.add_edge("await_push", END)
 
 
     return graph
@@ -152,18 +164,33 @@ def explore_plan_action():
 def simple_graph():
     workflow = StateGraph(ChatGraphState)
 
-    # Add just two nodes
     workflow.add_node("prepare_inputs", prepare_inputs_node)
+    workflow.add_node("update_memory", update_memory_node)
     workflow.add_node("generate_answer", generate_answer_node)
 
-    # The graph is now a simple, linear sequence
-    workflow.set_entry_point("prepare_inputs")
-    workflow.add_edge("prepare_inputs", "generate_answer")
+    # Input processing and history summarisation are independent, run them in parallel
+    workflow.add_edge(START, "prepare_inputs")
+    workflow.add_edge(START, "update_memory")
+    workflow.add_edge(["prepare_inputs", "update_memory"], "generate_answer")
     workflow.add_edge("generate_answer", END)
 
     return workflow
 
 
+def compile_local(workflow: StateGraph):
+    """
+    Compile a graph for local runs with the durable SQLite checkpointer.
+
+    A run interrupted by a crash or a failed node (e.g. push_to_git) resumes from its last
+    checkpoint when invoked again with `None` as input and the same `thread_id`. The exported
+    `graph` stays without a checkpointer, the LangGraph server provides its own.
+    """
+    return instrumented(workflow.compile(checkpointer=get_local_checkpointer()))
+
+
+# Structured-output wrappers are ready before the first run needs them
+start_structured_output_warmup()
 
 optimizer_builder = simple_graph()
-graph = optimizer_builder.compile()
+# Every run records per-node timings and tokens, see agent.utils.instrumentation
+graph = instrumented(optimizer_builder.compile())
@@ -1,22 +1,65 @@
 from __future__ import annotations
 
+import asyncio
 import os
+from typing import List, Optional
 
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
-from pydantic import BaseModel, Field
+from langchain_core.runnables import RunnableConfig
 
-from .ai_models import kimi_llm, gemini_flash_lite, open_router_model, gpt5
+from .router import get_router
 from .state import State
 from ..prompts.prompts import final_context_instruction, make_plan_instruction, input_type_determination_prompt, \
     answer_question_prompt, commit_message_instruction
 from ..tools.file_utils import get_project_structure_as_string, concat_files_in_str, concat_agent_metadata
-from ..models.models import FileReflectionList, SearchFilePathsList
-from ..prompts.prompts import file_planner_instructions, file_reflection_instructions
-from ..utils.git_tools import git_commit_push
+from ..models.models import FileReflectionList, SearchFilePathsList, CommitMessage
+from ..prompts.prompts import file_planner_instructions
+from .reflection import ReflectionEngine
+from ..indexing import Candidate, get_symbol_index, get_bm25_index
+from ..persistence import get_blob_store, get_artefact_store, run_scope
+from ..tools.touched_files import touched_under
+from ..utils.git_service import GitService, start_background_push, wait_for_push
+from ..utils.commit_summary import commit_message
 
 load_dotenv()
 
+REFLECTION_MAX_ROUNDS = int(os.getenv("REFLECTION_MAX_ROUNDS", "3"))
+
+# How llm_file_explore uses the local symbol index:
+#   off  - LLM only, from the project structure
+#   hint - the ranked candidates are added to the LLM prompt
+#   auto - like hint, but short tasks that name a symbol use the candidates without an LLM call
+#   only - candidates only, no LLM call
+SYMBOL_INDEX_MODE = os.getenv("SYMBOL_INDEX_MODE", "hint")
+SYMBOL_INDEX_CANDIDATES = 15
+SYMBOL_INDEX_ONLY_TOP_K = 5
+SIMPLE_TASK_MAX_WORDS = 20
+# Files added to the context by full-text search of the task, 0 disables
+BM25_TOP_FILES = int(os.getenv("BM25_TOP_FILES", "5"))
+# Repository the agent commits to, defaults to the project being edited
+GIT_REPO_PATH = os.getenv("GIT_REPO_PATH", "")
+# How long await_push waits for the background push, a slower push keeps running
+GIT_PUSH_WAIT_SECONDS = float(os.getenv("GIT_PUSH_WAIT_SECONDS", "60"))
+
+
+def _symbol_index_candidates(project_path: str, user_task: str) -> List[Candidate]:
+    if SYMBOL_INDEX_MODE == "off":
+        return []
+    try:
+        return get_symbol_index(project_path).rank(user_task, limit=SYMBOL_INDEX_CANDIDATES)
+    except Exception as e:
+        print(f"Symbol index unavailable: {e}")
+        return []
+
+
+def _index_alone_is_enough(user_task: str, candidates: List[Candidate]) -> bool:
+    """Whether file discovery can skip the LLM: always in "only" mode, for short tasks naming a symbol in "auto" mode."""
+    if SYMBOL_INDEX_MODE == "only":
+        return True
+    if SYMBOL_INDEX_MODE != "auto":
+        return False
+    return len(user_task.split()) <= SIMPLE_TASK_MAX_WORDS and bool(candidates[0].symbols)
 
 
 def llm_file_explore(state: State):
@@ -27,75 +70,91 @@ def llm_file_explore(state: State):
     project_path = state["project_path"]
 
     project_structure = get_project_structure_as_string(project_path)
-    structured_llm = gemini_flash_lite.with_structured_output(SearchFilePathsList)
+    candidates = _symbol_index_candidates(project_path, user_task)
 
-    formatted_prompt = file_planner_instructions.format(
-        user_task=user_task,
-        project_structure=project_structure,
-        project_path=project_path,
-    )
+    if candidates and _index_alone_is_enough(user_task, candidates):
+        print("Using symbol index candidates without an LLM call...")
+        file_paths = [candidate.path for candidate in candidates[:SYMBOL_INDEX_ONLY_TOP_K]]
+    else:
+        formatted_prompt = file_planner_instructions.format(
+            user_task=user_task,
+            project_structure=project_structure,
+            project_path=project_path,
+            candidate_files="\n".join(
+                f"{c.path} [{', '.join(c.symbols)}]" if c.symbols else c.path for c in candidates
+            ) or "(none)",
+        )
+
+        print("Invoking LLM to find relevant file paths...")
+        result: SearchFilePathsList = get_router().invoke(
+            "file_selection", formatted_prompt, schema=SearchFilePathsList
+        )
+        file_paths = result.file_paths
 
-    print("Invoking LLM to find relevant file paths...")
-    result: SearchFilePathsList = structured_llm.invoke(formatted_prompt)
-    filtered_file_paths = [path for path in result.file_paths if not path.endswith('.env')]
+    filtered_file_paths = [path for path in file_paths if not path.endswith('.env')]
     context = concat_files_in_str(filtered_file_paths)
-    return {"context": context, "all_file_paths": set(filtered_file_paths), "project_path": project_path,
-            "project_structure": project_structure}
+    blobs = get_blob_store()
+    return {"context": blobs.put(context), "all_file_paths": set(filtered_file_paths), "project_path": project_path,
+            "project_structure": blobs.put(project_structure)}
 
 
-def llm_call_evaluator(state: State):
-    """LLM evaluates the files in context and suggests additions/removals"""
-    user_task = state["user_task"]
-    project_path = state["project_path"]
-    context = state["context"]
-    all_file_paths = state["all_file_paths"]
+def search_file_contents(state: State):
+    """Ranks project files by BM25 full-text match with the user task and adds the best ones to the context."""
+    if BM25_TOP_FILES <= 0:
+        return {}
+    try:
+        ranked = get_bm25_index(state["project_path"]).rank_files(state["user_task"], limit=BM25_TOP_FILES)
+    except Exception as e:
+        print(f"Full-text search unavailable: {e}")
+        return {}
 
-    # Filter out .env files from all_file_paths
-    all_file_paths = {path for path in all_file_paths if not path.endswith('.env')}
+    print(f"Full-text search candidates: {ranked}")
+    file_paths = [path for path, _ in ranked if not path.endswith('.env')]
+    return {"all_file_paths": set(file_paths), "bm25_file_paths": file_paths}
 
-    project_structure = get_project_structure_as_string(project_path)
-    count = 0
 
-    while True:
-        structured_llm = gemini_flash_lite.with_structured_output(FileReflectionList)
-        formatted_prompt = file_reflection_instructions.format(
-            user_task=state["user_task"],
-            project_structure=project_structure,
-            context=context,
-            project_path=project_path,
+def merge_exploration(state: State):
+    """Join point of the exploration branches: rebuilds the context from every file they selected."""
+    file_paths = sorted(state.get("all_file_paths") or [])
+    return {"context": get_blob_store().put(concat_files_in_str(file_paths))}
 
-        )
-        count += 1
-        if count > 3:
-            return {"context": context}
-
-        try:
-            result: FileReflectionList = structured_llm.invoke(formatted_prompt)
-            print(result)
-
-            if result is None or result.additional_file_paths is None:
-                break
-        except Exception as e:
-            print(f"Error in llm_call_evaluator: {e}")
-            break
-        new_files = [file_path for file_path in result.additional_file_paths if file_path not in all_file_paths]
-
-        if len(new_files) == 0:
-            break
-        else:
-            filtered_new_files = [path for path in new_files if not path.endswith('.env') and "agent_metadata.md" not in path]
-            all_file_paths.update(set(filtered_new_files))
-            context = concat_files_in_str(list(all_file_paths))
 
-    print("*************************************")
-    print(all_file_paths)
-    return {"file_reflection": result, "context": context}
+def llm_call_evaluator(state: State):
+    """LLM evaluates the files in context and suggests additions/removals"""
+    project_path = state["project_path"]
+    blobs = get_blob_store()
+    project_structure = blobs.get(state.get("project_structure")) or get_project_structure_as_string(project_path)
 
+    engine = ReflectionEngine(
+        lambda prompt: get_router().invoke("file_selection", prompt, schema=FileReflectionList),
+        max_rounds=REFLECTION_MAX_ROUNDS,
+    )
+    context = blobs.get(state["context"])
+    result = engine.run(
+        user_task=state["user_task"],
+        project_path=project_path,
+        project_structure=project_structure,
+        file_paths=sorted(state["all_file_paths"]),
+        context=context,
+    )
 
-def build_context(state: State):
+    print("*************************************")
+    print(result.file_paths)
+    update = {
+        "context_file_paths": result.file_paths,
+        "reflection_rounds": result.round_stats(),
+    }
+    # An unchanged selection keeps the existing reference instead of writing a new channel version
+    if result.context != context:
+        update["context"] = blobs.put(result.context)
+    return update
+
+
+def build_context(state: State, config: Optional[RunnableConfig] = None):
     """LLM evaluates the files in context and suggests additions/removals"""
-    project_structure = state["project_structure"]
-    context = state["context"]
+    blobs = get_blob_store()
+    project_structure = blobs.get(state["project_structure"])
+    context = blobs.get(state["context"])
     project_path = state["project_path"]
 
     agent_metadata = concat_agent_metadata(project_path)
@@ -106,10 +165,8 @@ def build_context(state: State):
         project_path=project_path,
     )
 
-    output_path = os.path.join(os.getcwd(), 'context.txt')
-    with open(output_path, 'w', encoding='utf-8') as output_file:
-        output_file.write(final_context)
-    return {"context": final_context, "agent_metadata": agent_metadata}
+    get_artefact_store().write(*run_scope(config), "context.txt", final_context)
+    return {"context": blobs.put(final_context), "agent_metadata": blobs.put(agent_metadata)}
 
 
 def determine_input_type(state: State):
@@ -122,7 +179,8 @@ def determine_input_type(state: State):
     )
 
     print("Invoking LLM to determine if input is a question or task...")
-    result = kimi_llm.invoke(formatted_prompt)
+    # On the critical path of every run, so a slow provider is hedged instead of waited out
+    result = get_router().hedged_invoke("classifier", formatted_prompt)
 
     # Parse the response to determine if it's a question or task
     response_text = result.content.lower()
@@ -138,10 +196,10 @@ def determine_input_type(state: State):
     return {"input_type": input_type}
 
 
-def answer_question(state: State):
+def answer_question(state: State, config: Optional[RunnableConfig] = None):
     """Answer a question using the Kimi model"""
     user_input = state["user_task"]
-    context = state.get("context", "")
+    context = get_blob_store().get(state.get("context"))
 
     # Format the prompt with the user input and context
     formatted_prompt = answer_question_prompt.format(
@@ -150,21 +208,20 @@ def answer_question(state: State):
     )
 
     print("Invoking LLM to answer the question...")
-    result = kimi_llm.invoke(formatted_prompt)
+    result = get_router().invoke("question_answer", formatted_prompt)
 
-    # Save the answer to a file
-    output_path = os.path.join(os.getcwd(), 'answer.md')
-    with open(output_path, 'w', encoding='utf-8') as output_file:
-        output_file.write(result.content)
+    # Save the answer with the run's artefacts
+    get_artefact_store().write(*run_scope(config), "answer.md", result.content)
 
     return {"messages": [HumanMessage(content=result.content)], "answer": result.content}
 
 
-def make_plan(state: State):
+def make_plan(state: State, config: Optional[RunnableConfig] = None):
     """Plan the changes"""
     user_task = state["user_task"]
-    context = state["context"]
-    agent_metadata = state["agent_metadata"]
+    blobs = get_blob_store()
+    context = blobs.get(state["context"])
+    agent_metadata = blobs.get(state["agent_metadata"])
 
 
     instruction = make_plan_instruction.format(
@@ -173,31 +230,46 @@ def make_plan(state: State):
         agent_metadata=agent_metadata
     )
 
-    result = gpt5.invoke(instruction)
-    output_path = os.path.join(os.getcwd(), 'example.md')
-    with open(output_path, 'w', encoding='utf-8') as output_file:
-        output_file.write(result.content)
+    result = get_router().invoke("planner", instruction)
+    get_artefact_store().write(*run_scope(config), "example.md", result.content)
 
     plan = result.content.split("</think>")[-1]
 
     return {"messages": [HumanMessage(content=result.content)], "plan": plan}
 
-class CommitMessage(BaseModel):
-    message: str = Field(..., description="Commit message")
-
-
-def push_to_git(state: State):
-    """Push to git"""
-    user_task = state["user_task"]
-
-
-    structured_model = gemini_flash_lite.with_structured_output(CommitMessage)
-    formatted_prompt = commit_message_instruction.format(
-        user_task=user_task,
-    )
-
-    commit_message = structured_model.invoke(formatted_prompt)
-
-    git_commit_push("/home/nnikolovskii/notes", commit_message.message)
-
-    return {}
+async def push_to_git(state: State):
+    """Commit the files the agent changed and start pushing them in the background"""
+    repo_path = GIT_REPO_PATH or state["project_path"]
+    file_paths = touched_under(state.get("touched_files") or (), repo_path)
+    service = GitService(repo_path)
+
+    def generate(user_task: str, diff_summary: str) -> str:
+        formatted_prompt = commit_message_instruction.format(user_task=user_task, diff_summary=diff_summary)
+        return get_router().invoke("commit_message", formatted_prompt, schema=CommitMessage).message
+
+    # Simple commits get a templated message, only larger ones need the LLM
+    changes = await service.pending_changes(file_paths)
+    message = await asyncio.to_thread(commit_message, changes, state["user_task"], generate) if changes else ""
+
+    result = await service.commit(file_paths, message)
+    print(f"{result.message} ({len(result.files or [])} files)")
+
+    if result.commit:
+        start_background_push(service, result.commit)
+    update = {"git_result": result.to_dict()}
+    if result.ok:
+        update["touched_files"] = None
+    return update
+
+
+async def await_push(state: State):
+    """Record the result of the background push in the state"""
+    git_result = state.get("git_result") or {}
+    if not git_result.get("commit"):
+        return {}
+
+    push = await wait_for_push(git_result["commit"], timeout=GIT_PUSH_WAIT_SECONDS)
+    if push is None:
+        return {}
+    print(push.message)
+    return {"git_result": {**git_result, "push": push.to_dict()}}
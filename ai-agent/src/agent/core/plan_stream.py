@@ -0,0 +1,109 @@
+import json
+from typing import Any, Iterable, Iterator, List
+
+from pydantic import ValidationError
+
+from ..models.step_models import Step
+
+
+def chunk_text(chunk: Any) -> str:
+    """Text of a streamed message chunk, whose content is a string or a list of content blocks."""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block if isinstance(block, str) else block.get("text", "")
+            for block in content if isinstance(block, (str, dict))
+        )
+    return ""
+
+
+class StepStreamParser:
+    """
+    Incrementally extracts plan steps from streamed planner output.
+
+    The planner writes one JSON object per step. Objects are detected by brace matching
+    (strings and escapes aware), so a step is available as soon as its closing brace
+    arrives, whether the model writes JSON Lines, pretty-prints the objects or wraps them
+    in a `{"steps": [...]}` container. Text around the objects (reasoning, code fences) is
+    ignored, as are objects that are not valid steps.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0
+        self._starts: List[int] = []
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Step]:
+        """Add streamed text and return the steps it completed."""
+        self._buffer += text
+        steps = []
+        while self._position < len(self._buffer):
+            character = self._buffer[self._position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif character == "\\":
+                    self._escaped = True
+                elif character == '"':
+                    self._in_string = False
+            elif character == '"' and self._starts:
+                self._in_string = True
+            elif character == "{":
+                self._starts.append(self._position)
+            elif character == "}" and self._starts:
+                start = self._starts.pop()
+                step = self._parse(self._buffer[start:self._position + 1])
+                if step is not None:
+                    steps.append(step)
+            self._position += 1
+
+        # Text outside of any object is not needed anymore
+        if not self._starts:
+            self._buffer = ""
+            self._position = 0
+        return steps
+
+    @staticmethod
+    def _parse(text: str):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get("description"), str):
+            return None
+        try:
+            return Step.model_validate(data)
+        except ValidationError:
+            return None
+
+
+def parse_step_stream(chunks: Iterable[Any], transcript: List[str]) -> Iterator[Step]:
+    """
+    Yield plan steps as soon as they are complete in a stream of message chunks.
+
+    Args:
+        chunks: Streamed chunks of the planner output
+        transcript: Receives the raw text of every chunk, for the full plan afterwards
+    """
+    parser = StepStreamParser()
+    for chunk in chunks:
+        text = chunk_text(chunk)
+        transcript.append(text)
+        yield from parser.feed(text)
+
+
+def render_plan(steps: Iterable[Step]) -> str:
+    """Markdown plan of structured steps, for the prompts and `example.md`."""
+    lines = []
+    for step in steps:
+        line = f"{step.id}. {step.description}"
+        if step.files:
+            line += f"\n   Files: {', '.join(step.files)}"
+        if step.depends_on:
+            line += f"\n   After steps: {', '.join(str(d) for d in step.depends_on)}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,193 @@
+"""First-good-wins racing of interchangeable models.
+
+The same prompt is streamed from several models at once. The first model whose output so far
+passes a quality check (by default: some answer text outside a `<think>` block) wins, its
+stream is read to the end and the other streams are cancelled, which closes their requests.
+Per-model wins, first-token latencies and errors are kept in `RaceStats`.
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+
+# OpenRouter model ids raced against the requested model, empty disables racing
+ANSWER_RACE_MODELS = [m.strip() for m in os.getenv("ANSWER_RACE_MODELS", "").split(",") if m.strip()]
+# Models streaming at the same time, including the requested one
+ANSWER_RACE_MAX = int(os.getenv("ANSWER_RACE_MAX", "3"))
+# Answer characters a model has to produce before it can win
+RACE_MIN_CHARS = int(os.getenv("RACE_MIN_CHARS", "1"))
+
+THINK_BLOCK = re.compile(r"<think>.*?(</think>|$)", re.DOTALL)
+
+
+def has_answer_text(text: str, min_chars: int = RACE_MIN_CHARS) -> bool:
+    """Whether the output so far has `min_chars` non-blank characters outside reasoning blocks."""
+    return len("".join(THINK_BLOCK.sub("", text).split())) >= min_chars
+
+
+@dataclass
+class ModelRaceStats:
+    races: int = 0
+    wins: int = 0
+    errors: int = 0
+    first_token_seconds: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    win_seconds: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+
+    def snapshot(self) -> Dict[str, Any]:
+        def median(values: Deque[float]) -> Optional[float]:
+            return sorted(values)[len(values) // 2] if values else None
+
+        return {
+            "races": self.races,
+            "wins": self.wins,
+            "win_rate": round(self.wins / self.races, 3) if self.races else 0.0,
+            "errors": self.errors,
+            "p50_first_token": median(self.first_token_seconds),
+            "p50_answer": median(self.win_seconds),
+        }
+
+
+class RaceStats:
+    """Win rates and latencies of the raced models."""
+
+    def __init__(self):
+        self.models: Dict[str, ModelRaceStats] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, name: str) -> ModelRaceStats:
+        if name not in self.models:
+            self.models[name] = ModelRaceStats()
+        return self.models[name]
+
+    def record(self, name: str, won: bool = False, first_token: Optional[float] = None,
+               answer_seconds: Optional[float] = None, error: bool = False) -> None:
+        with self._lock:
+            stats = self._model(name)
+            stats.races += 1
+            stats.wins += int(won)
+            stats.errors += int(error)
+            if first_token is not None:
+                stats.first_token_seconds.append(first_token)
+            if answer_seconds is not None:
+                stats.win_seconds.append(answer_seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in self.models.items()}
+
+
+@dataclass
+class RaceResult:
+    model: str
+    message: BaseMessage
+    seconds: float
+    first_token: Dict[str, float]  # Time to the first chunk of every model that produced one
+    failed: List[str]  # Models that raised before being cancelled
+
+
+async def race_stream(
+        models: Dict[str, Any],
+        model_input: Any,
+        quality_check: Callable[[str], bool] = has_answer_text,
+        stats: Optional[RaceStats] = None,
+) -> RaceResult:
+    """
+    Stream a prompt from several models and keep the first good answer.
+
+    Args:
+        models: Chat models by name, each needs `astream`
+        model_input: The prompt or messages
+        quality_check: Called with a model's output so far; the first model for which it
+                       returns True wins
+        stats: Where the outcome is recorded, the shared stats by default
+
+    Returns:
+        The winning model and its complete message. Without any answer passing the check, the
+        first model that finished wins
+
+    Raises:
+        The error of the last failed model if none finished
+    """
+    stats = stats or get_race_stats()
+    started = time.perf_counter()
+    first_token: Dict[str, float] = {}
+    outputs: Dict[str, list] = {name: [] for name in models}
+    failed: Dict[str, BaseException] = {}
+    finished: List[str] = []
+    winner: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    async def run(name: str, model: Any) -> None:
+        text = ""
+        try:
+            async for chunk in model.astream(model_input):
+                first_token.setdefault(name, time.perf_counter() - started)
+                outputs[name].append(chunk)
+                if not winner.done():
+                    text += chunk.content if isinstance(chunk.content, str) else ""
+                    if quality_check(text):
+                        winner.set_result(name)
+        except Exception as e:
+            print(f"   > {name} failed in the race: {e}")
+            failed[name] = e
+            if winner.done() and winner.result() == name:
+                raise
+        else:
+            finished.append(name)
+
+    tasks = {name: asyncio.create_task(run(name, model)) for name, model in models.items()}
+    try:
+        pending = set(tasks.values())
+        while pending and not winner.done():
+            _, pending = await asyncio.wait(pending | {winner}, return_when=asyncio.FIRST_COMPLETED)
+            pending.discard(winner)
+
+        if winner.done():
+            name = winner.result()
+        else:
+            # No answer passed the check, the first complete one is still better than none
+            candidates = [n for n in finished if outputs[n]]
+            if not candidates:
+                for other in models:
+                    stats.record(other, first_token=first_token.get(other), error=other in failed)
+                if failed:
+                    raise list(failed.values())[-1]
+                raise ValueError("None of the raced models produced an answer")
+            name = candidates[0]
+
+        for other, task in tasks.items():
+            if other != name:
+                task.cancel()
+        # The winner streams to the end, a failure halfway fails the call like a single model would
+        await tasks[name]
+    finally:
+        # Also when the caller is cancelled, no raced stream may outlive the race
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    seconds = time.perf_counter() - started
+    chunks = outputs[name]
+    message = chunks[0]
+    for chunk in chunks[1:]:
+        message = message + chunk
+    for other in models:
+        stats.record(other, won=other == name, first_token=first_token.get(other),
+                     answer_seconds=seconds if other == name else None, error=other in failed)
+    return RaceResult(name, message_chunk_to_message(message), seconds, first_token, list(failed))
+
+
+race_stats: Optional[RaceStats] = None
+
+
+def get_race_stats() -> RaceStats:
+    global race_stats
+    if race_stats is None:
+        race_stats = RaceStats()
+    return race_stats
@@ -0,0 +1,142 @@
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional, Iterable
+
+from ..memory.window import estimate_tokens
+from ..models.models import FileReflectionList
+from ..prompts.prompts import file_reflection_instructions, file_reflection_diff_instructions
+from ..tools.file_utils import concat_files_in_str
+
+# Proposes additions and removals for a reflection prompt
+Proposer = Callable[[str], Optional[FileReflectionList]]
+
+
+def is_allowed_context_file(file_path: str) -> bool:
+    return not file_path.endswith('.env') and "agent_metadata.md" not in file_path
+
+
+@dataclass
+class ReflectionRound:
+    index: int
+    added: List[str]
+    removed: List[str]
+    prompt_tokens: int
+    seconds: float
+
+
+@dataclass
+class ReflectionResult:
+    file_paths: List[str]
+    context: str
+    rounds: List[ReflectionRound] = field(default_factory=list)
+    converged: bool = False
+
+    def round_stats(self) -> List[Dict]:
+        return [asdict(r) for r in self.rounds]
+
+
+class ReflectionEngine:
+    """
+    Iteratively refines the set of files in the context.
+
+    Every round applies both the additions and the removals the LLM proposes. The first round
+    shows the full context; later rounds only show what changed (the contents of newly added
+    files and the paths of removed ones). File contents are read once and reused across rounds.
+    The loop stops once a round changes nothing, the selection returns to a set seen before
+    (the model is oscillating) or `max_rounds` is reached.
+
+    Args:
+        propose: Calls the LLM with a prompt and returns its FileReflectionList
+        max_rounds: Upper bound on LLM calls
+    """
+
+    def __init__(self, propose: Proposer, max_rounds: int = 3):
+        self.propose = propose
+        self.max_rounds = max_rounds
+        self._blocks: Dict[str, str] = {}
+
+    def _block(self, file_path: str) -> str:
+        if file_path not in self._blocks:
+            self._blocks[file_path] = concat_files_in_str([file_path])
+        return self._blocks[file_path]
+
+    def _context(self, file_paths: Iterable[str]) -> str:
+        return "".join(self._block(path) for path in file_paths)
+
+    def run(
+            self,
+            user_task: str,
+            project_path: str,
+            project_structure: str,
+            file_paths: Iterable[str],
+            context: Optional[str] = None,
+    ) -> ReflectionResult:
+        """
+        Run the reflection loop.
+
+        Args:
+            user_task: The user's task
+            project_path: Root of the project
+            project_structure: Rendered project tree
+            file_paths: The initially selected files
+            context: The already concatenated initial files, if available
+
+        Returns:
+            The final file selection, its concatenated context and per-round statistics
+        """
+        selected = [path for path in dict.fromkeys(file_paths) if is_allowed_context_file(path)]
+        result = ReflectionResult(file_paths=selected, context=context if context is not None else self._context(selected))
+        seen = {frozenset(selected)}
+        added: List[str] = []
+        removed: List[str] = []
+
+        for index in range(1, self.max_rounds + 1):
+            if index == 1:
+                prompt = file_reflection_instructions.format(
+                    user_task=user_task,
+                    project_structure=project_structure,
+                    context=result.context,
+                    project_path=project_path,
+                )
+            else:
+                prompt = file_reflection_diff_instructions.format(
+                    user_task=user_task,
+                    project_structure=project_structure,
+                    project_path=project_path,
+                    selected_files="\n".join(selected) or "(none)",
+                    removed_files="\n".join(removed) or "(none)",
+                    added_context=self._context(added) or "(none)",
+                )
+
+            started = time.perf_counter()
+            try:
+                proposal = self.propose(prompt)
+            except Exception as e:
+                print(f"Error in reflection round {index}: {e}")
+                break
+            seconds = time.perf_counter() - started
+
+            proposal_added = (proposal.additional_file_paths or []) if proposal else []
+            proposal_removed = (proposal.remove_file_paths or []) if proposal else []
+            added = [p for p in dict.fromkeys(proposal_added) if p not in selected and is_allowed_context_file(p)]
+            removed = [p for p in dict.fromkeys(proposal_removed) if p in selected and p not in added]
+
+            result.rounds.append(ReflectionRound(index, added, removed, estimate_tokens(prompt), seconds))
+            print(f"   > Reflection round {index}: +{len(added)} -{len(removed)} files, "
+                  f"~{estimate_tokens(prompt)} prompt tokens, {seconds:.2f}s")
+
+            if not added and not removed:
+                result.converged = True
+                break
+
+            candidate = [p for p in selected if p not in removed] + added
+            if frozenset(candidate) in seen:
+                # The model is undoing an earlier round, keep the current selection
+                result.converged = True
+                break
+            seen.add(frozenset(candidate))
+            selected = candidate
+            result.file_paths = selected
+            result.context = self._context(selected)
+
+        return result
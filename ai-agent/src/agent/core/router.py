@@ -0,0 +1,331 @@
+"""Latency-aware routing over the models in `ai_models`.
+
+Nodes ask for a class of interchangeable models (e.g. "classifier") instead of a concrete
+model. The router keeps live latency and error statistics per model, sends each call to the
+fastest healthy model of the class and falls back to the next one when a call fails.
+Latency-critical calls can be hedged: if the first model has not answered within its usual
+p95 latency, the same request is also sent to the next model and the first answer wins.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from .ai_models import ModelRegistry, registry as default_registry
+from ..models import CommitMessage, FileReflectionList, SearchFilePathsList, StepList
+
+# Interchangeable models per task, in order of preference. Untried models keep this order,
+# so a fresh process behaves like the original hardcoded choice.
+EQUIVALENCE_CLASSES: Dict[str, List[str]] = {
+    "classifier": ["kimi_llm", "gemini_flash_lite", "openrouter:google/gemini-flash-1.5"],
+    "file_selection": ["gemini_flash_lite", "openrouter:google/gemini-flash-1.5"],
+    "question_answer": ["kimi_llm", "gpt5"],
+    "planner": ["gpt5", "open_router_model"],
+    "commit_message": ["gemini_flash_lite", "kimi_llm"],
+}
+
+# Structured answers requested from each class; their wrappers are built for every model of
+# the class at startup (see `warm_structured_outputs`), not on the first call of a run
+STRUCTURED_OUTPUTS: Dict[str, List[type]] = {
+    "file_selection": [SearchFilePathsList, FileReflectionList],
+    "planner": [StepList],
+    "commit_message": [CommitMessage],
+}
+STRUCTURED_OUTPUT_WARMUP = os.getenv("STRUCTURED_OUTPUT_WARMUP", "1") == "1"
+
+# A model is skipped for COOLDOWN_SECONDS after this many failures in a row
+MAX_CONSECUTIVE_FAILURES = int(os.getenv("ROUTER_MAX_CONSECUTIVE_FAILURES", "2"))
+COOLDOWN_SECONDS = float(os.getenv("ROUTER_COOLDOWN_SECONDS", "30"))
+# Models failing more often than this over the stats window count as unhealthy
+MAX_ERROR_RATE = 0.5
+# Hedge delay while a model has too few samples for a meaningful p95
+DEFAULT_HEDGE_DELAY = float(os.getenv("ROUTER_HEDGE_DELAY", "2.0"))
+MIN_HEDGE_DELAY = 0.2
+MIN_SAMPLES_FOR_PERCENTILES = 5
+
+
+class ProviderStats:
+    """Rolling latency and error statistics of one model."""
+
+    def __init__(self, window: int = 100):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                self.cooldown_until = time.monotonic() + COOLDOWN_SECONDS
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self.latencies) < MIN_SAMPLES_FOR_PERCENTILES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(0.5)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until and self.error_rate <= MAX_ERROR_RATE
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": len(self.outcomes),
+            "p50": self.p50,
+            "p95": self.p95,
+            "error_rate": round(self.error_rate, 3),
+            "healthy": self.healthy,
+        }
+
+
+class ModelRouter:
+    """
+    Routes calls to the fastest healthy model of an equivalence class.
+
+    Args:
+        registry: Where models are resolved, by name
+        classes: Equivalence classes, mapping a class name to model names in order of preference
+        max_workers: Size of the thread pool used for hedged calls
+    """
+
+    def __init__(
+            self,
+            registry: ModelRegistry = default_registry,
+            classes: Optional[Dict[str, List[str]]] = None,
+            max_workers: int = 8,
+    ):
+        self.registry = registry
+        self.classes = dict(EQUIVALENCE_CLASSES if classes is None else classes)
+        self.stats: Dict[str, ProviderStats] = {}
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-router")
+
+    def stats_for(self, model_name: str) -> ProviderStats:
+        with self._stats_lock:
+            if model_name not in self.stats:
+                self.stats[model_name] = ProviderStats()
+            return self.stats[model_name]
+
+    def rank(self, class_name: str) -> List[str]:
+        """
+        Order the models of a class for the next call.
+
+        Healthy models come first: measured ones by p50, then models without enough samples
+        in their configured order (hedges and fallbacks collect their samples). Unhealthy
+        models are kept at the end as a last resort.
+        """
+        if class_name not in self.classes:
+            raise KeyError(f"Unknown model class '{class_name}', expected one of {sorted(self.classes)}")
+
+        names = self.classes[class_name]
+
+        def sort_key(item):
+            position, name = item
+            p50 = self.stats_for(name).p50
+            return (1, position) if p50 is None else (0, p50)
+
+        indexed = list(enumerate(names))
+        healthy = [name for _, name in sorted((i for i in indexed if self.stats_for(i[1]).healthy), key=sort_key)]
+        unhealthy = [name for name in names if name not in healthy]
+        return healthy + unhealthy
+
+    def _runnable(self, model_name: str, transform: Optional[Callable[[Any], Any]], schema: Optional[type]) -> Any:
+        if schema is not None:
+            # Built once per model and schema by the registry, instead of on every call
+            return self.registry.structured(model_name, schema)
+        model = self.registry.get(model_name)
+        return transform(model) if transform is not None else model
+
+    def _call(self, model_name: str, model_input: Any, transform: Optional[Callable[[Any], Any]],
+              schema: Optional[type] = None) -> Any:
+        stats = self.stats_for(model_name)
+        started = time.perf_counter()
+        try:
+            result = self._runnable(model_name, transform, schema).invoke(model_input)
+        except Exception:
+            stats.record(time.perf_counter() - started, ok=False)
+            raise
+        stats.record(time.perf_counter() - started, ok=True)
+        return result
+
+    def invoke(
+            self,
+            class_name: str,
+            model_input: Any,
+            transform: Optional[Callable[[Any], Any]] = None,
+            schema: Optional[type] = None,
+    ) -> Any:
+        """
+        Invoke the best model of a class, falling back to the next one on failure.
+
+        Args:
+            class_name: The equivalence class
+            model_input: The prompt or messages passed to `invoke`
+            transform: Optional wrapper applied to the model before the call, e.g. `lambda m: m.bind(stop=...)`
+            schema: Pydantic model of a structured answer, the cached structured-output wrapper of
+                    the model is used
+
+        Returns:
+            The result of the first model that succeeded
+        """
+        last_error = None
+        for model_name in self.rank(class_name):
+            try:
+                return self._call(model_name, model_input, transform, schema)
+            except Exception as e:
+                print(f"   > {model_name} failed, falling back: {e}")
+                last_error = e
+        raise last_error
+
+    def stream(
+            self,
+            class_name: str,
+            model_input: Any,
+            transform: Optional[Callable[[Any], Any]] = None,
+            schema: Optional[type] = None,
+    ) -> Iterator[Any]:
+        """
+        Stream the answer of the best model of a class.
+
+        Falls back to the next model only while nothing has been yielded yet, a stream that
+        fails halfway raises. The recorded latency is the time until the last chunk.
+        """
+        last_error = None
+        for model_name in self.rank(class_name):
+            stats = self.stats_for(model_name)
+            started = time.perf_counter()
+            yielded = False
+            try:
+                for chunk in self._runnable(model_name, transform, schema).stream(model_input):
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                stats.record(time.perf_counter() - started, ok=False)
+                if yielded:
+                    raise
+                print(f"   > {model_name} failed, falling back: {e}")
+                last_error = e
+                continue
+            stats.record(time.perf_counter() - started, ok=True)
+            return
+        raise last_error
+
+    def hedge_delay(self, model_name: str) -> float:
+        p95 = self.stats_for(model_name).p95
+        return DEFAULT_HEDGE_DELAY if p95 is None else max(MIN_HEDGE_DELAY, p95)
+
+    def hedged_invoke(
+            self,
+            class_name: str,
+            model_input: Any,
+            transform: Optional[Callable[[Any], Any]] = None,
+            hedge_delay: Optional[float] = None,
+            schema: Optional[type] = None,
+    ) -> Any:
+        """
+        Like `invoke`, but sends the request to the next model as well when the current one
+        is slower than its p95 (or `hedge_delay`), and returns whichever answers first.
+
+        Slower duplicates are left to finish in the background so their latency still
+        feeds the statistics.
+        """
+        candidates = self.rank(class_name)
+        running: Dict[Future, str] = {}
+        last_error = None
+
+        def launch_next() -> None:
+            model_name = candidates.pop(0)
+            running[self._executor.submit(self._call, model_name, model_input, transform, schema)] = model_name
+
+        launch_next()
+        while running:
+            delay = None
+            if candidates:
+                current = list(running.values())[-1]
+                delay = hedge_delay if hedge_delay is not None else self.hedge_delay(current)
+
+            done, _ = wait(list(running), timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                print(f"   > {list(running.values())[-1]} slower than {delay:.2f}s, hedging with {candidates[0]}")
+                launch_next()
+                continue
+
+            for future in done:
+                model_name = running.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    print(f"   > {model_name} failed: {e}")
+                    last_error = e
+                    if candidates:
+                        launch_next()
+
+        raise last_error
+
+    def warm_structured_outputs(self, outputs: Optional[Dict[str, List[type]]] = None) -> Dict[str, int]:
+        """
+        Build the structured-output wrapper of every model and schema in `outputs`.
+
+        Models that cannot be built (e.g. a missing API key) are skipped, a call to them
+        fails the usual way and falls back.
+        """
+        built = failed = 0
+        for class_name, schemas in (STRUCTURED_OUTPUTS if outputs is None else outputs).items():
+            for model_name in self.classes.get(class_name, []):
+                for schema in schemas:
+                    try:
+                        self.registry.structured(model_name, schema)
+                        built += 1
+                    except Exception as e:
+                        print(f"   > Structured output {schema.__name__} of {model_name} not prepared: {e}")
+                        failed += 1
+        return {"built": built, "failed": failed}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current statistics of every model the router has called."""
+        with self._stats_lock:
+            names = list(self.stats)
+        return {name: self.stats_for(name).snapshot() for name in names}
+
+
+router: Optional[ModelRouter] = None
+
+
+def get_router() -> ModelRouter:
+    global router
+    if router is None:
+        router = ModelRouter()
+    return router
+
+
+def start_structured_output_warmup() -> None:
+    """Prepare the structured outputs of the shared router in the background, unless disabled."""
+    if STRUCTURED_OUTPUT_WARMUP:
+        threading.Thread(target=get_router().warm_structured_outputs, name="structured-output-warmup",
+                         daemon=True).start()
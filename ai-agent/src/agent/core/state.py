@@ -1,27 +1,40 @@
 from __future__ import annotations
 
-from typing import Annotated, TypedDict, List, Dict
+from typing import Annotated, TypedDict, List, Dict, Any
 
 from langgraph.graph import add_messages
 
+from ..models.step_models import Step
 from ..models.task_models import Task
+from ..tools.touched_files import merge_touched_files
 
 
 # Graph state
 class State(TypedDict):
     messages: Annotated[list, add_messages]
     project_path: str
+    # Large fields hold a blob store reference ("blob:<sha256>"), resolve them with get_blob_store().get
     context: str
     user_task: str
     all_file_paths: Annotated[set, lambda x, y: x.union(y)]
-    project_structure: str
+    bm25_file_paths: List[str]  # Files ranked by full-text search of the user task
+    context_file_paths: List[str]  # Files in the context after reflection (additions and removals applied)
+    reflection_rounds: List[Dict[str, Any]]  # Per-round changes, prompt tokens and timing of the reflection loop
+    project_structure: str  # Blob reference
     plan: str
     tasks: List[Task]
+    steps: List[Step]  # Plan steps with the files they touch and the steps they depend on
+    current_step_index: int
+    step_message_indices: Dict[int, int]
+    step_results: List[Dict[str, Any]]  # Per-step timing and errors of the parallel step run
+    plan_error: str  # Set when the streamed plan broke off, the run is then not pushed
+    touched_files: Annotated[set, merge_touched_files]  # Files the tools wrote that are not committed yet
+    git_result: Dict[str, Any]  # Commit of the touched files and, under "push", the background push result
     current_task_index: int
     task_message_indices: Dict[int, int]
     input_type: str
     answer: str
-    agent_metadata: str
+    agent_metadata: str  # Blob reference
     ai_model: str
     audio_path: str  # Path to the audio file
     transcript: str  # Extracted text from the audio
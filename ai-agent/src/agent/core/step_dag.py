@@ -0,0 +1,270 @@
+"""Dependency-aware scheduling of plan steps.
+
+The planner outputs a DAG: every step names the files it touches and the steps it
+depends on. `run_step_dag` runs a step as soon as its dependencies have finished and none of
+its files is held by a running step, so independent edits run in parallel and the wall time
+follows the depth of the DAG instead of the number of steps. A step that names no files may
+touch any file and runs alone.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..models.step_models import Step
+
+# Runs one step, given the steps that finished before it started
+StepExecutor = Callable[[Step, List[Step]], Any]
+
+
+def normalize_steps(steps: List[Step]) -> List[Step]:
+    """
+    Give every step a unique id and drop dependencies that cannot be satisfied.
+
+    Steps without an id (or with a duplicate one) are numbered by position. Dependencies on
+    unknown steps, on the step itself and on later steps in a cycle are removed, so the
+    result is always a DAG. Steps are returned after their dependencies, otherwise in plan order.
+    """
+    normalized: List[Step] = []
+    seen_ids: Set[int] = set()
+    for position, step in enumerate(steps, start=1):
+        step_id = step.id if step.id and step.id not in seen_ids else position
+        while step_id in seen_ids:
+            step_id += len(steps)
+        seen_ids.add(step_id)
+        normalized.append(step.model_copy(update={"id": step_id}))
+
+    known = {step.id for step in normalized}
+    for step in normalized:
+        step.depends_on = [d for d in dict.fromkeys(step.depends_on) if d in known and d != step.id]
+
+    # Break cycles: walk steps in plan order and keep only dependencies on steps that are
+    # already placed or reachable without going through the current step
+    placed: Set[int] = set()
+    ordered: List[Step] = []
+    by_id = {step.id: step for step in normalized}
+    visiting: Set[int] = set()
+
+    def place(step: Step) -> None:
+        if step.id in placed:
+            return
+        visiting.add(step.id)
+        kept = []
+        for dependency in step.depends_on:
+            if dependency in visiting:
+                print(f"   > Dependency cycle between steps {step.id} and {dependency}, dropping the edge")
+                continue
+            place(by_id[dependency])
+            kept.append(dependency)
+        step.depends_on = kept
+        visiting.discard(step.id)
+        placed.add(step.id)
+        ordered.append(step)
+
+    for step in normalized:
+        place(step)
+    return ordered
+
+
+def dag_depth(steps: List[Step]) -> int:
+    """Length of the longest dependency chain, the lower bound on sequential rounds."""
+    by_id = {step.id: step for step in steps}
+    depths: Dict[int, int] = {}
+
+    def depth(step_id: int) -> int:
+        if step_id not in depths:
+            depths[step_id] = 1 + max((depth(d) for d in by_id[step_id].depends_on), default=0)
+        return depths[step_id]
+
+    return max((depth(step.id) for step in steps), default=0)
+
+
+class FileLocks:
+    """
+    Non-blocking, all-or-nothing locks over file paths, held by running steps.
+
+    Paths are compared in absolute form, so `./a.py` and `a.py` conflict. Acquiring no paths
+    takes the whole tree: it only succeeds while nothing is held and blocks every other
+    acquire until it is released.
+    """
+
+    def __init__(self):
+        self._held: Set[str] = set()
+        self._exclusive = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(paths: List[str]) -> Set[str]:
+        return {os.path.abspath(path) for path in paths}
+
+    def try_acquire(self, paths: List[str]) -> bool:
+        wanted = self._normalize(paths)
+        with self._lock:
+            conflict = self._held if not wanted else wanted & self._held
+            if self._exclusive or conflict:
+                return False
+            self._exclusive = not wanted
+            self._held.update(wanted)
+            return True
+
+    def release(self, paths: List[str]) -> None:
+        wanted = self._normalize(paths)
+        with self._lock:
+            if not wanted:
+                self._exclusive = False
+            self._held.difference_update(wanted)
+
+
+@dataclass
+class StepOutcome:
+    step: Step
+    result: Any = None
+    error: Optional[str] = None
+    skipped: bool = False
+    seconds: float = 0.0
+
+
+@dataclass
+class DagRun:
+    outcomes: Dict[int, StepOutcome] = field(default_factory=dict)
+    completion_order: List[int] = field(default_factory=list)
+    depth: int = 0
+    max_parallel: int = 0
+    stream_error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.stream_error is not None or any(o.error is not None or o.skipped for o in self.outcomes.values())
+
+    @property
+    def steps(self) -> List[Step]:
+        return [o.step for _, o in sorted(self.outcomes.items())]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {"id": step_id, "description": o.step.description, "seconds": round(o.seconds, 3),
+             "error": o.error, "skipped": o.skipped}
+            for step_id, o in sorted(self.outcomes.items())
+        ]
+
+
+def _admit(step: Step, known: Dict[int, Step], position: int) -> Step:
+    """Give a streamed step a unique id and keep only dependencies on steps already seen."""
+    step_id = step.id if step.id and step.id not in known else position
+    while step_id in known:
+        step_id += 1000
+    depends_on = [d for d in dict.fromkeys(step.depends_on) if d in known]
+    return step.model_copy(update={"id": step_id, "depends_on": depends_on})
+
+
+def run_step_dag(steps: Iterable[Step], execute: StepExecutor, max_workers: int = 4) -> DagRun:
+    """
+    Run plan steps in dependency order, in parallel where they neither depend on each other
+    nor touch the same files.
+
+    `steps` can be a list or a lazy iterable such as steps parsed from a streamed plan. An
+    iterable is consumed in a background thread and every step is scheduled as soon as it
+    arrives, so the first steps run while the rest of the plan is still being generated.
+    Streamed steps may only depend on steps that came before them.
+
+    A failed step does not stop independent steps; the steps depending on it are skipped.
+
+    Args:
+        steps: The steps, possibly with ids, files and dependencies
+        execute: Runs one step and returns its result
+        max_workers: Upper bound on steps running at the same time
+
+    Returns:
+        Per-step outcomes and the order in which steps finished
+    """
+    if isinstance(steps, list):
+        # Known upfront, so arbitrary dependencies can be repaired into a DAG first
+        steps = normalize_steps(steps)
+
+    run = DagRun()
+    events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+    known: Dict[int, Step] = {}
+    pending: Dict[int, Step] = {}
+    finished: List[Step] = []
+    locks = FileLocks()
+    running: Dict[Future, Step] = {}
+    started_at: Dict[int, float] = {}
+
+    def produce() -> None:
+        try:
+            for step in steps:
+                events.put(("step", step))
+        except Exception as e:
+            events.put(("stream_error", e))
+        events.put(("closed", None))
+
+    def timed(step: Step, done_before: List[Step]) -> Any:
+        started_at[step.id] = time.perf_counter()
+        return execute(step, done_before)
+
+    threading.Thread(target=produce, name="plan-step-stream", daemon=True).start()
+    stream_open = True
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan-step") as executor:
+        while stream_open or pending or running:
+            # Skip steps whose dependencies failed or were skipped, transitively
+            skipped_any = True
+            while skipped_any:
+                skipped_any = False
+                for step in list(pending.values()):
+                    broken = [d for d in step.depends_on
+                              if d in run.outcomes and (run.outcomes[d].error or run.outcomes[d].skipped)]
+                    if broken:
+                        run.outcomes[step.id] = StepOutcome(step, skipped=True,
+                                                            error=f"dependency {broken[0]} failed")
+                        del pending[step.id]
+                        skipped_any = True
+
+            # Plan order among the ready steps, so conflicting steps keep their planned sequence
+            for step in list(pending.values()):
+                if len(running) >= max_workers:
+                    break
+                if not all(d in run.outcomes for d in step.depends_on):
+                    continue
+                if locks.try_acquire(step.files):
+                    del pending[step.id]
+                    future = executor.submit(timed, step, list(finished))
+                    running[future] = step
+                    future.add_done_callback(lambda f: events.put(("done", f)))
+                elif not step.files:
+                    # A step without files waits for the running ones, later steps must not overtake it
+                    break
+
+            run.max_parallel = max(run.max_parallel, len(running))
+            if not stream_open and not running:
+                break
+
+            kind, payload = events.get()
+            if kind == "step":
+                step = _admit(payload, known, len(known) + 1)
+                known[step.id] = step
+                pending[step.id] = step
+            elif kind == "stream_error":
+                print(f"   > Step stream failed: {payload}")
+                run.stream_error = str(payload)
+            elif kind == "closed":
+                stream_open = False
+            elif kind == "done":
+                step = running.pop(payload)
+                locks.release(step.files)
+                outcome = StepOutcome(step, seconds=time.perf_counter() - started_at.get(step.id, time.perf_counter()))
+                try:
+                    outcome.result = payload.result()
+                    finished.append(step)
+                except Exception as e:
+                    print(f"   > Step {step.id} failed: {e}")
+                    outcome.error = str(e)
+                run.outcomes[step.id] = outcome
+                run.completion_order.append(step.id)
+
+    run.depth = dag_depth(list(known.values()))
+    return run
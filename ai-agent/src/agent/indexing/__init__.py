@@ -0,0 +1,4 @@
+"""Local indexes over the target project, used to find relevant files without an LLM round-trip."""
+
+from .symbol_index import Candidate, SymbolIndex, get_symbol_index, tokenize
+from .bm25 import BM25Index, ChunkHit, get_bm25_index
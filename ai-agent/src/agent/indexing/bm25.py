@@ -0,0 +1,303 @@
+import ast
+import math
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .symbol_index import TEXT_EXTENSIONS, MAX_INDEXED_FILE_BYTES, tokenize
+from ..tools.file_utils import DEFAULT_IGNORE_PATTERNS
+
+# Files are chunked in worker processes when at least this many changed at once
+PARALLEL_BUILD_MIN_FILES = 64
+BUILD_WORKERS = int(os.getenv("BM25_BUILD_WORKERS", "0")) or None
+# Projects whose index is kept in memory, the least recently used one is dropped first
+BM25_MAX_INDEXES = int(os.getenv("BM25_MAX_INDEXES", "8"))
+FALLBACK_CHUNK_LINES = 60
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s")
+DECLARATION_START = re.compile(
+    r"^\s*(?:export\s+)?(?:public\s+|private\s+|protected\s+|static\s+|async\s+)*"
+    r"(?:class|interface|struct|enum|trait|function|func|fn|def)\s+\w+"
+)
+
+# (start line, end line, title, term counts)
+RawChunk = Tuple[int, int, str, Dict[str, int]]
+
+
+@dataclass
+class ChunkHit:
+    path: str
+    start_line: int
+    end_line: int
+    title: str
+    score: float
+
+
+def _python_sections(source: str, lines: List[str]) -> List[Tuple[int, int, str]]:
+    """Top-level functions, methods of top-level classes and the module code in between."""
+    tree = ast.parse(source)
+    sections = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            header_end = methods[0].lineno - 1 if methods else node.end_lineno
+            sections.append((node.lineno, header_end, f"class {node.name}"))
+            for method in methods:
+                start = method.decorator_list[0].lineno if method.decorator_list else method.lineno
+                sections.append((start, method.end_lineno, f"{node.name}.{method.name}"))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            start = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+            sections.append((start, node.end_lineno, node.name))
+
+    # Everything not covered by a definition (imports, constants, scripts) becomes module chunks
+    covered = set()
+    for start, end, _ in sections:
+        covered.update(range(start, end + 1))
+    start = None
+    for number in range(1, len(lines) + 2):
+        inside = number <= len(lines) and number not in covered
+        if inside and start is None:
+            start = number
+        elif not inside and start is not None:
+            sections.append((start, number - 1, "module"))
+            start = None
+    return sections
+
+
+def _split_at(lines: List[str], is_boundary) -> List[Tuple[int, int, str]]:
+    starts = [i + 1 for i, line in enumerate(lines) if is_boundary(line)]
+    if not starts or starts[0] != 1:
+        starts.insert(0, 1)
+    sections = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] - 1 if i + 1 < len(starts) else len(lines)
+        sections.append((start, end, lines[start - 1].strip()[:80]))
+    return sections
+
+
+def chunk_file(path: str) -> Optional[Tuple[str, float, int, List[RawChunk]]]:
+    """
+    Split a file into searchable chunks: functions for code, sections for markdown.
+
+    Module-level so it can run in worker processes.
+
+    Returns:
+        (path, mtime, size, chunks), or None if the file cannot be read
+    """
+    try:
+        stat = os.stat(path)
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            source = f.read()
+    except OSError:
+        return None
+
+    lines = source.splitlines()
+    if not lines:
+        return path, stat.st_mtime, stat.st_size, []
+
+    sections = None
+    if path.endswith(".py"):
+        try:
+            sections = _python_sections(source, lines)
+        except (SyntaxError, ValueError):
+            sections = None
+    elif path.endswith(".md"):
+        sections = _split_at(lines, lambda line: MARKDOWN_HEADING.match(line))
+    elif any(DECLARATION_START.match(line) for line in lines):
+        sections = _split_at(lines, lambda line: DECLARATION_START.match(line))
+
+    if sections is None:
+        sections = [(start, min(start + FALLBACK_CHUNK_LINES - 1, len(lines)), "")
+                    for start in range(1, len(lines) + 1, FALLBACK_CHUNK_LINES)]
+
+    # Very long sections (generated code, big functions) are split so one chunk cannot dominate
+    chunks = []
+    for start, end, title in sections:
+        for piece_start in range(start, end + 1, FALLBACK_CHUNK_LINES * 4):
+            piece_end = min(end, piece_start + FALLBACK_CHUNK_LINES * 4 - 1)
+            text = "\n".join(lines[piece_start - 1:piece_end])
+            if not text.strip():
+                continue
+            terms = Counter(tokenize(f"{os.path.basename(path)} {title}\n{text}"))
+            if terms:
+                chunks.append((piece_start, piece_end, title, dict(terms)))
+    return path, stat.st_mtime, stat.st_size, chunks
+
+
+class BM25Index:
+    """
+    BM25 full-text index over the chunks of a project's files.
+
+    Chunk term counts are kept per file, so a changed file only needs to be re-chunked. Search
+    runs on compact array postings (CSR layout: per term, a slice of chunk ids and term
+    frequencies) that are rebuilt from the per-file counts whenever files changed.
+
+    Args:
+        project_path: Root of the indexed project
+        k1: BM25 term frequency saturation
+        b: BM25 length normalisation
+    """
+
+    def __init__(self, project_path: str, k1: float = 1.2, b: float = 0.75):
+        self.project_path = project_path
+        self.k1 = k1
+        self.b = b
+        self._files: Dict[str, Tuple[float, int, List[RawChunk]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = True
+
+        # Compact search structures
+        self._vocabulary: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._chunk_ids = np.zeros(0, dtype=np.int32)
+        self._term_frequencies = np.zeros(0, dtype=np.float32)
+        self._chunk_lengths = np.zeros(0, dtype=np.float32)
+        self._chunk_locations: List[Tuple[str, int, int, str]] = []
+
+    def _walk(self) -> Dict[str, Tuple[float, int]]:
+        found = {}
+        for root, dir_names, file_names in os.walk(self.project_path, topdown=True):
+            dir_names[:] = [d for d in dir_names if d not in DEFAULT_IGNORE_PATTERNS]
+            for name in file_names:
+                if name in DEFAULT_IGNORE_PATTERNS or os.path.splitext(name)[1].lower() not in TEXT_EXTENSIONS:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_size <= MAX_INDEXED_FILE_BYTES:
+                    found[path] = (stat.st_mtime, stat.st_size)
+        return found
+
+    def update(self) -> Dict[str, int]:
+        """
+        Re-chunk new and changed files and forget deleted ones.
+
+        Returns:
+            Counts of indexed, unchanged and removed files
+        """
+        with self._lock:
+            on_disk = self._walk()
+            changed = [path for path, (mtime, size) in on_disk.items()
+                       if path not in self._files or self._files[path][:2] != (mtime, size)]
+            removed = [path for path in self._files if path not in on_disk]
+
+            for path in removed:
+                del self._files[path]
+            for result in self._chunk_all(changed):
+                if result is not None:
+                    path, mtime, size, chunks = result
+                    self._files[path] = (mtime, size, chunks)
+
+            if changed or removed:
+                self._dirty = True
+            return {"indexed": len(changed), "unchanged": len(on_disk) - len(changed), "removed": len(removed)}
+
+    def _chunk_all(self, paths: List[str]) -> List:
+        if len(paths) < PARALLEL_BUILD_MIN_FILES:
+            return [chunk_file(path) for path in paths]
+        try:
+            # Spawned, not forked: the server and step workers are threaded and a forked child
+            # could inherit a lock held by another thread
+            with ProcessPoolExecutor(max_workers=BUILD_WORKERS,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                return list(executor.map(chunk_file, paths, chunksize=16))
+        except (OSError, RuntimeError) as e:
+            # No process support (restricted sandbox, frozen interpreter), chunk serially
+            print(f"Parallel BM25 build unavailable, building serially: {e}")
+            return [chunk_file(path) for path in paths]
+
+    def _rebuild_postings(self) -> None:
+        vocabulary: Dict[str, int] = {}
+        term_ids: List[int] = []
+        chunk_ids: List[int] = []
+        frequencies: List[int] = []
+        lengths: List[int] = []
+        locations = []
+
+        for path in sorted(self._files):
+            for start, end, title, terms in self._files[path][2]:
+                chunk_id = len(locations)
+                locations.append((path, start, end, title))
+                lengths.append(sum(terms.values()))
+                for term, count in terms.items():
+                    term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                    chunk_ids.append(chunk_id)
+                    frequencies.append(count)
+
+        term_ids_array = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids_array, kind="stable")
+        self._offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids_array, minlength=len(vocabulary)), out=self._offsets[1:])
+        self._chunk_ids = np.asarray(chunk_ids, dtype=np.int32)[order]
+        self._term_frequencies = np.asarray(frequencies, dtype=np.float32)[order]
+        self._chunk_lengths = np.asarray(lengths, dtype=np.float32)
+        self._vocabulary = vocabulary
+        self._chunk_locations = locations
+        self._dirty = False
+
+    def search(self, query: str, limit: int = 10) -> List[ChunkHit]:
+        """Return the chunks that best match the query, best first."""
+        with self._lock:
+            if self._dirty:
+                self._rebuild_postings()
+
+            chunk_count = len(self._chunk_locations)
+            if chunk_count == 0:
+                return []
+
+            scores = np.zeros(chunk_count, dtype=np.float32)
+            average_length = float(self._chunk_lengths.mean())
+            for term in set(tokenize(query)):
+                term_id = self._vocabulary.get(term)
+                if term_id is None:
+                    continue
+                start, end = self._offsets[term_id], self._offsets[term_id + 1]
+                ids = self._chunk_ids[start:end]
+                tf = self._term_frequencies[start:end]
+                idf = math.log(1 + (chunk_count - len(ids) + 0.5) / (len(ids) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * self._chunk_lengths[ids] / average_length)
+                scores[ids] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            matched = np.flatnonzero(scores)
+            if len(matched) == 0:
+                return []
+            limit = min(limit, len(matched))
+            top = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+            top = top[np.argsort(-scores[top])]
+            return [ChunkHit(*self._chunk_locations[i], score=round(float(scores[i]), 3)) for i in top]
+
+    def rank_files(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Rank files by their best matching chunk."""
+        best: Dict[str, float] = {}
+        for hit in self.search(query, limit=limit * 5):
+            best[hit.path] = max(best.get(hit.path, 0.0), hit.score)
+        return sorted(best.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+bm25_indexes: "OrderedDict[str, BM25Index]" = OrderedDict()
+bm25_indexes_lock = threading.Lock()
+
+
+def get_bm25_index(project_path: str) -> BM25Index:
+    """Shared index of a project, brought up to date with the files on disk."""
+    # The path comes from the LLM, spellings of the same directory share one index
+    key = os.path.realpath(project_path)
+    with bm25_indexes_lock:
+        if key not in bm25_indexes:
+            bm25_indexes[key] = BM25Index(key)
+        bm25_indexes.move_to_end(key)
+        while len(bm25_indexes) > BM25_MAX_INDEXES:
+            bm25_indexes.popitem(last=False)
+        index = bm25_indexes[key]
+    stats = index.update()
+    if stats["indexed"] or stats["removed"]:
+        print(f"BM25 index updated: {stats}")
+    return index
@@ -0,0 +1,255 @@
+import ast
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..tools.file_utils import DEFAULT_IGNORE_PATTERNS
+
+CODE_INDEX_DIR = os.getenv("CODE_INDEX_DIR", ".index")
+MAX_INDEXED_FILE_BYTES = 512 * 1024
+
+TEXT_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".go", ".rs", ".rb", ".php", ".c", ".h",
+    ".cpp", ".hpp", ".cs", ".swift", ".scala", ".sh", ".sql", ".html", ".css", ".scss", ".vue",
+    ".md", ".txt", ".toml", ".yaml", ".yml", ".json", ".ini", ".cfg",
+}
+
+# Weight of a term by where it was found
+SYMBOL_WEIGHT = 3.0
+PATH_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "are", "was", "not", "but", "you",
+    "can", "all", "use", "add", "new", "make", "should", "would", "want", "need", "please", "file",
+    "files", "code", "self", "none", "true", "false", "return", "import", "def", "class", "str",
+    "int", "let", "var", "const", "function",
+}
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+# Declarations in languages other than Python
+DECLARATION = re.compile(
+    r"\b(?:class|interface|struct|enum|trait|type|function|func|fn|def|const|let|var)\s+([A-Za-z_][A-Za-z0-9_]*)"
+)
+
+
+def split_identifier(identifier: str) -> List[str]:
+    """Split snake_case and camelCase identifiers into lowercase words."""
+    words = []
+    for part in identifier.split("_"):
+        words.extend(w.lower() for w in CAMEL_BOUNDARY.split(part) if w)
+    return words
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase search terms of a text: whole identifiers plus their sub-words."""
+    terms = []
+    for identifier in IDENTIFIER.findall(text):
+        lowered = identifier.lower()
+        words = split_identifier(identifier)
+        if len(words) > 1 and lowered not in STOPWORDS:
+            terms.append(lowered)
+        terms.extend(w for w in words if len(w) > 1 and w not in STOPWORDS)
+    return terms
+
+
+def python_symbols(source: str) -> List[Tuple[str, str, int]]:
+    """Classes, functions, methods and module-level names of a Python file as (name, kind, line)."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return regex_symbols(source)
+
+    symbols = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            symbols.append((node.name, "class", node.lineno))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append((node.name, "function", node.lineno))
+
+    for node in tree.body:
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target] if isinstance(node, ast.AnnAssign) else []
+        for target in targets:
+            if isinstance(target, ast.Name):
+                symbols.append((target.id, "variable", node.lineno))
+    return symbols
+
+
+def regex_symbols(source: str) -> List[Tuple[str, str, int]]:
+    symbols = []
+    for line_number, line in enumerate(source.splitlines(), start=1):
+        for match in DECLARATION.finditer(line):
+            symbols.append((match.group(1), "declaration", line_number))
+    return symbols
+
+
+@dataclass
+class Candidate:
+    path: str
+    score: float
+    symbols: List[str] = field(default_factory=list)
+
+
+class SymbolIndex:
+    """
+    Symbol and keyword index of a project, stored in SQLite.
+
+    Python files are parsed with `ast`, other text files are scanned with a declaration
+    regex. Every file contributes weighted search terms from its symbol names, its path and
+    its identifiers. `update` only re-reads files whose mtime or size changed.
+
+    Args:
+        project_path: Root of the indexed project
+        db_path: SQLite file, defaults to one file per project under CODE_INDEX_DIR
+    """
+
+    def __init__(self, project_path: str, db_path: Optional[str] = None):
+        # Paths are stored relative to the project and returned joined with the path as given
+        self.root = project_path
+        self.project_path = os.path.abspath(project_path)
+        if db_path is None:
+            digest = hashlib.sha1(self.project_path.encode()).hexdigest()[:16]
+            db_path = os.path.join(CODE_INDEX_DIR, f"symbols-{digest}.sqlite")
+        self.db_path = db_path
+        self._update_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER);
+                CREATE TABLE IF NOT EXISTS symbols (path TEXT, name TEXT, kind TEXT, line INTEGER);
+                CREATE TABLE IF NOT EXISTS terms (term TEXT, path TEXT, weight REAL);
+                CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+                CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path);
+                CREATE INDEX IF NOT EXISTS terms_term ON terms (term);
+                CREATE INDEX IF NOT EXISTS terms_path ON terms (path);
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _walk(self) -> Iterator[Tuple[str, os.stat_result]]:
+        for root, dir_names, file_names in os.walk(self.project_path, topdown=True):
+            dir_names[:] = [d for d in dir_names if d not in DEFAULT_IGNORE_PATTERNS]
+            for name in file_names:
+                if name in DEFAULT_IGNORE_PATTERNS or os.path.splitext(name)[1].lower() not in TEXT_EXTENSIONS:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_size <= MAX_INDEXED_FILE_BYTES:
+                    yield path, stat
+
+    def _analyse(self, path: str) -> Tuple[List[Tuple[str, str, int]], Dict[str, float]]:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            source = f.read()
+
+        symbols = python_symbols(source) if path.endswith(".py") else regex_symbols(source)
+
+        weights: Dict[str, float] = defaultdict(float)
+        # Dampen long files: log-scaled term frequency
+        for term, count in Counter(tokenize(source)).items():
+            weights[term] += BODY_WEIGHT * (1 + math.log(count))
+        for term in tokenize(os.path.relpath(path, self.project_path)):
+            weights[term] += PATH_WEIGHT
+        for name, _, _ in symbols:
+            for term in tokenize(name):
+                weights[term] += SYMBOL_WEIGHT
+        return symbols, weights
+
+    def update(self) -> Dict[str, int]:
+        """
+        Bring the index up to date with the project on disk.
+
+        Returns:
+            Counts of indexed, unchanged and removed files
+        """
+        with self._update_lock, closing(self._connect()) as connection, connection:
+            known = {path: (mtime, size) for path, mtime, size in connection.execute("SELECT path, mtime, size FROM files")}
+            seen = set()
+            indexed = 0
+
+            for full_path, stat in self._walk():
+                path = os.path.relpath(full_path, self.project_path)
+                seen.add(path)
+                if known.get(path) == (stat.st_mtime, stat.st_size):
+                    continue
+                try:
+                    symbols, weights = self._analyse(full_path)
+                except OSError:
+                    continue
+
+                connection.execute("DELETE FROM symbols WHERE path = ?", (path,))
+                connection.execute("DELETE FROM terms WHERE path = ?", (path,))
+                connection.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?)",
+                                       [(path, name, kind, line) for name, kind, line in symbols])
+                connection.executemany("INSERT INTO terms VALUES (?, ?, ?)",
+                                       [(term, path, weight) for term, weight in weights.items()])
+                connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (path, stat.st_mtime, stat.st_size))
+                indexed += 1
+
+            removed = [path for path in known if path not in seen]
+            for path in removed:
+                for table in ("files", "symbols", "terms"):
+                    connection.execute(f"DELETE FROM {table} WHERE path = ?", (path,))
+
+        return {"indexed": indexed, "unchanged": len(seen) - indexed, "removed": len(removed)}
+
+    def rank(self, query: str, limit: int = 15) -> List[Candidate]:
+        """
+        Rank project files by relevance to a query (tf-idf over the weighted terms).
+
+        Returns:
+            The best matching files, best first, with the symbols whose names matched the query
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+
+        placeholders = ",".join("?" * len(terms))
+        with closing(self._connect()) as connection:
+            total_files = connection.execute("SELECT COUNT(*) FROM files").fetchone()[0] or 1
+            document_frequency = dict(connection.execute(
+                f"SELECT term, COUNT(*) FROM terms WHERE term IN ({placeholders}) GROUP BY term", terms))
+
+            scores: Dict[str, float] = defaultdict(float)
+            for term, path, weight in connection.execute(
+                    f"SELECT term, path, weight FROM terms WHERE term IN ({placeholders})", terms):
+                idf = math.log(1 + total_files / document_frequency[term])
+                scores[path] += weight * idf
+
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            candidates = []
+            for path, score in best:
+                names = [name for (name,) in connection.execute("SELECT name FROM symbols WHERE path = ?", (path,))]
+                matched = [name for name in names if set(tokenize(name)) & set(terms)]
+                candidates.append(Candidate(path=os.path.join(self.root, path), score=round(score, 3),
+                                            symbols=matched[:10]))
+        return candidates
+
+
+symbol_indexes: Dict[str, SymbolIndex] = {}
+
+
+def get_symbol_index(project_path: str) -> SymbolIndex:
+    """Shared, up-to-date index of a project."""
+    key = os.path.abspath(project_path)
+    if key not in symbol_indexes:
+        symbol_indexes[key] = SymbolIndex(key)
+    index = symbol_indexes[key]
+    stats = index.update()
+    if stats["indexed"] or stats["removed"]:
+        print(f"Symbol index updated: {stats}")
+    return index
@@ -0,0 +1,10 @@
+"""Conversation memory for the chat graph.
+
+This module contains the token-budgeted history window, the rolling summary of turns
+that fell out of it and a per-thread embedding index for retrieving relevant older turns.
+"""
+
+from .window import estimate_tokens, format_message, format_messages, select_window_start
+from .summary import MemoryUpdate, advance_memory
+from .embeddings import Embedder, HashingEmbedder, OpenAIEmbedder, get_embedder
+from .retrieval import MessageIndex, MessageIndexStore, get_message_index_store
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import re
+from typing import List, Optional, Protocol
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# openai  - OpenAI embeddings through langchain-openai
+# hashing - deterministic, dependency-free feature hashing, the stub for tests and offline runs
+MEMORY_EMBEDDER = os.getenv("MEMORY_EMBEDDER", "openai")
+MEMORY_EMBEDDING_MODEL = os.getenv("MEMORY_EMBEDDING_MODEL", "text-embedding-3-small")
+
+
+class Embedder(Protocol):
+    """Turns texts into L2-normalised float32 vectors of shape (len(texts), dim)."""
+
+    name: str
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        ...
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class HashingEmbedder:
+    """
+    Bag-of-words feature hashing with unigrams and bigrams.
+
+    Deterministic across processes and machines, so it doubles as the stub embedder in tests.
+    It only matches shared vocabulary, use a model embedder for paraphrase-level recall.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vectors[row, value % self.dim] += 1.0 if value >> 63 else -1.0
+        return normalize_rows(vectors)
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API."""
+
+    def __init__(self, model: str = MEMORY_EMBEDDING_MODEL):
+        from langchain_openai import OpenAIEmbeddings
+
+        self.name = f"openai-{model}"
+        self._embeddings = OpenAIEmbeddings(model=model)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return normalize_rows(np.asarray(self._embeddings.embed_documents(texts), dtype=np.float32))
+
+
+embedder: Optional[Embedder] = None
+
+
+def get_embedder() -> Embedder:
+    global embedder
+    if embedder is None:
+        if MEMORY_EMBEDDER == "openai":
+            embedder = OpenAIEmbedder()
+        elif MEMORY_EMBEDDER == "hashing":
+            embedder = HashingEmbedder()
+        else:
+            raise ValueError(f"Unknown MEMORY_EMBEDDER '{MEMORY_EMBEDDER}', expected 'hashing' or 'openai'")
+    return embedder
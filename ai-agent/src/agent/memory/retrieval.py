@@ -0,0 +1,167 @@
+import asyncio
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from .embeddings import Embedder, get_embedder
+
+MEMORY_INDEX_DIR = os.getenv("MEMORY_INDEX_DIR", os.path.join(".memory", "index"))
+
+
+@dataclass
+class MessageIndex:
+    """
+    Embeddings of the messages of one thread.
+
+    Row i of `vectors` is the embedding of messages[i]; the index covers the first
+    `len(vectors)` messages of the thread and grows as the thread does.
+    """
+    embedder: str
+    vectors: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.vectors)
+
+    def search(self, query: np.ndarray, k: int, end: Optional[int] = None) -> List[int]:
+        """
+        Return the positions of the k messages most similar to the query, best first.
+
+        Args:
+            query: An L2-normalised query vector
+            k: How many positions to return
+            end: Only consider messages[:end]
+        """
+        candidates = self.vectors[:end]
+        if k <= 0 or len(candidates) == 0:
+            return []
+        # Rows are normalised, so the dot product is the cosine similarity
+        scores = candidates @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])].tolist()
+
+
+def _message_text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+class MessageIndexStore:
+    """
+    Per-thread message indexes, persisted as one `.npz` file per thread.
+
+    Only messages added since the last turn are embedded. Recently used indexes stay in memory.
+    """
+
+    def __init__(self, directory: str = MEMORY_INDEX_DIR, embedder: Optional[Embedder] = None,
+                 max_cached_threads: int = 64):
+        self.directory = directory
+        self._embedder = embedder
+        self.max_cached_threads = max_cached_threads
+        self._cache: "OrderedDict[str, MessageIndex]" = OrderedDict()
+        self._locks: dict = {}
+
+    @property
+    def embedder(self) -> Embedder:
+        if self._embedder is None:
+            self._embedder = get_embedder()
+        return self._embedder
+
+    def _path(self, thread_id: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^\w.-]", "_", thread_id) + ".npz")
+
+    def _load(self, thread_id: str) -> Optional[MessageIndex]:
+        if thread_id in self._cache:
+            self._cache.move_to_end(thread_id)
+            return self._cache[thread_id]
+
+        path = self._path(thread_id)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            index = MessageIndex(embedder=str(data["embedder"]), vectors=data["vectors"])
+        self._remember(thread_id, index)
+        return index
+
+    def _remember(self, thread_id: str, index: MessageIndex) -> None:
+        self._cache[thread_id] = index
+        self._cache.move_to_end(thread_id)
+        while len(self._cache) > self.max_cached_threads:
+            self._cache.popitem(last=False)
+
+    def _save(self, thread_id: str, index: MessageIndex) -> None:
+        self._remember(thread_id, index)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(thread_id)
+        # Write then rename, so a crash never leaves a truncated index behind
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, embedder=np.array(index.embedder), vectors=index.vectors)
+        os.replace(path + ".tmp", path)
+
+    def sync(self, thread_id: str, messages: Sequence[BaseMessage]) -> MessageIndex:
+        """Bring the index of a thread up to date with its messages and return it."""
+        index = self._load(thread_id)
+        embedder = self.embedder
+        if index is None or index.embedder != embedder.name or index.size > len(messages):
+            # New thread, a different embedder or a rewritten history - start over
+            index = MessageIndex(embedder=embedder.name, vectors=np.zeros((0, 0), dtype=np.float32))
+
+        new_messages = messages[index.size:]
+        if new_messages:
+            new_vectors = embedder.embed([_message_text(m) for m in new_messages])
+            vectors = new_vectors if index.size == 0 else np.concatenate([index.vectors, new_vectors])
+            index = MessageIndex(embedder=embedder.name, vectors=vectors)
+            self._save(thread_id, index)
+        return index
+
+    def relevant_turns(self, thread_id: str, messages: Sequence[BaseMessage], query: str, k: int,
+                       end: int) -> List[int]:
+        """
+        Find the past turns most relevant to a query.
+
+        Args:
+            thread_id: The conversation thread
+            messages: All messages of the thread
+            query: The new user message
+            k: How many matching messages to expand into turns
+            end: Only search messages[:end] (everything after is in the prompt anyway)
+
+        Returns:
+            Positions of the matching messages together with the other half of their
+            question/answer turn, in chronological order
+        """
+        if k <= 0 or end <= 0:
+            return []
+
+        index = self.sync(thread_id, messages)
+        query_vector = self.embedder.embed([query])[0]
+
+        positions = set()
+        for position in index.search(query_vector, k, end=end):
+            positions.add(position)
+            partner = position + 1 if isinstance(messages[position], HumanMessage) else position - 1
+            if 0 <= partner < end:
+                positions.add(partner)
+        return sorted(positions)
+
+    async def arelevant_turns(self, thread_id: str, messages: Sequence[BaseMessage], query: str, k: int,
+                              end: int) -> List[int]:
+        """Async variant of `relevant_turns`; embedding and file IO run in a worker thread."""
+        lock = self._locks.setdefault(thread_id, asyncio.Lock())
+        async with lock:
+            return await asyncio.to_thread(self.relevant_turns, thread_id, messages, query, k, end)
+
+
+message_index_store: Optional[MessageIndexStore] = None
+
+
+def get_message_index_store() -> MessageIndexStore:
+    global message_index_store
+    if message_index_store is None:
+        message_index_store = MessageIndexStore()
+    return message_index_store
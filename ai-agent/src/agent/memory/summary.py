@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+from typing import List, Callable, Awaitable, Optional
+
+from langchain_core.messages import BaseMessage
+
+from .window import select_window_start, format_messages
+
+# (previous summary, newly evicted messages as text) -> new summary
+Summarizer = Callable[[str, str], Awaitable[str]]
+
+
+@dataclass
+class MemoryUpdate:
+    summary: str
+    summarized_count: int
+    evicted: int
+
+
+async def advance_memory(
+        messages: List[BaseMessage],
+        summary: Optional[str],
+        summarized_count: int,
+        token_budget: int,
+        summarize: Summarizer,
+) -> MemoryUpdate:
+    """
+    Slide the history window forward and fold the messages that fell out of it into the summary.
+
+    Only the messages evicted by this turn are sent to the summariser, together with the
+    previous summary, so the cost of a turn does not grow with the length of the chat.
+
+    Args:
+        messages: The full conversation
+        summary: The rolling summary of messages[:summarized_count]
+        summarized_count: How many leading messages the summary already covers
+        token_budget: Token budget of the verbatim window
+        summarize: Coroutine extending a summary with new messages
+
+    Returns:
+        The new summary and the number of messages it covers; the window is messages[summarized_count:]
+    """
+    summary = summary or ""
+    start = select_window_start(messages, token_budget, floor=summarized_count)
+    if start <= summarized_count:
+        return MemoryUpdate(summary, summarized_count, 0)
+
+    evicted = messages[summarized_count:start]
+    summary = await summarize(summary, format_messages(evicted))
+    return MemoryUpdate(summary, start, len(evicted))
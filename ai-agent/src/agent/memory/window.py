@@ -0,0 +1,42 @@
+from typing import List, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (about four characters per token for English text).
+
+    Good enough for budgeting a prompt, and it avoids loading a tokenizer per model.
+    """
+    return len(text) // 4 + 1
+
+
+def format_message(message: BaseMessage) -> str:
+    return f"Human: {message.content}" if isinstance(message, HumanMessage) else f"AI: {message.content}"
+
+
+def format_messages(messages: Sequence[BaseMessage]) -> str:
+    return "\n".join(format_message(m) for m in messages)
+
+
+def select_window_start(messages: List[BaseMessage], token_budget: int, floor: int = 0) -> int:
+    """
+    Find where the history window starts.
+
+    The window is the longest suffix of `messages` that fits in `token_budget`, but it never
+    starts before `floor` (messages before it are already summarised) and it always holds at
+    least the last message.
+
+    Returns:
+        The index of the first message in the window
+    """
+    start = len(messages)
+    used = 0
+    while start > floor:
+        cost = estimate_tokens(format_message(messages[start - 1]))
+        if used + cost > token_budget and start < len(messages):
+            break
+        used += cost
+        start -= 1
+    return start
@@ -3,7 +3,8 @@
 This module contains Pydantic models and schemas used by the agent for structured data.
 """
 
-from .models import FileReflectionList, SearchFilePathsList, EnhanceTextInstruction, Route, InputType
+from .models import FileReflectionList, SearchFilePathsList, EnhanceTextInstruction, Route, InputType, \
+    CommitMessage, RestructuredText
 from .task_models import Task, TaskList
 from .step_models import Step, StepList
 from .schemas import SearchQueryList, Reflection
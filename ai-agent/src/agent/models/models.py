@@ -43,3 +43,11 @@ class InputType(BaseModel):
     input_type: Literal["question", "task"] = Field(
         description="Determination of whether the user input is a question or a task."
     )
+
+
+class CommitMessage(BaseModel):
+    message: str = Field(..., description="Commit message")
+
+
+class RestructuredText(BaseModel):
+    text: str = Field(..., description="Restructured text")
@@ -7,12 +7,25 @@ from pydantic import BaseModel, Field
 
 
 class Step(BaseModel):
+    id: int = Field(
+        default=0,
+        description="Unique number of the step, starting at 1.",
+    )
     description: str = Field(
         description="The description of the step that needs to be performed.",
     )
+    files: list[str] = Field(
+        default_factory=list,
+        description="Paths of the files this step creates, edits or deletes.",
+    )
+    depends_on: list[int] = Field(
+        default_factory=list,
+        description="Ids of the steps that must be finished before this step can start. "
+                    "Empty if the step is independent of the others.",
+    )
 
 
 class StepList(BaseModel):
     steps: list[Step] = Field(
         description="List of steps to be performed.",
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,6 @@
+"""Local persistence of graph runs: resumable checkpoints, the blob store for large state fields
+and the run-scoped artefact files."""
+
+from .sqlite_checkpointer import SqliteCheckpointSaver, get_local_checkpointer
+from .blobs import BlobMissingError, BlobStore, get_blob_store, is_blob_ref
+from .artefacts import ArtefactStore, get_artefact_store, run_scope
@@ -0,0 +1,183 @@
+import gzip
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+ARTEFACT_DIR = os.getenv("ARTEFACT_DIR", ".artefacts")
+# Run directories older than this are removed, 0 keeps them forever
+ARTEFACT_RETENTION_DAYS = float(os.getenv("ARTEFACT_RETENTION_DAYS", "7"))
+# At most this many runs are kept per thread, the oldest are removed first
+ARTEFACT_MAX_RUNS_PER_THREAD = int(os.getenv("ARTEFACT_MAX_RUNS_PER_THREAD", "20"))
+# Cleanup runs again with the first write after this many seconds, so long-lived servers expire runs too
+ARTEFACT_CLEANUP_INTERVAL_SECONDS = float(os.getenv("ARTEFACT_CLEANUP_INTERVAL_SECONDS", "3600"))
+# Artefacts from this size on are gzip compressed, e.g. the assembled context
+ARTEFACT_COMPRESS_MIN_CHARS = int(os.getenv("ARTEFACT_COMPRESS_MIN_CHARS", "65536"))
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _safe(name: str) -> str:
+    return _UNSAFE.sub("_", name).strip(".") or "_"
+
+
+def run_scope(config: Optional[dict]) -> Tuple[str, str]:
+    """
+    (thread_id, run_id) of the graph run a node belongs to.
+
+    The LangGraph server puts both in the configurable section. Local runs pass `thread_id`
+    and may pass `run_id`; runs without one share the "latest" run of their thread.
+    """
+    config = config or {}
+    configurable = config.get("configurable") or {}
+    metadata = config.get("metadata") or {}
+    thread_id = configurable.get("thread_id") or metadata.get("thread_id") or "default"
+    run_id = configurable.get("run_id") or metadata.get("run_id") or config.get("run_id") or "latest"
+    return str(thread_id), str(run_id)
+
+
+class ArtefactStore:
+    """
+    Run-scoped files produced by the graph nodes, such as the assembled context, the answer
+    and the plan.
+
+    Artefacts are written to `<directory>/<thread_id>/<run_id>/<name>` by a background
+    writer, so nodes do not block on disk and concurrent runs never overwrite each other.
+    Large artefacts are stored as `<name>.gz`. Every write goes through a temporary file, so
+    readers never see a partial artefact. Old runs are removed by `cleanup`, which the writer
+    runs in the background when the store is created and then again at most every
+    `cleanup_interval` seconds, with the next write.
+
+    Args:
+        directory: Root directory of the artefacts
+        retention_days: Age after which a run directory is removed, 0 to keep runs forever
+        max_runs_per_thread: Number of most recent runs kept per thread
+        compress_min_chars: Size from which artefacts are compressed
+        cleanup_interval: Seconds between background cleanups
+    """
+
+    def __init__(self, directory: str = ARTEFACT_DIR, retention_days: float = ARTEFACT_RETENTION_DAYS,
+                 max_runs_per_thread: int = ARTEFACT_MAX_RUNS_PER_THREAD,
+                 compress_min_chars: int = ARTEFACT_COMPRESS_MIN_CHARS,
+                 cleanup_interval: float = ARTEFACT_CLEANUP_INTERVAL_SECONDS):
+        self.directory = directory
+        self.retention_days = retention_days
+        self.max_runs_per_thread = max_runs_per_thread
+        self.compress_min_chars = compress_min_chars
+        self.cleanup_interval = cleanup_interval
+        # One writer keeps the writes of a run in order
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artefact-writer")
+        self._pending: List[Future] = []
+        self._lock = threading.Lock()
+        self._next_cleanup = time.monotonic() + cleanup_interval
+        self._submit(self.cleanup)
+
+    def _submit(self, fn, *args) -> Future:
+        future = self._writer.submit(fn, *args)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()] + [future]
+        return future
+
+    def run_dir(self, thread_id: str, run_id: str) -> str:
+        return os.path.join(self.directory, _safe(thread_id), _safe(run_id))
+
+    def _write(self, path: str, content: str) -> str:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        data = content.encode("utf-8")
+        if len(content) >= self.compress_min_chars:
+            with gzip.open(temporary, "wb", compresslevel=1) as f:
+                f.write(data)
+            stale, path = path, f"{path}.gz"
+        else:
+            with open(temporary, "wb") as f:
+                f.write(data)
+            stale = f"{path}.gz"
+        os.replace(temporary, path)
+        # A rewrite may change whether the artefact is compressed
+        if os.path.exists(stale):
+            os.remove(stale)
+        return path
+
+    def write(self, thread_id: str, run_id: str, name: str, content: str) -> Future:
+        """
+        Queue an artefact for writing and return immediately.
+
+        Returns:
+            A future resolving to the written path
+        """
+        path = os.path.join(self.run_dir(thread_id, run_id), _safe(name))
+        future = self._submit(self._write, path, content or "")
+        with self._lock:
+            cleanup_due = time.monotonic() >= self._next_cleanup
+            if cleanup_due:
+                self._next_cleanup = time.monotonic() + self.cleanup_interval
+        if cleanup_due:
+            self._submit(self.cleanup)
+        return future
+
+    def read(self, thread_id: str, run_id: str, name: str) -> Optional[str]:
+        """Content of an artefact, or None if the run did not write it."""
+        path = os.path.join(self.run_dir(thread_id, run_id), _safe(name))
+        if os.path.exists(f"{path}.gz"):
+            with gzip.open(f"{path}.gz", "rb") as f:
+                return f.read().decode("utf-8")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait for all queued writes."""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result(timeout=timeout)
+
+    def cleanup(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Remove runs older than the retention period and all but the most recent runs of
+        every thread.
+
+        Returns:
+            Number of removed and kept run directories
+        """
+        now = time.time() if now is None else now
+        removed = kept = 0
+        if not os.path.isdir(self.directory):
+            return {"removed": 0, "kept": 0}
+
+        for thread in os.scandir(self.directory):
+            if not thread.is_dir():
+                continue
+            runs = sorted((run for run in os.scandir(thread.path) if run.is_dir()),
+                          key=lambda run: run.stat().st_mtime, reverse=True)
+            for position, run in enumerate(runs):
+                expired = self.retention_days > 0 and now - run.stat().st_mtime > self.retention_days * 86400
+                if expired or position >= self.max_runs_per_thread:
+                    shutil.rmtree(run.path, ignore_errors=True)
+                    removed += 1
+                else:
+                    kept += 1
+            if not os.listdir(thread.path):
+                try:
+                    os.rmdir(thread.path)
+                except OSError:
+                    # A run of the thread was written meanwhile
+                    pass
+        if removed:
+            print(f"Removed {removed} old artefact runs from {self.directory}")
+        return {"removed": removed, "kept": kept}
+
+
+artefact_store: Optional[ArtefactStore] = None
+
+
+def get_artefact_store() -> ArtefactStore:
+    global artefact_store
+    if artefact_store is None:
+        artefact_store = ArtefactStore()
+    return artefact_store
@@ -0,0 +1,175 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# On the server this must be a persistent volume: the references live on in the platform's checkpoints
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", ".blobs")
+# Blobs not written or read for this long are removed, 0 keeps them forever
+BLOB_RETENTION_DAYS = float(os.getenv("BLOB_RETENTION_DAYS", "14"))
+# Pruning runs again with the first put after this many seconds
+BLOB_PRUNE_INTERVAL_SECONDS = float(os.getenv("BLOB_PRUNE_INTERVAL_SECONDS", "3600"))
+BLOB_REF_PREFIX = "blob:"
+# Shorter values stay inline in the state, a reference would not save anything
+INLINE_MAX_CHARS = 1024
+
+
+class BlobMissingError(KeyError):
+    """A reference whose blob is not in the store, it was pruned or the store is not on a persistent volume."""
+
+
+def is_blob_ref(value) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+
+class BlobStore:
+    """
+    Content-addressed store for the large strings of the graph state.
+
+    `put` returns a short reference ("blob:<sha256>") that is kept in the state instead of
+    the text, so checkpoints and state snapshots only serialise the reference. A blob is
+    written once, the first time its content is seen; `get` reads it back lazily and keeps
+    recently used blobs in memory. Plain strings pass through `get` unchanged, so states
+    created before references existed (or by callers passing raw text) still work.
+
+    Writing or reading a blob from disk refreshes its modification time, and `prune` removes
+    blobs unused for longer than the retention period. It runs in a background thread when
+    the store is created and then again at most every `prune_interval` seconds, with the next
+    put. Resolving a reference whose blob is gone (pruned, or the directory was not on a
+    persistent volume) raises `BlobMissingError`, a node never runs on silently emptied state.
+
+    Args:
+        directory: Where blobs are stored, as gzip files sharded by hash prefix
+        cache_size: Number of blobs kept in memory
+        retention_days: Age after which an unused blob is removed, 0 to keep blobs forever
+        prune_interval: Seconds between background prunes
+    """
+
+    def __init__(self, directory: str = BLOB_STORE_DIR, cache_size: int = 32,
+                 retention_days: float = BLOB_RETENTION_DAYS, prune_interval: float = BLOB_PRUNE_INTERVAL_SECONDS):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_prune = time.monotonic() + prune_interval
+        self._prune_in_background()
+
+    def _prune_in_background(self) -> None:
+        if self.retention_days > 0:
+            threading.Thread(target=self.prune, name="blob-prune", daemon=True).start()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.gz")
+
+    def _remember(self, digest: str, text: str) -> None:
+        with self._lock:
+            self._cache[digest] = text
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def put(self, text: Optional[str]) -> str:
+        """
+        Store a text and return its reference, or the text itself if it is short.
+
+        Storing content that is already in the store does not write anything.
+        """
+        if text is None or len(text) < INLINE_MAX_CHARS or is_blob_ref(text):
+            return text or ""
+
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        # An existing blob only needs its mtime refreshed, unless it was pruned in the meantime
+        if not self._touch(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first, so concurrent readers never see a partial blob
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temporary, "wb", compresslevel=1) as f:
+                f.write(data)
+            os.replace(temporary, path)
+        self._remember(digest, text)
+
+        with self._lock:
+            prune_due = time.monotonic() >= self._next_prune
+            if prune_due:
+                self._next_prune = time.monotonic() + self.prune_interval
+        if prune_due:
+            self._prune_in_background()
+        return f"{BLOB_REF_PREFIX}{digest}"
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        """Refresh the mtime of a blob, False if it does not exist."""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get(self, value: Optional[str]) -> str:
+        """
+        Resolve a reference to its text. Anything that is not a reference is returned as is.
+
+        Raises:
+            BlobMissingError: The blob of the reference is not in the store
+        """
+        if not is_blob_ref(value):
+            return value or ""
+
+        digest = value[len(BLOB_REF_PREFIX):]
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+        path = self._path(digest)
+        try:
+            with gzip.open(path, "rb") as f:
+                text = f.read().decode("utf-8")
+        except FileNotFoundError:
+            raise BlobMissingError(f"Blob {digest} is not in the store at {self.directory}, it was pruned or "
+                                   f"BLOB_STORE_DIR is not on a persistent volume") from None
+        self._touch(path)
+        self._remember(digest, text)
+        return text
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Remove blobs that were not written or read within the retention period.
+
+        Returns:
+            Number of removed blobs
+        """
+        if self.retention_days <= 0 or not os.path.isdir(self.directory):
+            return 0
+        cutoff = (time.time() if now is None else now) - self.retention_days * 86400
+        removed = 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for blob in os.scandir(shard.path):
+                try:
+                    if blob.stat().st_mtime < cutoff:
+                        os.remove(blob.path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+            # Empty shard directories stay, a concurrent put may be about to write into one
+        if removed:
+            print(f"Removed {removed} unused blobs from {self.directory}")
+        return removed
+
+
+blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global blob_store
+    if blob_store is None:
+        blob_store = BlobStore()
+    return blob_store
@@ -0,0 +1,343 @@
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from contextlib import closing
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+LOCAL_CHECKPOINT_DB = os.getenv("LOCAL_CHECKPOINT_DB", ".checkpoints/agent.sqlite")
+# Serialised values above this size are zlib-compressed before they are stored
+COMPRESS_MIN_BYTES = int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "4096"))
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT, parent_checkpoint_id TEXT,
+        checkpoint TEXT, metadata TEXT,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    );
+    CREATE TABLE IF NOT EXISTS channel_versions (
+        thread_id TEXT, checkpoint_ns TEXT, channel TEXT, version TEXT, blob TEXT,
+        PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+    );
+    CREATE TABLE IF NOT EXISTS writes (
+        thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT, task_id TEXT, idx INTEGER,
+        channel TEXT, blob TEXT, task_path TEXT,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    );
+    CREATE TABLE IF NOT EXISTS blobs (
+        hash TEXT PRIMARY KEY, type TEXT, compressed INTEGER, data BLOB
+    );
+"""
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """
+    Durable LangGraph checkpointer for local runs, stored in one SQLite file in WAL mode.
+
+    Every serialised value (checkpoints, metadata, channel values and pending writes) is
+    stored once in a content-addressed `blobs` table keyed by its sha256, and the other
+    tables only hold references. A large `context` or `project_structure` that survives
+    many steps, or that is shared between threads, therefore costs its size once instead of
+    once per checkpoint. Values above COMPRESS_MIN_BYTES are zlib-compressed.
+
+    Interrupted runs resume by invoking the graph with `None` and the same `thread_id`.
+
+    Args:
+        db_path: SQLite file, created with its directory if missing
+    """
+
+    def __init__(self, db_path: str = LOCAL_CHECKPOINT_DB, **kwargs):
+        super().__init__(**kwargs)
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # One connection per thread, async methods run the sync ones in worker threads
+        if getattr(self._local, "connection", None) is None:
+            self._local.connection = self._connect()
+        return self._local.connection
+
+    # Blobs
+
+    def _store(self, connection: sqlite3.Connection, value: Any) -> str:
+        type_, data = self.serde.dumps_typed(value)
+        digest = hashlib.sha256(type_.encode() + b"\0" + data).hexdigest()
+        compressed = len(data) >= COMPRESS_MIN_BYTES
+        if compressed:
+            data = zlib.compress(data, 1)
+        connection.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?)",
+                           (digest, type_, int(compressed), data))
+        return digest
+
+    def _load(self, connection: sqlite3.Connection, digest: str) -> Any:
+        type_, compressed, data = connection.execute(
+            "SELECT type, compressed, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        return self.serde.loads_typed((type_, zlib.decompress(data) if compressed else bytes(data)))
+
+    def _load_channel_values(self, connection: sqlite3.Connection, thread_id: str, checkpoint_ns: str,
+                             versions: ChannelVersions) -> Dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            row = connection.execute(
+                "SELECT blob FROM channel_versions WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? "
+                "AND version = ?", (thread_id, checkpoint_ns, channel, str(version))).fetchone()
+            # Channels without a value at this version (cleared) have no blob
+            if row is not None and row[0] is not None:
+                values[channel] = self._load(connection, row[0])
+        return values
+
+    def _tuple(self, connection: sqlite3.Connection, thread_id: str, checkpoint_ns: str, checkpoint_id: str,
+               parent_checkpoint_id: Optional[str], checkpoint_hash: str, metadata_hash: str) -> CheckpointTuple:
+        checkpoint = self._load(connection, checkpoint_hash)
+        writes = connection.execute(
+            "SELECT task_id, channel, blob FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_path, task_id, idx", (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_channel_values(connection, thread_id, checkpoint_ns,
+                                                            checkpoint["channel_versions"]),
+            },
+            metadata=self._load(connection, metadata_hash),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                  "checkpoint_id": parent_checkpoint_id}}
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=[(task_id, channel, self._load(connection, blob)) for task_id, channel, blob in writes],
+        )
+
+    # BaseCheckpointSaver
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = ("SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+                 "WHERE thread_id = ? AND checkpoint_ns = ?")
+        params: Tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            # Checkpoint ids are time-ordered, the largest one is the latest checkpoint
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        connection = self.connection
+        row = connection.execute(query, params).fetchone()
+        if row is None:
+            return None
+        return self._tuple(connection, thread_id, checkpoint_ns, *row)
+
+    def list(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        conditions: List[str] = []
+        params: List[Any] = []
+        if config:
+            conditions.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                conditions.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            params.append(before_id)
+
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata "
+                 "FROM checkpoints")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY checkpoint_id DESC"
+
+        connection = self.connection
+        remaining = limit
+        for thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_hash, metadata_hash in \
+                connection.execute(query, params).fetchall():
+            if remaining is not None and remaining <= 0:
+                break
+            # Metadata is serialised, so it is filtered after loading
+            if filter:
+                metadata = self._load(connection, metadata_hash)
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if remaining is not None:
+                remaining -= 1
+            yield self._tuple(connection, thread_id, checkpoint_ns, checkpoint_id, parent_id,
+                              checkpoint_hash, metadata_hash)
+
+    def put(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stripped = checkpoint.copy()
+        values = stripped.pop("channel_values")
+
+        connection = self.connection
+        with connection:
+            # Only channels that changed since the parent checkpoint get a new version row
+            for channel, version in new_versions.items():
+                blob = self._store(connection, values[channel]) if channel in values else None
+                connection.execute("INSERT OR REPLACE INTO channel_versions VALUES (?, ?, ?, ?, ?)",
+                                   (thread_id, checkpoint_ns, channel, str(version), blob))
+            connection.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 self._store(connection, stripped),
+                 self._store(connection, get_checkpoint_metadata(config, metadata))),
+            )
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        connection = self.connection
+        with connection:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                # Regular writes are kept once per task, special ones (errors, interrupts) are replaced
+                verb = "INSERT OR REPLACE" if idx < 0 else "INSERT OR IGNORE"
+                connection.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel,
+                     self._store(connection, value), task_path),
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        connection = self.connection
+        with connection:
+            for table in ("checkpoints", "channel_versions", "writes"):
+                connection.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+        self.prune_blobs()
+
+    def prune_blobs(self) -> int:
+        """
+        Delete blobs no longer referenced by any checkpoint, channel version or write.
+
+        Returns:
+            The number of deleted blobs
+        """
+        connection = self.connection
+        with connection:
+            cursor = connection.execute("""
+                DELETE FROM blobs WHERE hash NOT IN (
+                    SELECT checkpoint FROM checkpoints UNION SELECT metadata FROM checkpoints
+                    UNION SELECT blob FROM channel_versions WHERE blob IS NOT NULL
+                    UNION SELECT blob FROM writes
+                )
+            """)
+        return cursor.rowcount
+
+    def get_next_version(self, current: Optional[str], channel: Any) -> str:
+        if current is None:
+            current_version = 0
+        elif isinstance(current, int):
+            current_version = current
+        else:
+            current_version = int(current.split(".")[0])
+        # Zero-padded so versions compare correctly as strings
+        return f"{current_version + 1:032}.{random.random():016}"
+
+    # Async variants, sqlite3 is blocking so they run in a worker thread
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def storage_stats(self) -> Dict[str, int]:
+        """Row counts and stored blob bytes, for checking how much deduplication saves."""
+        connection = self.connection
+        stats = {table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                 for table in ("checkpoints", "channel_versions", "writes", "blobs")}
+        stats["blob_bytes"] = connection.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()[0]
+        return stats
+
+
+local_checkpointer: Optional[SqliteCheckpointSaver] = None
+
+
+def get_local_checkpointer() -> SqliteCheckpointSaver:
+    global local_checkpointer
+    if local_checkpointer is None:
+        local_checkpointer = SqliteCheckpointSaver(LOCAL_CHECKPOINT_DB)
+    return local_checkpointer
@@ -6,4 +6,28 @@ User message:
 
 Context:
 {context}
-"""
\ No newline at end of file
+"""
+generate_answer_from_transcript_instruction = """Answer the users question. Below is a context of previous conversation.
+You can use it if you think is beneficial or skip if it is not useful.
+
+The user message is a raw speech-to-text transcript of a voice note. It can be in any language,
+ramble, and contain misheard words. First work out what the user means, then answer in English.
+Do not comment on the transcript itself.
+
+User message:
+{user_task}
+
+Context:
+{context}
+"""
+
+summarize_conversation_instruction = """You maintain a running summary of a conversation between a user and an AI assistant.
+Extend the current summary with the new messages below. Keep facts, decisions, names, numbers and open
+questions; drop small talk. Write in English, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+"""
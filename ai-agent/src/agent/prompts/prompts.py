@@ -48,6 +48,9 @@ Format:
 User task:
 {user_task}
 
+Candidate files ranked by a local symbol index (matched symbols in brackets, may be incomplete):
+{candidate_files}
+
 Project structure: 
 {project_structure}"""
 
@@ -77,6 +80,39 @@ Fetched files:
 {context}
 """
 
+file_reflection_diff_instructions = """Your goal is to determine which files need to be searched in order to complete the user's task.
+You already reviewed the fetched files in an earlier round. Since then the file selection changed as shown below.
+
+Instructions:
+- Based on the newly added files, suggest any other files that need to be added.
+- Remove files that are not needed for the task.
+- If there is no need, do not add or remove files (return empty lists).
+- Write the filepaths the same exact way as in the project structure.
+- You must write the whole path: {project_path}
+
+Format: 
+- Format your response as a JSON object with ALL of these exact keys:
+   - "additional_file_paths": A list of file paths that should be added to the context.
+   - "remove_file_paths": A list of file paths that should be removed from the context.
+
+User task:
+{user_task}
+
+Project path: {project_path}
+
+Project structure: 
+{project_structure}
+
+Files currently selected:
+{selected_files}
+
+Files removed since the last round:
+{removed_files}
+
+Files added since the last round:
+{added_context}
+"""
+
 final_instruction = """Your goal is to determine which files need to be searched in order to complete the user's task.
 
 Instructions:
@@ -122,7 +158,26 @@ User message: {user_task}
 {context}
 """
 
+make_plan_steps_instruction = """You are a helpful AI agent. Plan the changes needed for the user's task as a list of steps.
+
+Write every step as one JSON object on its own line, in the order the steps should be done, and nothing else:
+{{"id": 1, "description": "...", "files": ["path/to/file.py"], "depends_on": []}}
+
+- "description" says exactly what to change, with enough detail to do it without the rest of the plan
+- "files" lists the files the step creates, edits or deletes
+- "depends_on" lists the ids of earlier steps that must be finished first. Independent steps run at the same time, so only add a dependency when a step really needs the result of another one
+
+# Agent Metadata - these are instructions that you need to follow. 
+{agent_metadata}
+
+User message: {user_task}
+
+{context}
+"""
+
 segment_plan_into_steps = """Below is a given plan of actions. Your job is to detect the steps that need to be performed and return them in a JSON object.
+Number the steps from 1. For every step list the files it creates, edits or deletes, and the ids of the steps that must be finished before it can start (for example because it uses code that step adds).
+Independent steps can run at the same time, so only add a dependency when a step really needs the result of another one.
 
 # Agent Metadata - these are instructions that you need to follow. 
 {agent_metadata}
@@ -132,7 +187,7 @@ segment_plan_into_steps = """Below is a given plan of actions. Your job is to de
 """
 
 agent_instruction = """You are a helpful assistant which job is to complete the user's task. You will be given the current step that you have to complete, all the previous steps you have completed, and the whole plan you have generated before starting anything.
-You will also be given tools if you need to use them.
+You will also be given tools if you need to use them. To find code by its content use the search_code tool instead of running grep.
 Below you will be given your action history of the current step for you to know the progress and which step you are at.
 
 # Current step:
@@ -152,7 +207,11 @@ Below you will be given your action history of the current step for you to know
 """
 
 commit_message_instruction = """Generate a commit message that will be used to commit the changes to the Git repository.
+Describe what the changes do, based on the diff below. Use a short imperative subject line (at most 72 characters), followed by a blank line and a few lines of detail only if the change needs them.
 
 # Task:
 {user_task}
+
+# Changes (diffstat and shortened hunks):
+{diff_summary}
 """
@@ -1,7 +1,11 @@
+import asyncio
+import os
+import uuid
+
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
 
-from agent.core.configs import graph
+from agent.core.configs import compile_local, simple_graph
 
 project_path = ""
 
@@ -10,13 +14,19 @@ user_task = """Hey how are you?"""
 
 
 
-config = RunnableConfig(recursion_limit=250)
+graph = compile_local(simple_graph())
+
+# Every run starts a fresh thread. Setting RUN_THREAD_ID resumes that thread from its last
+# checkpoint instead, e.g. after a crash or a failed node, so no new input is sent
+resume_thread_id = os.getenv("RUN_THREAD_ID")
+config = RunnableConfig(recursion_limit=250, configurable={"thread_id": resume_thread_id or str(uuid.uuid4()),
+                                                          "run_id": os.getenv("RUN_ID") or str(uuid.uuid4())})
+
+print(f"Thread {config['configurable']['thread_id']}, set RUN_THREAD_ID to it to resume this run")
+
+run_input = None if resume_thread_id else {
+    "audio_path": "https://files.nikolanikolovski.com/test/download/test_audio.ogg",
+    "text_input": "Tell me is this type of thinking good?"
+}
 
-state = graph.invoke(
-    {
-        "audio_path": "https://files.nikolanikolovski.com/test/download/test_audio.ogg",
-        "text_input": "Tell me is this type of thinking good?"
-    }
-    ,
-    config=config
-)
+state = asyncio.run(graph.ainvoke(run_input, config=config))
@@ -0,0 +1,290 @@
+import asyncio
+import io
+import os
+import re
+import sys
+import wave
+from array import array
+from dataclasses import dataclass
+from typing import List, Tuple, Optional, Callable, Awaitable
+
+from dotenv import load_dotenv
+
+from .audio_utils import atranscribe_audio
+
+load_dotenv()
+
+# Long-audio mode is opt-in: it needs the whole file in memory (and ffmpeg for non-WAV input)
+LONG_AUDIO_TRANSCRIPTION = os.getenv("LONG_AUDIO_TRANSCRIPTION", "0") == "1"
+LONG_AUDIO_THRESHOLD_SECONDS = float(os.getenv("LONG_AUDIO_THRESHOLD_SECONDS", "120"))
+DECODE_SAMPLE_RATE = 16000
+
+AudioWindow = Tuple[float, float]
+Transcriber = Callable[[bytes, str], Awaitable[Optional[str]]]
+
+
+@dataclass
+class PcmAudio:
+    """Mono 16-bit PCM audio held in memory."""
+    samples: array
+    sample_rate: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def slice_wav(self, start: float, end: float) -> bytes:
+        """Encode the [start, end) seconds of the audio as a standalone WAV file."""
+        first = max(0, int(start * self.sample_rate))
+        last = min(len(self.samples), int(end * self.sample_rate))
+        return encode_wav(self.samples[first:last], self.sample_rate)
+
+
+def encode_wav(samples: array, sample_rate: int) -> bytes:
+    if sys.byteorder == "big":
+        samples = array("h", samples)
+        samples.byteswap()
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def _read_pcm_wav(content: bytes) -> Optional[PcmAudio]:
+    """Parse a mono 16-bit WAV file, or return None if it needs a real decoder."""
+    if not (content[:4] == b"RIFF" and content[8:12] == b"WAVE"):
+        return None
+    with wave.open(io.BytesIO(content), "rb") as wav_file:
+        if wav_file.getnchannels() != 1 or wav_file.getsampwidth() != 2:
+            return None
+        samples = array("h")
+        samples.frombytes(wav_file.readframes(wav_file.getnframes()))
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return PcmAudio(samples, wav_file.getframerate())
+
+
+async def decode_to_pcm(content: bytes) -> PcmAudio:
+    """
+    Decode audio into mono 16-bit PCM.
+
+    Mono 16-bit WAV is parsed directly; anything else (the browser's ogg/opus voice notes)
+    is piped through ffmpeg in memory.
+    """
+    pcm = _read_pcm_wav(content)
+    if pcm is not None:
+        return pcm
+
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0", "-ac", "1", "-ar", str(DECODE_SAMPLE_RATE), "-f", "s16le", "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate(input=content)
+    if process.returncode != 0:
+        raise ValueError(f"ffmpeg could not decode audio: {stderr.decode(errors='replace')}")
+
+    samples = array("h")
+    samples.frombytes(stdout[:len(stdout) - len(stdout) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return PcmAudio(samples, DECODE_SAMPLE_RATE)
+
+
+def detect_silences(
+        pcm: PcmAudio,
+        threshold: int = 500,
+        min_silence: float = 0.3,
+        frame_seconds: float = 0.02,
+) -> List[AudioWindow]:
+    """
+    Find silent stretches of audio.
+
+    Args:
+        pcm: The audio
+        threshold: Mean absolute amplitude below which a frame counts as silent
+        min_silence: Minimum length of a silence in seconds
+        frame_seconds: Analysis frame length in seconds
+
+    Returns:
+        A list of (start, end) seconds of every silence, in order
+    """
+    frame_size = max(1, int(pcm.sample_rate * frame_seconds))
+    samples = pcm.samples
+    silences = []
+    silence_start = None
+
+    for first in range(0, len(samples), frame_size):
+        frame = samples[first:first + frame_size]
+        is_silent = sum(map(abs, frame)) / len(frame) < threshold
+        position = first / pcm.sample_rate
+
+        if is_silent and silence_start is None:
+            silence_start = position
+        elif not is_silent and silence_start is not None:
+            if position - silence_start >= min_silence:
+                silences.append((silence_start, position))
+            silence_start = None
+
+    if silence_start is not None and pcm.duration - silence_start >= min_silence:
+        silences.append((silence_start, pcm.duration))
+    return silences
+
+
+def plan_windows(
+        duration: float,
+        window_seconds: float = 60.0,
+        overlap_seconds: float = 2.0,
+        silences: Optional[List[AudioWindow]] = None,
+        snap_seconds: Optional[float] = None,
+) -> List[AudioWindow]:
+    """
+    Split an audio timeline into windows for transcription.
+
+    A window boundary is moved back to the middle of the nearest silence within
+    `snap_seconds` of the target boundary; such cuts need no overlap. Boundaries that
+    cannot be snapped fall back to fixed windows overlapping by `overlap_seconds`.
+
+    Returns:
+        A list of (start, end) seconds covering the whole audio, in order
+    """
+    if duration <= window_seconds:
+        return [(0.0, duration)]
+    if overlap_seconds >= window_seconds:
+        raise ValueError("overlap_seconds must be smaller than window_seconds")
+
+    snap_seconds = window_seconds / 4 if snap_seconds is None else snap_seconds
+    midpoints = [(start + end) / 2 for start, end in (silences or [])]
+
+    windows = []
+    start = 0.0
+    while True:
+        target_end = start + window_seconds
+        if target_end >= duration:
+            windows.append((start, duration))
+            return windows
+
+        candidates = [m for m in midpoints if target_end - snap_seconds <= m <= target_end and m > start]
+        if candidates:
+            end = max(candidates)
+            next_start = end
+        else:
+            end = target_end
+            next_start = end - overlap_seconds
+
+        windows.append((start, end))
+        start = next_start
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def merge_transcripts(parts: List[str], max_overlap_words: int = 40, min_overlap_words: int = 2,
+                      max_skip_words: int = 2) -> str:
+    """
+    Stitch chunk transcripts back together, removing words repeated in overlapping audio.
+
+    The longest run of words that ends the merged text and starts the next chunk is dropped
+    from the chunk. Up to `max_skip_words` leading words of the chunk may be skipped while
+    aligning, since a word cut at the chunk start is often transcribed differently.
+    """
+    merged: List[str] = []
+    for part in parts:
+        words = part.split()
+        if not words:
+            continue
+        if not merged:
+            merged.extend(words)
+            continue
+
+        tail = [_normalize_word(w) for w in merged[-max_overlap_words:]]
+        head = [_normalize_word(w) for w in words[:max_overlap_words + max_skip_words]]
+
+        cut = 0
+        for skip in range(0, max_skip_words + 1):
+            longest = min(len(tail), len(head) - skip)
+            for size in range(longest, min_overlap_words - 1, -1):
+                if tail[-size:] == head[skip:skip + size]:
+                    cut = skip + size
+                    break
+            if cut:
+                break
+
+        merged.extend(words[cut:])
+    return " ".join(merged)
+
+
+async def transcribe_long_audio(
+        content: bytes,
+        window_seconds: float = 60.0,
+        overlap_seconds: float = 2.0,
+        max_concurrency: int = 4,
+        split_on_silence: bool = True,
+        transcribe: Optional[Transcriber] = None,
+) -> Optional[str]:
+    """
+    Transcribe long audio as concurrent chunks and stitch the transcripts back in order.
+
+    Args:
+        content: The audio file content
+        window_seconds: Target chunk length
+        overlap_seconds: Overlap between chunks whose boundary could not be moved into a silence
+        max_concurrency: Maximum number of chunk transcriptions in flight
+        split_on_silence: Whether to move chunk boundaries into nearby silences
+        transcribe: Transcription coroutine taking (wav bytes, filename), defaults to Whisper
+
+    Returns:
+        The full transcript, or None if any chunk failed
+    """
+    return await _transcribe_pcm(await decode_to_pcm(content), window_seconds, overlap_seconds,
+                                 max_concurrency, split_on_silence, transcribe)
+
+
+async def _transcribe_pcm(
+        pcm: PcmAudio,
+        window_seconds: float = 60.0,
+        overlap_seconds: float = 2.0,
+        max_concurrency: int = 4,
+        split_on_silence: bool = True,
+        transcribe: Optional[Transcriber] = None,
+) -> Optional[str]:
+    transcribe = transcribe or (lambda audio, filename: atranscribe_audio(audio, filename=filename))
+
+    silences = await asyncio.to_thread(detect_silences, pcm) if split_on_silence else None
+    windows = plan_windows(pcm.duration, window_seconds, overlap_seconds, silences)
+    print(f"   > Long audio: {pcm.duration:.0f}s split into {len(windows)} chunks")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def transcribe_window(index: int, window: AudioWindow) -> Optional[str]:
+        async with semaphore:
+            return await transcribe(pcm.slice_wav(*window), f"chunk_{index}.wav")
+
+    parts = await asyncio.gather(*(transcribe_window(i, w) for i, w in enumerate(windows)))
+    if any(part is None for part in parts):
+        return None
+    return merge_transcripts(parts)
+
+
+async def transcribe_audio_bytes(content: bytes, filename: str = "audio.ogg") -> Optional[str]:
+    """
+    Transcribe in-memory audio, switching to chunked transcription for long audio
+    when long-audio mode is enabled.
+    """
+    if LONG_AUDIO_TRANSCRIPTION:
+        try:
+            pcm = await decode_to_pcm(content)
+        except (FileNotFoundError, ValueError) as e:
+            # No ffmpeg or an unknown container - the transcription service can still handle it whole
+            print(f"   > Could not decode audio for long-audio mode, sending it whole: {e}")
+        else:
+            if pcm.duration > LONG_AUDIO_THRESHOLD_SECONDS:
+                return await _transcribe_pcm(pcm)
+
+    return await atranscribe_audio(content, filename=filename)
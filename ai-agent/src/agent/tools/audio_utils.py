@@ -1,14 +1,30 @@
+import asyncio
+import mimetypes
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Union, AsyncIterable, Tuple
 
+import aiohttp
 import requests
 from dotenv import load_dotenv
 
+from .http_clients import get_http_client, to_internal_file_url, HttpServiceError
+
 load_dotenv()
 fireworks_api_key = os.getenv("FIREWORKS_API")
+TRANSCRIPTION_URL = os.getenv(
+    "TRANSCRIPTION_URL",
+    "https://audio-prod.us-virginia-1.direct.fireworks.ai/v1/audio/transcriptions",
+)
+CHUNK_SIZE = 64 * 1024
+
+AudioBody = Union[bytes, AsyncIterable[bytes]]
+
+
 def transcribe_audio(audio_file_path: str):
     with open(audio_file_path, "rb") as f:
         response = requests.post(
-            "https://audio-prod.us-virginia-1.direct.fireworks.ai/v1/audio/transcriptions",
+            TRANSCRIPTION_URL,
             headers={"Authorization": f"Bearer {fireworks_api_key}"},
             files={"file": f},
             data={
@@ -20,4 +36,96 @@ def transcribe_audio(audio_file_path: str):
 
     if response.status_code == 200:
         return response.json()["text"]
-    return None
\ No newline at end of file
+    return None
+
+
+async def atranscribe_audio(
+        audio: AudioBody,
+        filename: str = "audio.ogg",
+        content_type: Optional[str] = None,
+        url: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Transcribe audio with Whisper through the pooled HTTP client.
+
+    Args:
+        audio: The audio as bytes, or an async iterator of byte chunks that is streamed
+               straight into the upload body
+        filename: Filename reported to the transcription service
+        content_type: MIME type of the audio, guessed from the filename when omitted
+        url: Transcription endpoint, defaults to TRANSCRIPTION_URL
+
+    Returns:
+        The transcript, or None if the transcription service failed
+    """
+    content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    def build_form() -> aiohttp.FormData:
+        form = aiohttp.FormData()
+        form.add_field("model", "whisper-v3")
+        form.add_field("temperature", "0")
+        form.add_field("vad_model", "silero")
+        form.add_field("file", audio, filename=filename, content_type=content_type)
+        return form
+
+    # A stream can only be sent once, so only in-memory audio is retried
+    max_retries = None if isinstance(audio, (bytes, bytearray)) else 0
+
+    try:
+        result = await get_http_client().post_with_retries(
+            url or TRANSCRIPTION_URL,
+            build_form,
+            headers={"Authorization": f"Bearer {fireworks_api_key}"},
+            max_retries=max_retries,
+        )
+    except HttpServiceError as e:
+        print(f"   > Transcription failed: {e}")
+        return None
+
+    return result.get("text")
+
+
+async def _iter_file(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+@asynccontextmanager
+async def open_audio_stream(audio_path: str) -> AsyncIterator[Tuple[AsyncIterator[bytes], str]]:
+    """
+    Open an audio source as a stream of byte chunks, without buffering it on disk.
+
+    Remote URLs are fetched through the pooled HTTP client. Public file-service URLs are
+    rewritten to the internal address when one is configured, and internal
+    (`files_app:5001`) URLs are fetched directly.
+
+    Yields:
+        A tuple of (async iterator of chunks, filename)
+    """
+    filename = os.path.basename(audio_path.split("?", 1)[0]) or "audio.ogg"
+
+    if not audio_path.startswith(('http://', 'https://')):
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        yield _iter_file(audio_path), filename
+        return
+
+    download_url = to_internal_file_url(audio_path)
+    print(f"   > URL detected. Streaming audio from {download_url}...")
+    session = await get_http_client().get_session()
+    try:
+        async with session.get(download_url) as response:
+            response.raise_for_status()
+            yield response.content.iter_chunked(CHUNK_SIZE), filename
+    except aiohttp.ClientError as e:
+        raise ConnectionError(f"Failed to download audio from {audio_path}. Error: {e}")
+
+
+async def transcribe_audio_source(audio_path: str) -> Optional[str]:
+    """Stream a local or remote audio file straight into the transcription upload."""
+    async with open_audio_stream(audio_path) as (chunks, filename):
+        return await atranscribe_audio(chunks, filename=filename)
@@ -1,3 +1,4 @@
+import difflib
 import os
 from pathlib import Path
 from typing import List, Dict, Tuple, Union
@@ -204,149 +205,30 @@ def generate_diff(original_lines: List[str], modified_lines: List[str],
     # Simple diff header
     diff_header = f"--- {original_file}\n+++ {modified_file}\n"
 
-    # Find the differences and generate chunks
-    chunks = []
-    i = 0
-    j = 0
-
     # Ensure lines end with newline
     original_lines = [line if line.endswith('\n') else line + '\n' for line in original_lines]
     modified_lines = [line if line.endswith('\n') else line + '\n' for line in modified_lines]
 
-    while i < len(original_lines) or j < len(modified_lines):
-        # Find a difference
-        if (i >= len(original_lines) or j >= len(modified_lines) or 
-            original_lines[i] != modified_lines[j]):
-
-            # Start a new chunk
-            original_start = i + 1  # 1-based indexing for diff
-            modified_start = j + 1
-
-            # Collect the changes
-            chunk_lines = []
-
-            # Add context lines before (if available)
-            context_before = 3
-            for k in range(max(0, i - context_before), i):
-                if k < len(original_lines) and k < len(modified_lines):
-                    chunk_lines.append(" " + original_lines[k].rstrip('\n'))
-
-            # Track original and modified positions
-            orig_i = i
-            mod_j = j
-
-            # Process differences
-            while (orig_i < len(original_lines) or mod_j < len(modified_lines)):
-                if (orig_i >= len(original_lines) or mod_j >= len(modified_lines) or 
-                    original_lines[orig_i] != modified_lines[mod_j]):
-
-                    # Add deletions from original
-                    while orig_i < len(original_lines) and (mod_j >= len(modified_lines) or 
-                                                          original_lines[orig_i] != modified_lines[mod_j]):
-                        chunk_lines.append("-" + original_lines[orig_i].rstrip('\n'))
-                        orig_i += 1
-
-                    # Add additions from modified
-                    while mod_j < len(modified_lines) and (orig_i >= len(original_lines) or 
-                                                         original_lines[orig_i] != modified_lines[mod_j]):
-                        chunk_lines.append("+" + modified_lines[mod_j].rstrip('\n'))
-                        mod_j += 1
-                else:
-                    # Found matching lines, add context and break
-                    break
-
-            # Add context lines after (if available)
-            context_after = 3
-            context_count = 0
-            while (orig_i < len(original_lines) and mod_j < len(modified_lines) and 
-                   original_lines[orig_i] == modified_lines[mod_j] and 
-                   context_count < context_after):
-                chunk_lines.append(" " + original_lines[orig_i].rstrip('\n'))
-                orig_i += 1
-                mod_j += 1
-                context_count += 1
-
-            # Update positions for next iteration
-            i = orig_i
-            j = mod_j
-
-            # Create the chunk header
-            original_count = orig_i - original_start + 1
-            modified_count = mod_j - modified_start + 1
-            chunk_header = f"@@ -{original_start},{original_count} +{modified_start},{modified_count} @@\n"
-
-            # Add the chunk
-            if chunk_lines:
-                chunks.append(chunk_header + "\n".join(chunk_lines) + "\n")
-        else:
-            # Lines match, move to next line
-            i += 1
-            j += 1
+    # Longest-matching-block alignment, so the diff resynchronises after every change
+    # instead of treating the rest of the file as changed
+    matcher = difflib.SequenceMatcher(None, original_lines, modified_lines, autojunk=False)
+    chunks = []
+    for group in matcher.get_grouped_opcodes(3):
+        original_start, original_end = group[0][1], group[-1][2]
+        modified_start, modified_end = group[0][3], group[-1][4]
+
+        chunk_lines = []
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                chunk_lines.extend(" " + line.rstrip('\n') for line in original_lines[i1:i2])
+                continue
+            chunk_lines.extend("-" + line.rstrip('\n') for line in original_lines[i1:i2])
+            chunk_lines.extend("+" + line.rstrip('\n') for line in modified_lines[j1:j2])
+
+        # Create the chunk header (1-based line numbers)
+        chunk_header = (f"@@ -{original_start + 1},{original_end - original_start} "
+                        f"+{modified_start + 1},{modified_end - modified_start} @@\n")
+        chunks.append(chunk_header + "\n".join(chunk_lines) + "\n")
 
     # Combine all chunks
     return diff_header + "".join(chunks)
-
-diff = """--- a/src/pages/ResearchTasksPage.tsx
-+++ b/src/pages/ResearchTasksPage.tsx
-@@ -1,5 +1,5 @@
- import {useEffect, useState} from 'react';
--import {useParams} from 'react-router-dom';
-+import {useParams, useNavigate} from 'react-router-dom';
- import axios from 'axios';
- import {Search, Filter, ArrowUpDown, ArrowUp, ArrowDown, MoreVertical, Edit, Trash2, Check, X} from 'lucide-react';
- import apiClient from "../axios.tsx";
-@@ -29,6 +29,7 @@
- 
- const ResearchTasksPage = () => {
-     const {logAnalysisId} = useParams<{ logAnalysisId: string }>();
-+    const navigate = useNavigate();
-     const [tasks, setTasks] = useState<ResearchTask[]>([]);
-     const [filteredTasks, setFilteredTasks] = useState<ResearchTask[]>([]);
-     const [loading, setLoading] = useState<boolean>(true);
-@@ -118,6 +119,10 @@
-         // Add your edit logic here
-     };
- 
-+    const handleRowClick = (taskId: number) => {
-+        navigate(`/research-task/${taskId}`);
-+    };
-+
-     const handleDelete = (task: ResearchTask) => {
-         setOpenMenuId(null);
-         setTaskToDelete(task);
-@@ -194,15 +199,27 @@
-                                 <tr><td colSpan={4} className="text-center py-8 text-gray-500">Loading tasks...</td></tr>
-                             ) : filteredTasks.length > 0 ? (
-                                 filteredTasks.map((task) => (
--                                    <tr key={task.id} className="hover:bg-gray-50 transition-colors duration-150">
-+                                    <tr 
-+                                        key={task.id}
-+                                        onClick={() => handleRowClick(task.id)}
-+                                        className="hover:bg-gray-50 transition-colors duration-150 cursor-pointer"
-+                                    >
-                                         <td className="px-6 py-4 font-medium text-gray-900 max-w-xs"><div className="flex"><span className="truncate" title={task.researchTopic}>{task.researchTopic}</span></div></td>
-                                         <td className="px-6 py-4 whitespace-nowrap text-gray-500">{task.updatedAt.toISOString().split('T')[0]}</td>
-                                         <td className="px-6 py-4 whitespace-nowrap"><StatusBadge status={task.status}/></td>
-                                         <td className="px-6 py-4 whitespace-nowrap text-center">
--                                            <div className="relative">
-+                                            {/* Stop propagation to prevent row click when interacting with the menu */}
-+                                            <div className="relative" onClick={(e) => e.stopPropagation()}>
-                                                 <button onClick={(e) => { e.stopPropagation(); setOpenMenuId(openMenuId === task.id ? null : task.id);}} className="p-1 text-gray-400 hover:text-gray-600 rounded-full hover:bg-gray-100 transition-colors"><MoreVertical className="h-4 w-4"/></button>
-                                                 {openMenuId === task.id && (
-                                                     <div className="absolute right-0 mt-2 w-32 bg-white rounded-md shadow-lg ring-1 ring-black ring-opacity-5 z-10">
-                                                         <div className="py-1">
--                                                            <button onClick={() => handleEdit(task.id)} className="flex items-center w-full px-4 py-2 text-sm text-gray-700 hover:bg-gray-100 transition-colors"><Edit className="h-4 w-4 mr-2"/>Edit</button>
--                                                            <button onClick={() => handleDelete(task)} className="flex items-center w-full px-4 py-2 text-sm text-red-700 hover:bg-red-50 transition-colors"><Trash2 className="h-4 w-4 mr-2"/>Delete</button>
-+                                                            <button onClick={() => handleEdit(task.id)} className="flex items-center w-full px-4 py-2 text-sm text-gray-700 hover:bg-gray-100 transition-colors">
-+                                                                <Edit className="h-4 w-4 mr-2"/>
-+                                                                Edit
-+                                                            </button>
-+                                                            <button onClick={() => handleDelete(task)} className="flex items-center w-full px-4 py-2 text-sm text-red-700 hover:bg-red-50 transition-colors">
-+                                                                <Trash2 className="h-4 w-4 mr-2"/>
-+                                                                Delete
-+                                                            </button>
-                                                         </div>
-                                                     </div>
-                                                 )}"""
-
-apply_diff_changes("/home/nnikolovskii/dev/reliabl.it/frontend/src/pages/ResearchTasksPage.tsx", diff)
\ No newline at end of file
@@ -0,0 +1,178 @@
+import asyncio
+import os
+from typing import Optional, Dict, Any, Callable
+
+import aiohttp
+from aiohttp import ClientTimeout, TCPConnector
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FILE_SERVICE_URL = "https://files.nikolanikolovski.com"
+# Address of the file service inside the docker network. Uploads come back with this host.
+FILE_SERVICE_DOCKER_URL = "http://files_app:5001"
+# When set, downloads of public file-service URLs go straight to this address instead of
+# hairpinning out through the public hostname and back in.
+FILE_SERVICE_INTERNAL_URL = os.getenv("FILE_SERVICE_INTERNAL_URL")
+
+# Status codes that are worth retrying - proxies answer with these while restarting or overloaded.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpServiceError(Exception):
+    """Raised when a remote service rejects a request."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class PooledHttpClient:
+    """
+    Long-lived aiohttp session with a bounded, keep-alive connection pool.
+
+    The session is opened lazily on first use and re-opened if it was closed or created
+    on a different event loop, so module-level clients are safe to share between graph runs.
+    """
+
+    def __init__(
+            self,
+            connection_limit: int = 20,
+            connection_limit_per_host: int = 10,
+            keepalive_timeout: float = 30.0,
+            connect_timeout: float = 10.0,
+            request_timeout: float = 300.0,
+            max_retries: int = 3,
+            backoff_factor: float = 0.5,
+    ):
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = ClientTimeout(total=request_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    async def post_with_retries(
+            self,
+            url: str,
+            form_factory: Callable[[], aiohttp.FormData],
+            headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[ClientTimeout] = None,
+            max_retries: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        POST a form and return the JSON response, retrying transient failures with exponential backoff.
+
+        Args:
+            url: The URL to post to
+            form_factory: Builds a fresh form for every attempt (aiohttp consumes the form on send)
+            headers: Optional request headers
+            timeout: Optional per-request timeout overriding the session default
+            max_retries: Optional override of the client retry count, use 0 for bodies that
+                         can only be sent once (streams)
+
+        Returns:
+            The decoded JSON body of the response
+        """
+        session = await self.get_session()
+        max_retries = self.max_retries if max_retries is None else max_retries
+
+        attempt = 0
+        while True:
+            try:
+                async with session.post(url, data=form_factory(), headers=headers,
+                                        timeout=timeout or self.timeout) as response:
+                    if response.status == 200:
+                        return await response.json()
+
+                    if response.status not in RETRYABLE_STATUSES or attempt >= max_retries:
+                        raise HttpServiceError(response.status, f"Request to {url} failed with status {response.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= max_retries:
+                    raise HttpServiceError(503, f"Request to {url} failed after {attempt + 1} attempts: {e}")
+
+            delay = self.backoff_factor * (2 ** attempt)
+            attempt += 1
+            print(f"Request to {url} failed, retrying in {delay:.1f}s (attempt {attempt}/{max_retries})")
+            await asyncio.sleep(delay)
+
+
+class FileServiceClient(PooledHttpClient):
+    """Shared client for the external file service."""
+
+    def __init__(self, base_url: str = FILE_SERVICE_URL, password: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+        self.password = password if password is not None else os.getenv("UPLOAD_PASSWORD")
+
+    def download_url(self, unique_filename: str) -> str:
+        return f"{self.base_url}/test/download/{unique_filename}"
+
+    async def upload(self, content: bytes, filename: str, content_type: Optional[str] = None) -> Dict[str, Any]:
+        """Upload file content to the file service and return its JSON response."""
+
+        def build_form() -> aiohttp.FormData:
+            form = aiohttp.FormData()
+            form.add_field('file', content, filename=filename, content_type=content_type)
+            return form
+
+        headers = {'password': self.password} if self.password else {}
+        return await self.post_with_retries(f"{self.base_url}/test/upload", build_form, headers=headers)
+
+
+def to_public_file_url(url: str) -> str:
+    """Rewrite a docker-internal file-service URL to its public form (for URLs shown to users)."""
+    return url.replace(FILE_SERVICE_DOCKER_URL, FILE_SERVICE_URL)
+
+
+def to_internal_file_url(url: str) -> str:
+    """Rewrite a public file-service URL to the internal address, if one is configured."""
+    if FILE_SERVICE_INTERNAL_URL and url.startswith(FILE_SERVICE_URL):
+        return FILE_SERVICE_INTERNAL_URL.rstrip("/") + url[len(FILE_SERVICE_URL):]
+    return url
+
+
+file_service_client: Optional[FileServiceClient] = None
+http_client: Optional[PooledHttpClient] = None
+
+
+def get_file_service_client() -> FileServiceClient:
+    global file_service_client
+    if file_service_client is None:
+        file_service_client = FileServiceClient()
+    return file_service_client
+
+
+def get_http_client() -> PooledHttpClient:
+    """General purpose pooled client, used for audio downloads and transcription requests."""
+    global http_client
+    if http_client is None:
+        http_client = PooledHttpClient()
+    return http_client
+
+
+async def close_http_clients() -> None:
+    """Close every shared client. Call on application shutdown."""
+    for client in (file_service_client, http_client):
+        if client is not None:
+            await client.close()
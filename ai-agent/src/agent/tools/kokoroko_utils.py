@@ -5,8 +5,9 @@ from openai import OpenAI
 from dotenv import load_dotenv
 import time
 import uuid
-from aiohttp import ClientTimeout
-import aiohttp
+import asyncio
+
+from .http_clients import get_file_service_client
 
 load_dotenv()
 api_key = os.getenv("DEEPINFRA_API_KEY")
@@ -14,8 +15,6 @@ api_key = os.getenv("DEEPINFRA_API_KEY")
 client = OpenAI(base_url="https://api.deepinfra.com/v1/openai",
                 api_key=api_key)
 
-FILE_SERVICE_URL = "https://files.nikolanikolovski.com"
-
 
 def text_to_speech(text_input: str, speech_file_path: str):
     with client.audio.speech.with_streaming_response.create(
@@ -79,7 +78,7 @@ class TempFile:
 
 async def upload_file(file):
     """
-    Upload a file to the external file service and save the metadata to the database.
+    Upload a file to the external file service through the shared, pooled client.
 
     Args:
         file: A file-like object with filename, content_type, read(), and seek() methods
@@ -87,34 +86,15 @@ async def upload_file(file):
     try:
         # Generate a unique filename for storage
         unique_filename = generate_unique_filename(file.filename)
-        timeout = ClientTimeout(total=300)
-
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            form = aiohttp.FormData()
-            form.add_field('file',
-                           await file.read(),  # Read the file content here and pass it as bytes
-                           filename=unique_filename,
-                           content_type=file.content_type)
-
-            # Reset the file pointer in case you need to use it again (good practice)
-            await file.seek(0)
-
-            # Add the password header
-            headers = {
-                'password': os.getenv("UPLOAD_PASSWORD")
-            }
+        content = await file.read()
 
-            upload_url = f"{FILE_SERVICE_URL}/test/upload"
-            print(f"Attempting to upload to external service: {upload_url}")  # DEBUG LOG
+        # Reset the file pointer in case you need to use it again (good practice)
+        await file.seek(0)
 
-            async with session.post(upload_url,
-                                    data=form,
-                                    headers=headers) as response:
-                if response.status != 200:
-                    raise Exception(f"Upload failed with status {response.status}")
+        file_service = get_file_service_client()
+        print(f"Attempting to upload to external service: {file_service.base_url}")  # DEBUG LOG
 
-                result = await response.json()
-                return result
+        return await file_service.upload(content, filename=unique_filename, content_type=file.content_type)
 
     except Exception as e:
         raise Exception(f"Error uploading file: {str(e)}")
@@ -135,8 +115,8 @@ async def text_to_speech_upload_file(text_input: str):
         temp_file_path = temp_file.name
 
     try:
-        # Generate speech and save to temporary file
-        text_to_speech(text_input, temp_file_path)
+        # Generate speech and save to temporary file (blocking SDK call, keep it off the event loop)
+        await asyncio.to_thread(text_to_speech, text_input, temp_file_path)
 
         # Create a file-like object for upload
         temp_filename = f"speech_{int(time.time())}.mp3"
@@ -1,15 +1,19 @@
 from dotenv import load_dotenv
 from langchain_core.tools import tool
 import os
+from typing import List, Optional, Tuple
 
-from agent.core.ai_models import gpt5
+from langchain_core.runnables import Runnable
+
+from ..core.ai_models import get_model
+from ..indexing import get_bm25_index
 from agent.bash_client.client import bash_executor
 
 load_dotenv()
 
 
-@tool
-def str_replace(old_str: str, new_str: str, file_path: str) -> str:
+@tool(response_format="content_and_artifact")
+def str_replace(old_str: str, new_str: str, file_path: str) -> Tuple[str, List[str]]:
     """Replaces text in a file with new text.
 
     Notes for using the `str_replace` command:
@@ -29,16 +33,16 @@ def str_replace(old_str: str, new_str: str, file_path: str) -> str:
         with open(file_path, 'r') as f:
             content = f.read()
     except FileNotFoundError:
-        return f"Error: The file '{file_path}' was not found."
+        return f"Error: The file '{file_path}' was not found.", []
 
     # Check for the uniqueness of old_str
     occurrence_count = content.count(old_str)
 
     if occurrence_count == 0:
-        return f"Error: The text to be replaced (old_str) was not found in {file_path}."
+        return f"Error: The text to be replaced (old_str) was not found in {file_path}.", []
 
     if occurrence_count > 1:
-        return f"Error: The text to be replaced (old_str) is not unique in {file_path}. Found {occurrence_count} occurrences."
+        return f"Error: The text to be replaced (old_str) is not unique in {file_path}. Found {occurrence_count} occurrences.", []
 
     # Perform the replacement
     new_content = content.replace(old_str, new_str)
@@ -47,9 +51,9 @@ def str_replace(old_str: str, new_str: str, file_path: str) -> str:
     try:
         with open(file_path, 'w') as f:
             f.write(new_content)
-        return f"Successfully replaced text in {file_path}"
+        return f"Successfully replaced text in {file_path}", [file_path]
     except Exception as e:
-        return f"Error writing to file '{file_path}': {e}"
+        return f"Error writing to file '{file_path}': {e}", []
 
 
 @tool
@@ -69,8 +73,8 @@ def run_bash_command(command: str) -> str:
     return bash_executor.execute(command)
 
 
-@tool
-def create_file(file_path: str, file_text: str) -> str:
+@tool(response_format="content_and_artifact")
+def create_file(file_path: str, file_text: str) -> Tuple[str, List[str]]:
     """Creates a new file with the specified content.
 
     This tool allows you to create new files in the filesystem.
@@ -91,9 +95,9 @@ def create_file(file_path: str, file_text: str) -> str:
 
         with open(file_path, 'w') as f:
             f.write(file_text)
-        return f"File '{file_path}' created successfully."
+        return f"File '{file_path}' created successfully.", [file_path]
     except Exception as e:
-        return f"Error creating file '{file_path}': {e}"
+        return f"Error creating file '{file_path}': {e}", []
 
 
 @tool
@@ -118,6 +122,49 @@ def view_file(file_path: str) -> str:
         return f"Error reading file '{file_path}': {e}"
 
 
-tools = [str_replace, run_bash_command, create_file, view_file]
+@tool
+def search_code(query: str, project_path: str, max_results: int = 10) -> str:
+    """Searches the contents of a project's files and returns the best matching functions or sections.
+
+    Use this instead of running grep through the terminal. Matching is by words and identifier
+    parts (e.g. "upload file" matches `upload_file` and `FileUploader`), ranked with BM25.
+
+    Args:
+        query: Words, identifiers or a short description of the code to find
+        project_path: Root directory of the project to search
+        max_results: Maximum number of results to return
+
+    Returns:
+        One result per line as `path:start-end  title  (score)`, followed by the first lines of each match
+    """
+    try:
+        hits = get_bm25_index(project_path).search(query, limit=max_results)
+    except Exception as e:
+        return f"Error searching '{project_path}': {e}"
+
+    if not hits:
+        return f"No matches for '{query}' in {project_path}."
+
+    results = []
+    for hit in hits:
+        try:
+            with open(hit.path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.read().splitlines()[hit.start_line - 1:min(hit.end_line, hit.start_line + 4)]
+        except OSError:
+            lines = []
+        preview = "\n".join(f"    {line}" for line in lines)
+        results.append(f"{hit.path}:{hit.start_line}-{hit.end_line}  {hit.title}  ({hit.score})\n{preview}")
+    return "\n".join(results)
+
+
+tools = [str_replace, run_bash_command, create_file, view_file, search_code]
 tools_by_name = {tool.name: tool for tool in tools}
-llm_with_tools = gpt5.bind_tools(tools)
+llm_with_tools: Optional[Runnable] = None
+
+
+def get_llm_with_tools() -> Runnable:
+    """The tool-calling agent model, bound on first use."""
+    global llm_with_tools
+    if llm_with_tools is None:
+        llm_with_tools = get_model("gpt5").bind_tools(tools)
+    return llm_with_tools
@@ -0,0 +1,27 @@
+import os
+from typing import Iterable, List, Optional, Set
+
+
+def merge_touched_files(current: Optional[Set[str]], update: Optional[Iterable[str]]) -> Set[str]:
+    """
+    State reducer of the files created or edited by the agent's tools.
+
+    The file tools return the paths they wrote as their tool artifact and the tool node adds
+    them to the state, so they belong to the thread and survive checkpoint resumes. An update
+    of None clears them once they are committed.
+    """
+    if update is None:
+        return set()
+    return set(current or ()) | {os.path.abspath(p) for p in update}
+
+
+def touched_under(paths: Iterable[str], root: str) -> List[str]:
+    """
+    Touched files inside a directory, sorted.
+
+    Commits stage exactly these files instead of everything in the working tree, so
+    unrelated local changes are never committed by the agent.
+    """
+    root = os.path.abspath(root)
+    absolute = {os.path.abspath(p) for p in paths}
+    return sorted(p for p in absolute if os.path.commonpath([root, p]) == root)
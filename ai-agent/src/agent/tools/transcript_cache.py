@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, Callable, Awaitable
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from src.database.collections.transcript import Transcript, EnhancedTranscript
+from src.database.mongo import MongoDBDatabase
+from .audio_chunking import transcribe_audio_bytes, LONG_AUDIO_TRANSCRIPTION
+from .audio_utils import transcribe_audio_source, open_audio_stream
+from .http_clients import get_http_client, to_internal_file_url, to_public_file_url
+
+# "0" keeps the cache in-process only, e.g. for deployments without a Mongo service
+TRANSCRIPT_CACHE_MONGO = os.getenv("TRANSCRIPT_CACHE_MONGO", "1") != "0"
+# How long a Mongo operation may wait for the server, a voice turn should not stall on the cache
+TRANSCRIPT_CACHE_MONGO_TIMEOUT_MS = int(os.getenv("TRANSCRIPT_CACHE_MONGO_TIMEOUT_MS", "1500"))
+# After a Mongo failure the cache stays in-process for this many seconds before trying again
+TRANSCRIPT_CACHE_MONGO_COOLDOWN = float(os.getenv("TRANSCRIPT_CACHE_MONGO_COOLDOWN", "300"))
+
+
+async def _read_all(audio_path: str) -> Tuple[bytes, str]:
+    async with open_audio_stream(audio_path) as (chunks, filename):
+        content = bytearray()
+        async for chunk in chunks:
+            content.extend(chunk)
+        return bytes(content), filename
+
+
+async def _remote_etag(url: str) -> Optional[str]:
+    """Return the ETag of a remote file, or None if the server does not send one."""
+    session = await get_http_client().get_session()
+    try:
+        async with session.head(to_internal_file_url(url), allow_redirects=True) as response:
+            if response.status != 200:
+                return None
+            return response.headers.get("ETag")
+    except Exception as e:
+        print(f"   > HEAD {url} failed, falling back to content hash: {e}")
+        return None
+
+
+class TranscriptCache:
+    """
+    Cache of Whisper transcripts and their per-model enhancements.
+
+    Entries are keyed by `url + ETag` for remote audio that exposes an ETag and by the
+    sha256 of the audio content otherwise. Lookups go through a small in-process LRU
+    first and the Mongo `Transcript` collection second; concurrent requests for the same
+    audio share a single transcription. Mongo errors never fail a chat turn, the cache
+    then simply degrades to the in-process layer. An unreachable Mongo costs one short
+    server-selection timeout, after which the Mongo layer is skipped for a cooldown.
+    """
+
+    def __init__(self, collection_name: str = "Transcript", max_local_entries: int = 256,
+                 use_mongo: bool = TRANSCRIPT_CACHE_MONGO, mongo_cooldown: float = TRANSCRIPT_CACHE_MONGO_COOLDOWN):
+        self.collection_name = collection_name
+        self.max_local_entries = max_local_entries
+        self.use_mongo = use_mongo
+        self.mongo_cooldown = mongo_cooldown
+        self._local: "OrderedDict[str, Transcript]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._mongo: Optional[MongoDBDatabase] = None
+        self._index_ready = False
+        self._mongo_down_until = 0.0
+
+    async def _db(self) -> MongoDBDatabase:
+        if not self.use_mongo:
+            raise ConnectionError("the Mongo layer is disabled")
+        if time.monotonic() < self._mongo_down_until:
+            raise ConnectionError("Mongo was unreachable recently")
+        if self._mongo is None:
+            # An own client, the shared one waits out motor's default server-selection timeout
+            self._mongo = MongoDBDatabase(server_selection_timeout_ms=TRANSCRIPT_CACHE_MONGO_TIMEOUT_MS)
+        if not self._index_ready:
+            await self._mongo.ping()
+            await self._mongo.set_unique_index(self.collection_name, "audio_key")
+            self._index_ready = True
+        return self._mongo
+
+    def _mongo_failed(self, action: str, error: Exception) -> None:
+        now = time.monotonic()
+        if not self.use_mongo or now < self._mongo_down_until:
+            # Mongo was skipped, or failed again while already cooling down
+            return
+        print(f"   > Transcript cache {action} failed, using the in-process cache for "
+              f"{self.mongo_cooldown:.0f}s: {error}")
+        self._mongo_down_until = now + self.mongo_cooldown
+
+    def _remember(self, entry: Transcript) -> None:
+        self._local[entry.audio_key] = entry
+        self._local.move_to_end(entry.audio_key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, audio_key: str) -> Optional[Transcript]:
+        if audio_key in self._local:
+            self._local.move_to_end(audio_key)
+            return self._local[audio_key]
+
+        try:
+            db = await self._db()
+            entry = await db.get_entry_from_col_value("audio_key", audio_key, Transcript, self.collection_name)
+        except Exception as e:
+            self._mongo_failed("lookup", e)
+            return None
+
+        if entry is not None:
+            self._remember(entry)
+        return entry
+
+    async def _store(self, entry: Transcript) -> Transcript:
+        self._remember(entry)
+        try:
+            db = await self._db()
+            entry.id = await db.add_entry(entry, self.collection_name)
+        except DuplicateKeyError:
+            # Another worker stored the same audio first, its entry is equivalent
+            pass
+        except Exception as e:
+            self._mongo_failed("write", e)
+        return entry
+
+    async def _resolve(self, audio_path: str) -> Tuple[str, Optional[bytes], Optional[str]]:
+        """
+        Compute the cache key of an audio source.
+
+        Returns:
+            A tuple of (key, audio content if it had to be read to hash it, filename)
+        """
+        if audio_path.startswith(('http://', 'https://')):
+            etag = await _remote_etag(audio_path)
+            if etag:
+                return f"url:{to_public_file_url(audio_path)}#etag:{etag}", None, None
+
+        content, filename = await _read_all(audio_path)
+        return f"sha256:{hashlib.sha256(content).hexdigest()}", content, filename
+
+    async def get_or_transcribe(self, audio_path: str) -> Transcript:
+        """Return the cached transcript of an audio source, transcribing it on a miss."""
+        audio_key, content, filename = await self._resolve(audio_path)
+
+        entry = await self.get(audio_key)
+        if entry is not None:
+            print(f"   > Transcript cache hit for {audio_key}")
+            return entry
+
+        if audio_key in self._inflight:
+            return await asyncio.shield(self._inflight[audio_key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[audio_key] = future
+        try:
+            if content is None and LONG_AUDIO_TRANSCRIPTION:
+                content, filename = await _read_all(audio_path)
+
+            if content is not None:
+                transcript = await transcribe_audio_bytes(content, filename=filename)
+            else:
+                transcript = await transcribe_audio_source(audio_path)
+            if transcript is None:
+                raise ConnectionError(f"Failed to transcribe audio from {audio_path}")
+
+            entry = await self._store(Transcript(
+                audio_key=audio_key,
+                raw_transcript=transcript,
+                content_hash=audio_key[len("sha256:"):] if audio_key.startswith("sha256:") else None,
+            ))
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting on the future, mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(audio_key, None)
+
+    async def get_or_enhance(
+            self,
+            entry: Transcript,
+            model: str,
+            enhance: Callable[[str], Awaitable[str]],
+    ) -> str:
+        """Return the enhancement of a transcript for a model, running `enhance` on a miss."""
+        cached = entry.enhanced_for(model)
+        if cached is not None:
+            print(f"   > Enhanced transcript cache hit for {model}")
+            return cached
+
+        enhanced_text = await enhance(entry.raw_transcript)
+        await self.put_enhanced(entry, model, enhanced_text)
+        return enhanced_text
+
+    async def put_enhanced(self, entry: Transcript, model: str, enhanced_text: str) -> None:
+        entry.enhanced = [e for e in entry.enhanced if e.model != model]
+        entry.enhanced.append(EnhancedTranscript(model=model, text=enhanced_text))
+        self._remember(entry)
+
+        try:
+            db = await self._db()
+            stored = await db.get_entry_from_col_value("audio_key", entry.audio_key, Transcript, self.collection_name)
+            if stored is None:
+                return
+            # Pull then push, so enhancements stored concurrently for other models are kept
+            stored_id = ObjectId(stored.id)
+            await db.atomic_update(stored_id, {"$pull": {"enhanced": {"model": model}}},
+                                   Transcript, self.collection_name)
+            await db.atomic_update(stored_id, {"$push": {"enhanced": {"model": model, "text": enhanced_text}}},
+                                   Transcript, self.collection_name)
+        except Exception as e:
+            self._mongo_failed("write", e)
+
+
+transcript_cache: Optional[TranscriptCache] = None
+
+
+def get_transcript_cache() -> TranscriptCache:
+    global transcript_cache
+    if transcript_cache is None:
+        transcript_cache = TranscriptCache()
+    return transcript_cache
@@ -0,0 +1,140 @@
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from ..tools.diff_utils import generate_diff
+
+# Commits up to this size get a templated message without an LLM call
+SIMPLE_COMMIT_MAX_FILES = int(os.getenv("SIMPLE_COMMIT_MAX_FILES", "3"))
+SIMPLE_COMMIT_MAX_LINES = int(os.getenv("SIMPLE_COMMIT_MAX_LINES", "20"))
+# Bounds of the diff summary sent to the LLM for larger commits
+COMMIT_DIFF_MAX_CHARS = int(os.getenv("COMMIT_DIFF_MAX_CHARS", "6000"))
+HUNK_MAX_LINES = 12
+SUBJECT_MAX_CHARS = 72
+
+
+@dataclass
+class FileChange:
+    path: str
+    status: str  # added, modified or deleted
+    added: int = 0
+    removed: int = 0
+    hunks: List[str] = field(default_factory=list)
+
+    @property
+    def changed_lines(self) -> int:
+        return self.added + self.removed
+
+
+def _lines(text: Optional[str]) -> List[str]:
+    return text.splitlines(keepends=True) if text else []
+
+
+def summarize_changes(before: Dict[str, Optional[str]], after: Dict[str, Optional[str]]) -> List[FileChange]:
+    """
+    Per-file line counts and hunks between two versions of a set of files.
+
+    Args:
+        before: Path to content at the last commit, None for files that did not exist
+        after: Path to current content, None for deleted files
+
+    Returns:
+        The changed files, sorted by path
+    """
+    changes = []
+    for path in sorted(set(before) | set(after)):
+        old, new = before.get(path), after.get(path)
+        if old == new:
+            continue
+        status = "added" if old is None else "deleted" if new is None else "modified"
+
+        diff = generate_diff(_lines(old), _lines(new), f"a/{path}", f"b/{path}")
+        change = FileChange(path, status)
+        for line in diff.splitlines()[2:]:
+            if line.startswith("@@"):
+                change.hunks.append(line)
+            elif change.hunks:
+                change.hunks[-1] += "\n" + line
+                if line.startswith("+"):
+                    change.added += 1
+                elif line.startswith("-"):
+                    change.removed += 1
+        changes.append(change)
+    return changes
+
+
+def diffstat(changes: List[FileChange]) -> str:
+    """`git diff --stat` style summary."""
+    lines = [f" {c.path} | {c.changed_lines} (+{c.added} -{c.removed}){' new' if c.status == 'added' else ''}"
+             f"{' deleted' if c.status == 'deleted' else ''}" for c in changes]
+    lines.append(f" {len(changes)} files changed, {sum(c.added for c in changes)} insertions(+), "
+                 f"{sum(c.removed for c in changes)} deletions(-)")
+    return "\n".join(lines)
+
+
+def compact_diff(changes: List[FileChange], max_chars: int = COMMIT_DIFF_MAX_CHARS) -> str:
+    """
+    Diffstat followed by the hunks of every file, each hunk cut to HUNK_MAX_LINES lines and
+    the whole summary to `max_chars`. Big files are listed last so small, descriptive changes
+    are kept when the budget runs out.
+    """
+    parts = [diffstat(changes)]
+    used = len(parts[0])
+    for change in sorted(changes, key=lambda c: c.changed_lines):
+        for hunk in change.hunks:
+            lines = hunk.split("\n")
+            if len(lines) > HUNK_MAX_LINES + 1:
+                lines = lines[:HUNK_MAX_LINES + 1] + [f"... {len(lines) - HUNK_MAX_LINES - 1} more lines"]
+            text = f"\n{change.path}\n" + "\n".join(lines)
+            if used + len(text) > max_chars:
+                parts.append("\n... diff truncated")
+                return "".join(parts)
+            parts.append(text)
+            used += len(text)
+    return "".join(parts)
+
+
+def _names(changes: List[FileChange]) -> str:
+    names = [os.path.basename(c.path) for c in changes]
+    return names[0] if len(names) == 1 else ", ".join(names[:-1]) + f" and {names[-1]}"
+
+
+def template_message(changes: List[FileChange]) -> Optional[str]:
+    """
+    Commit message for simple commits, without an LLM: few files and few changed lines,
+    or only added or only deleted files. Returns None for anything larger.
+    """
+    if not changes:
+        return None
+    statuses = {c.status for c in changes}
+    small = len(changes) <= SIMPLE_COMMIT_MAX_FILES and sum(c.changed_lines for c in changes) <= SIMPLE_COMMIT_MAX_LINES
+    if not small and statuses not in ({"added"}, {"deleted"}):
+        return None
+
+    verb = {"added": "Add", "deleted": "Remove", "modified": "Update"}
+    if len(statuses) == 1:
+        subject = f"{verb[statuses.pop()]} {_names(changes)}"
+    else:
+        subject = "; ".join(f"{verb[status]} {_names([c for c in changes if c.status == status])}"
+                            for status in ("added", "modified", "deleted") if status in statuses)
+
+    if len(subject) > SUBJECT_MAX_CHARS:
+        directory = os.path.commonpath([c.path for c in changes]) or "the project"
+        subject = f"Update {len(changes)} files in {directory}"
+    return subject
+
+
+def commit_message(changes: List[FileChange], user_task: str, generate: Callable[[str, str], str]) -> str:
+    """
+    Template simple commits, ask the LLM for the rest.
+
+    Args:
+        changes: The changes being committed
+        user_task: The task the changes were made for
+        generate: Calls the LLM with the task and the bounded diff summary
+    """
+    templated = template_message(changes)
+    if templated is not None:
+        print(f"Templated commit message: {templated}")
+        return templated
+    return generate(user_task, compact_diff(changes))
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+from .commit_summary import FileChange, summarize_changes
+
+GIT_TIMEOUT_SECONDS = float(os.getenv("GIT_TIMEOUT_SECONDS", "120"))
+
+
+@dataclass
+class GitResult:
+    ok: bool
+    stage: str  # Last stage that ran: check, add, commit, push
+    message: str
+    commit: Optional[str] = None
+    files: Optional[List[str]] = None
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class GitService:
+    """
+    Non-blocking git operations on one repository.
+
+    Every command runs through `asyncio.create_subprocess_exec`, so a slow `git push` waits
+    on the event loop instead of holding a worker thread.
+
+    Args:
+        repo_path: Any path inside the repository
+    """
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+
+    async def _git(self, *args: str) -> Tuple[int, str, str]:
+        process = await asyncio.create_subprocess_exec(
+            "git", *args,
+            cwd=self.repo_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=GIT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return 124, "", f"git {args[0]} timed out after {GIT_TIMEOUT_SECONDS:.0f}s"
+        return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+    async def top_level(self) -> Optional[str]:
+        """Root of the repository, or None if the path is not inside one."""
+        if not os.path.isdir(self.repo_path):
+            return None
+        code, stdout, _ = await self._git("rev-parse", "--show-toplevel")
+        return stdout.strip() if code == 0 else None
+
+    @staticmethod
+    def _relative(root: str, file_paths: List[str]) -> List[str]:
+        relative = [os.path.relpath(os.path.realpath(p), os.path.realpath(root)) for p in file_paths]
+        return [p for p in relative if not p.startswith("..")]
+
+    async def _head_version(self, relative_path: str) -> Optional[str]:
+        code, stdout, _ = await self._git("show", f"HEAD:{relative_path}")
+        return stdout if code == 0 else None
+
+    async def pending_changes(self, file_paths: List[str]) -> List[FileChange]:
+        """Changes of the given files against the last commit, with line counts and hunks."""
+        root = await self.top_level()
+        if root is None:
+            return []
+        relative = self._relative(root, file_paths)
+        before = dict(zip(relative, await asyncio.gather(*(self._head_version(p) for p in relative))))
+
+        after: Dict[str, Optional[str]] = {}
+        for path in relative:
+            try:
+                with open(os.path.join(root, path), "r", encoding="utf-8", errors="replace") as f:
+                    after[path] = f.read()
+            except FileNotFoundError:
+                after[path] = None
+        return summarize_changes(before, after)
+
+    async def commit(self, file_paths: List[str], message: str) -> GitResult:
+        """
+        Stage the given files (including deletions) and commit them.
+
+        Files outside the repository are ignored. Nothing else in the working tree is staged.
+        """
+        started = time.perf_counter()
+        root = await self.top_level()
+        if root is None:
+            return GitResult(False, "check", f"'{self.repo_path}' is not a Git repository")
+
+        relative = self._relative(root, file_paths)
+        if not relative:
+            return GitResult(True, "add", "No files were changed by the agent, nothing to commit", files=[])
+
+        code, _, stderr = await self._git("add", "-A", "--", *relative)
+        if code != 0:
+            return GitResult(False, "add", f"git add failed: {stderr.strip()}", files=relative)
+
+        code, _, stderr = await self._git("diff", "--cached", "--quiet", "--", *relative)
+        if code == 0:
+            return GitResult(True, "add", "No changes to commit", files=relative,
+                             seconds=time.perf_counter() - started)
+        if code != 1:
+            return GitResult(False, "add", f"Error checking staged changes: {stderr.strip()}", files=relative)
+
+        # Commit only these paths, even if something else was staged by hand
+        code, _, stderr = await self._git("commit", "-m", message, "--", *relative)
+        if code != 0:
+            return GitResult(False, "commit", f"Commit failed: {stderr.strip()}", files=relative)
+
+        _, sha, _ = await self._git("rev-parse", "HEAD")
+        return GitResult(True, "commit", "Committed", commit=sha.strip(), files=relative,
+                         seconds=time.perf_counter() - started)
+
+    async def push(self) -> GitResult:
+        started = time.perf_counter()
+        code, _, stderr = await self._git("push")
+        seconds = time.perf_counter() - started
+        if code == 0:
+            return GitResult(True, "push", "Pushed", seconds=seconds)
+        if "upstream branch" in stderr:
+            return GitResult(False, "push", "No upstream branch configured, run "
+                                            "`git push -u origin $(git branch --show)`", seconds=seconds)
+        return GitResult(False, "push", f"Push failed: {stderr.strip()}", seconds=seconds)
+
+
+# Pushes running in the background, by commit sha
+background_pushes: Dict[str, "asyncio.Task[GitResult]"] = {}
+
+
+def start_background_push(service: GitService, commit: str) -> None:
+    """Push in the background; `wait_for_push` collects the result."""
+    background_pushes[commit] = asyncio.get_running_loop().create_task(service.push())
+
+
+async def wait_for_push(commit: str, timeout: Optional[float] = None) -> Optional[GitResult]:
+    """
+    Result of a background push, or None if no push was started for the commit.
+
+    A push still running after `timeout` keeps running and is reported as pending.
+    """
+    task = background_pushes.get(commit)
+    if task is None:
+        return None
+    try:
+        result = await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+    except asyncio.TimeoutError:
+        return GitResult(False, "push", "Push still running", commit=commit)
+    except Exception as e:
+        result = GitResult(False, "push", f"Push failed: {e}")
+    background_pushes.pop(commit, None)
+    result.commit = commit
+    return result
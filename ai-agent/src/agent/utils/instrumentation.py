@@ -0,0 +1,303 @@
+"""Per-node latency and token accounting for the LangGraph graphs.
+
+`GraphInstrumentation` is a LangChain callback handler. Attached to a compiled graph, it sees
+every node, LLM call and tool call of a run through the `langgraph_node` metadata LangGraph
+adds to child runs, and aggregates:
+
+- wall time per node
+- LLM latency, input/output tokens and bytes of prompt (context) per node
+- tool time per node
+
+When the root run ends, the report is written as `run_report.json` with the run's artefacts
+and, if `prometheus_client` is installed, exported as Prometheus metrics.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from ..persistence import get_artefact_store, run_scope
+
+try:
+    import prometheus_client
+except ImportError:  # Metrics are optional, the JSON report is always written
+    prometheus_client = None
+
+# Port of the Prometheus endpoint, 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Number of finished run reports kept in memory for `recent_reports`
+RECENT_REPORTS = 20
+
+
+@dataclass
+class NodeStats:
+    calls: int = 0
+    wall_seconds: float = 0.0
+    llm_calls: int = 0
+    llm_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    context_bytes: int = 0
+    tool_calls: int = 0
+    tool_seconds: float = 0.0
+    errors: int = 0
+
+
+@dataclass
+class RunReport:
+    run_id: str
+    thread_id: str
+    graph: str
+    started_at: float
+    seconds: float = 0.0
+    error: Optional[str] = None
+    nodes: Dict[str, NodeStats] = field(default_factory=dict)
+
+    def node(self, name: str) -> NodeStats:
+        if name not in self.nodes:
+            self.nodes[name] = NodeStats()
+        return self.nodes[name]
+
+    def totals(self) -> NodeStats:
+        total = NodeStats()
+        for stats in self.nodes.values():
+            for key, value in asdict(stats).items():
+                setattr(total, key, getattr(total, key) + value)
+        # Nested nodes (subgraphs) overlap with their parent node, so wall time is the run's
+        total.wall_seconds = self.seconds
+        return total
+
+    def to_dict(self) -> Dict[str, Any]:
+        nodes = sorted(self.nodes.items(), key=lambda item: item[1].wall_seconds, reverse=True)
+        return {
+            "run_id": self.run_id,
+            "thread_id": self.thread_id,
+            "graph": self.graph,
+            "started_at": self.started_at,
+            "seconds": round(self.seconds, 3),
+            "error": self.error,
+            "totals": asdict(self.totals()),
+            "nodes": {name: asdict(stats) for name, stats in nodes},
+        }
+
+
+class _Metrics:
+    def __init__(self):
+        labels = ["graph", "node"]
+        self.node_seconds = prometheus_client.Histogram(
+            "agent_node_seconds", "Wall time of graph nodes", labels)
+        self.llm_seconds = prometheus_client.Histogram(
+            "agent_llm_seconds", "Latency of LLM calls", labels)
+        self.tool_seconds = prometheus_client.Histogram(
+            "agent_tool_seconds", "Time spent in tool calls", labels)
+        self.tokens = prometheus_client.Counter(
+            "agent_llm_tokens", "LLM tokens", labels + ["direction"])
+        self.context_bytes = prometheus_client.Counter(
+            "agent_llm_context_bytes", "Bytes of prompt sent to LLMs", labels)
+        self.run_seconds = prometheus_client.Histogram(
+            "agent_run_seconds", "Wall time of graph runs", ["graph"])
+
+
+metrics: Optional[_Metrics] = None
+
+
+def get_metrics() -> Optional[_Metrics]:
+    """Prometheus collectors, registered once per process, or None without prometheus_client."""
+    global metrics
+    if metrics is None and prometheus_client is not None:
+        metrics = _Metrics()
+    return metrics
+
+
+def _usage(response) -> Dict[str, int]:
+    """Token usage of an LLM result, from the message usage metadata or the provider output."""
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            input_tokens += usage.get("input_tokens", 0)
+            output_tokens += usage.get("output_tokens", 0)
+    if not input_tokens and not output_tokens:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+    return {"input": input_tokens or 0, "output": output_tokens or 0}
+
+
+def _size(content: Any) -> int:
+    if isinstance(content, str):
+        return len(content.encode("utf-8"))
+    if isinstance(content, list):
+        return sum(_size(part.get("text", "") if isinstance(part, dict) else part) for part in content)
+    return 0
+
+
+class GraphInstrumentation(BaseCallbackHandler):
+    """
+    Callback handler aggregating node, LLM and tool timings of graph runs.
+
+    One handler serves all runs: events are attributed to the root run they belong to
+    through their parent run ids, and each root run gets its own `RunReport`.
+    """
+
+    # Called in the thread of the event, so timings are not delayed by the callback executor
+    run_inline = True
+
+    def __init__(self, write_reports: bool = True):
+        self.write_reports = write_reports
+        self.recent: List[RunReport] = []
+        self._reports: Dict[UUID, RunReport] = {}
+        self._roots: Dict[UUID, UUID] = {}
+        # Start time and node of open node, LLM and tool runs
+        self._open: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+        self._metrics = get_metrics()
+
+    def _start(self, kind: str, run_id: UUID, parent_run_id: Optional[UUID], metadata: Optional[dict],
+               context_bytes: int = 0) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        with self._lock:
+            root = self._roots.get(parent_run_id) if parent_run_id else None
+            if root is None or root not in self._reports:
+                return
+            self._roots[run_id] = root
+            if node is None or kind == "chain":
+                return
+            self._open[run_id] = (kind, node, time.perf_counter())
+            if kind != "llm":
+                return
+            report = self._reports[root]
+            report.node(node).context_bytes += context_bytes
+
+        if self._metrics is not None:
+            self._metrics.context_bytes.labels(graph=report.graph, node=node).inc(context_bytes)
+
+    def _end(self, run_id: UUID, error: bool = False, usage: Optional[Dict[str, int]] = None) -> None:
+        with self._lock:
+            root = self._roots.pop(run_id, None)
+            opened = self._open.pop(run_id, None)
+            if root is None or opened is None or root not in self._reports:
+                return
+            kind, node, started = opened
+            seconds = time.perf_counter() - started
+            report = self._reports[root]
+            stats = report.node(node)
+            stats.errors += int(error)
+            if kind == "node":
+                stats.calls += 1
+                stats.wall_seconds += seconds
+            elif kind == "llm":
+                stats.llm_calls += 1
+                stats.llm_seconds += seconds
+                stats.input_tokens += (usage or {}).get("input", 0)
+                stats.output_tokens += (usage or {}).get("output", 0)
+            elif kind == "tool":
+                stats.tool_calls += 1
+                stats.tool_seconds += seconds
+
+        if self._metrics is not None:
+            labels = {"graph": report.graph, "node": node}
+            {"node": self._metrics.node_seconds, "llm": self._metrics.llm_seconds,
+             "tool": self._metrics.tool_seconds}[kind].labels(**labels).observe(seconds)
+            if kind == "llm" and usage:
+                self._metrics.tokens.labels(direction="input", **labels).inc(usage["input"])
+                self._metrics.tokens.labels(direction="output", **labels).inc(usage["output"])
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None,
+                       **kwargs) -> None:
+        if parent_run_id is None:
+            thread_id, scoped_run_id = run_scope({"metadata": metadata})
+            with self._lock:
+                self._reports[run_id] = RunReport(
+                    run_id=scoped_run_id if scoped_run_id != "latest" else str(run_id), thread_id=thread_id,
+                    graph=kwargs.get("name") or "graph", started_at=time.time(),
+                )
+                self._roots[run_id] = run_id
+                self._open[run_id] = ("run", None, time.perf_counter())
+            return
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node itself, not the runnables inside it (routers, subgraph internals)
+        kind = "node" if node is not None and kwargs.get("name") == node else "chain"
+        self._start(kind, run_id, parent_run_id, metadata)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        if run_id in self._reports:
+            self._finish_run(run_id)
+        else:
+            self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        if run_id in self._reports:
+            self._finish_run(run_id, error)
+        else:
+            self._end(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None,
+                            **kwargs) -> None:
+        context_bytes = sum(_size(message.content) for batch in messages for message in batch)
+        self._start("llm", run_id, parent_run_id, metadata, context_bytes)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs) -> None:
+        self._start("llm", run_id, parent_run_id, metadata, sum(_size(prompt) for prompt in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        self._end(run_id, usage=_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, metadata=None, **kwargs) -> None:
+        self._start("tool", run_id, parent_run_id, metadata)
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, error=True)
+
+    def _finish_run(self, run_id: UUID, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            report = self._reports.pop(run_id)
+            _, _, started = self._open.pop(run_id)
+            # Forget the run's children that never reported an end
+            self._roots = {child: root for child, root in self._roots.items() if root != run_id}
+            report.seconds = time.perf_counter() - started
+            report.error = str(error) if error is not None else None
+            self.recent = (self.recent + [report])[-RECENT_REPORTS:]
+
+        if self._metrics is not None:
+            self._metrics.run_seconds.labels(graph=report.graph).observe(report.seconds)
+        summary = ", ".join(f"{name} {stats.wall_seconds:.2f}s" for name, stats in
+                            sorted(report.nodes.items(), key=lambda item: -item[1].wall_seconds)[:3])
+        print(f"Run {report.run_id} took {report.seconds:.2f}s (slowest nodes: {summary or 'none'})")
+        if self.write_reports:
+            get_artefact_store().write(report.thread_id, report.run_id, "run_report.json",
+                                       json.dumps(report.to_dict(), indent=2))
+
+    def recent_reports(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [report.to_dict() for report in self.recent]
+
+
+instrumentation: Optional[GraphInstrumentation] = None
+
+
+def get_instrumentation() -> GraphInstrumentation:
+    global instrumentation
+    if instrumentation is None:
+        instrumentation = GraphInstrumentation()
+        if METRICS_PORT and prometheus_client is not None:
+            prometheus_client.start_http_server(METRICS_PORT)
+            print(f"Serving Prometheus metrics on port {METRICS_PORT}")
+    return instrumentation
+
+
+def instrumented(compiled_graph):
+    """Attach the shared instrumentation handler to a compiled graph."""
+    return compiled_graph.with_config(callbacks=[get_instrumentation()])
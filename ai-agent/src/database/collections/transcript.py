@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional, List
+
+from pydantic import BaseModel, Field
+
+from src.database.mongo import MongoEntry
+
+
+class EnhancedTranscript(BaseModel):
+    model: str
+    text: str
+
+
+class Transcript(MongoEntry):
+    audio_key: str
+    raw_transcript: str
+    content_hash: Optional[str] = None
+    enhanced: List[EnhancedTranscript] = Field(default_factory=list)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    def enhanced_for(self, model: str) -> Optional[str]:
+        for entry in self.enhanced:
+            if entry.model == model:
+                return entry.text
+        return None
@@ -0,0 +1 @@
+"""Stand-in services and fixtures shared by tests and benchmarks."""
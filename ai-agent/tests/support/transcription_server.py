@@ -0,0 +1,118 @@
+"""Local stand-in for the Whisper transcription endpoint.
+
+The server cannot understand speech, so tests use synthetic "marker" audio instead: every
+word is a stretch of constant amplitude `MARKER_BASE + index`, separated by silence. The
+server "transcribes" a WAV upload by reading those amplitudes back as `word<index>`, which
+makes chunk boundaries, overlaps and stitching fully deterministic.
+"""
+
+import asyncio
+import io
+import itertools
+import wave
+from array import array
+from typing import Tuple
+
+from aiohttp import web
+
+MARKER_BASE = 1000
+
+
+def make_marker_wav(seconds: float, sample_rate: int = 8000, word_seconds: float = 0.4,
+                    gap_seconds: float = 0.2) -> Tuple[bytes, str]:
+    """Build marker audio of the given length.
+
+    Returns:
+        A tuple of (WAV bytes, the transcript the stand-in server produces for the whole file)
+    """
+    samples = array("h")
+    words = []
+    total = int(seconds * sample_rate)
+    for index in itertools.count():
+        if len(samples) >= total:
+            break
+        samples.extend([MARKER_BASE + index] * int(word_seconds * sample_rate))
+        samples.extend([0] * int(gap_seconds * sample_rate))
+        words.append(f"word{index}")
+    del samples[total:]
+    # Drop a trailing word that was cut to (almost) nothing
+    last_word_samples = len(samples) - (len(words) - 1) * int((word_seconds + gap_seconds) * sample_rate)
+    if last_word_samples < sample_rate * 0.01:
+        words.pop()
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.tobytes())
+    return buffer.getvalue(), " ".join(words)
+
+
+def read_markers(content: bytes) -> str:
+    with wave.open(io.BytesIO(content), "rb") as wav_file:
+        sample_rate = wav_file.getframerate()
+        samples = array("h")
+        samples.frombytes(wav_file.readframes(wav_file.getnframes()))
+
+    words = []
+    for value, run in itertools.groupby(samples):
+        if value >= MARKER_BASE and len(list(run)) >= sample_rate * 0.01:
+            words.append(f"word{value - MARKER_BASE}")
+    return " ".join(words)
+
+
+class FakeTranscriptionServer:
+    """aiohttp server mimicking `POST /v1/audio/transcriptions`.
+
+    Args:
+        base_latency: Seconds every request takes regardless of size
+        seconds_per_audio_second: Additional processing seconds per second of uploaded audio
+    """
+
+    def __init__(self, base_latency: float = 0.0, seconds_per_audio_second: float = 0.0):
+        self.base_latency = base_latency
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner = None
+        self.url = None
+
+    async def _transcribe(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            form = await request.post()
+            content = form["file"].file.read()
+            with wave.open(io.BytesIO(content), "rb") as wav_file:
+                duration = wav_file.getnframes() / wav_file.getframerate()
+
+            await asyncio.sleep(self.base_latency + self.seconds_per_audio_second * duration)
+            return web.json_response({"text": read_markers(content)})
+        finally:
+            self.in_flight -= 1
+
+    async def start(self) -> str:
+        app = web.Application(client_max_size=1024 ** 3)
+        app.router.add_post("/v1/audio/transcriptions", self._transcribe)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/v1/audio/transcriptions"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeTranscriptionServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
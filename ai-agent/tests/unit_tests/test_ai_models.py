@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+import pytest
+
+from agent.core.ai_models import ModelRegistry
+
+
+def test_importing_ai_models_imports_no_provider_sdk() -> None:
+    providers = ["langchain_groq", "langchain_together", "langchain_google_genai", "langchain_openai", "langchain.chains"]
+    code = "import sys, agent.core.ai_models; print(' '.join(m for m in %r if m in sys.modules))" % providers
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == ""
+
+
+def test_registry_builds_each_model_once() -> None:
+    built = []
+    models = ModelRegistry()
+    models.register("fake", lambda: built.append(1) or object())
+
+    assert models.get("fake") is models.get("fake")
+    assert built == [1]
+
+
+def test_registry_override_and_reset() -> None:
+    models = ModelRegistry()
+    models.register("fake", lambda: "real")
+    models.override("fake", "stand-in")
+    assert models.get("fake") == "stand-in"
+
+    models.reset("fake")
+    assert models.get("fake") == "real"
+
+    with pytest.raises(KeyError):
+        models.get("missing")
+
+
+class StructuredFake:
+    def __init__(self):
+        self.wrapped = []
+
+    def with_structured_output(self, schema):
+        self.wrapped.append(schema)
+        return (self, schema)
+
+
+def test_structured_output_is_built_once_per_model_and_schema() -> None:
+    models = ModelRegistry()
+    model = StructuredFake()
+    models.register("fake", lambda: model)
+
+    assert models.structured("fake", int) is models.structured("fake", int)
+    assert models.structured("fake", str) == (model, str)
+    assert model.wrapped == [int, str]
+
+    replacement = StructuredFake()
+    models.override("fake", replacement)
+    assert models.structured("fake", int) == (replacement, int)
+    assert replacement.wrapped == [int]
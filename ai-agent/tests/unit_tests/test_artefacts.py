@@ -0,0 +1,66 @@
+import os
+import time
+
+from agent.persistence.artefacts import ArtefactStore, run_scope
+
+
+def test_runs_do_not_overwrite_each_other(tmp_path):
+    store = ArtefactStore(str(tmp_path))
+
+    store.write("thread", "run-1", "answer.md", "first")
+    store.write("thread", "run-2", "answer.md", "second")
+    store.flush()
+
+    assert store.read("thread", "run-1", "answer.md") == "first"
+    assert store.read("thread", "run-2", "answer.md") == "second"
+    assert store.read("thread", "run-3", "answer.md") is None
+
+
+def test_large_artefacts_are_compressed(tmp_path):
+    store = ArtefactStore(str(tmp_path), compress_min_chars=100)
+    context = "line of context\n" * 1000
+
+    path = store.write("thread", "run", "context.txt", context).result()
+
+    assert path.endswith("context.txt.gz")
+    assert os.path.getsize(path) < len(context) / 10
+    assert store.read("thread", "run", "context.txt") == context
+
+    store.write("thread", "run", "context.txt", "small").result()
+    assert store.read("thread", "run", "context.txt") == "small"
+    assert not os.path.exists(path)
+
+
+def test_cleanup_applies_retention_and_run_limit(tmp_path):
+    store = ArtefactStore(str(tmp_path), retention_days=1, max_runs_per_thread=2)
+    for i in range(4):
+        store.write("thread", f"run-{i}", "answer.md", str(i))
+    store.flush()
+    for i in range(4):
+        stamp = time.time() - (3 - i) * 60
+        os.utime(store.run_dir("thread", f"run-{i}"), (stamp, stamp))
+
+    assert store.cleanup() == {"removed": 2, "kept": 2}
+    assert sorted(os.listdir(tmp_path / "thread")) == ["run-2", "run-3"]
+
+    assert store.cleanup(now=time.time() + 2 * 86400) == {"removed": 2, "kept": 0}
+    assert os.listdir(tmp_path) == []
+
+
+def test_cleanup_repeats_with_later_writes(tmp_path):
+    store = ArtefactStore(str(tmp_path), max_runs_per_thread=1, cleanup_interval=0)
+    for i in range(3):
+        store.write("thread", f"run-{i}", "answer.md", str(i))
+        store.flush()
+        stamp = time.time() - (3 - i) * 60
+        os.utime(store.run_dir("thread", f"run-{i}"), (stamp, stamp))
+    store.write("thread", "run-3", "answer.md", "3")
+    store.flush()
+
+    assert sorted(os.listdir(tmp_path / "thread")) == ["run-3"]
+
+
+def test_run_scope_from_config():
+    assert run_scope({"configurable": {"thread_id": "t", "run_id": "r"}}) == ("t", "r")
+    assert run_scope({"metadata": {"thread_id": "t"}}) == ("t", "latest")
+    assert run_scope(None) == ("default", "latest")
@@ -0,0 +1,50 @@
+import pytest
+
+from agent.tools.audio_chunking import merge_transcripts, plan_windows, transcribe_long_audio
+from agent.tools.audio_utils import atranscribe_audio
+from tests.support.transcription_server import FakeTranscriptionServer, make_marker_wav
+
+
+def test_plan_windows_overlaps_fixed_windows() -> None:
+    assert plan_windows(10, window_seconds=4, overlap_seconds=1) == [(0.0, 4.0), (3.0, 7.0), (6.0, 10)]
+
+
+def test_plan_windows_cuts_in_silence_without_overlap() -> None:
+    windows = plan_windows(10, window_seconds=4, overlap_seconds=1, silences=[(3.0, 3.4), (6.5, 7.0)])
+    assert windows == [(0.0, 3.2), (3.2, 6.75), (6.75, 10)]
+
+
+def test_plan_windows_short_audio_is_single_window() -> None:
+    assert plan_windows(30, window_seconds=60) == [(0.0, 30)]
+
+
+def test_merge_transcripts_removes_overlap() -> None:
+    assert merge_transcripts(["a b c d e", "d e f g", "f g h"]) == "a b c d e f g h"
+    assert merge_transcripts(["Hello there my friend.", "my friend, how are you"]) == "Hello there my friend. how are you"
+
+
+def test_merge_transcripts_keeps_unrelated_chunks() -> None:
+    assert merge_transcripts(["one two", "three four"]) == "one two three four"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("split_on_silence", [False, True])
+async def test_transcribe_long_audio_against_stand_in_server(split_on_silence: bool) -> None:
+    audio, expected = make_marker_wav(95)
+
+    async with FakeTranscriptionServer(base_latency=0.01) as server:
+        async def transcribe(chunk: bytes, filename: str):
+            return await atranscribe_audio(chunk, filename=filename, url=server.url)
+
+        transcript = await transcribe_long_audio(
+            audio,
+            window_seconds=10,
+            overlap_seconds=2,
+            max_concurrency=3,
+            split_on_silence=split_on_silence,
+            transcribe=transcribe,
+        )
+
+    assert transcript == expected
+    assert server.requests > 1
+    assert 1 < server.max_in_flight <= 3
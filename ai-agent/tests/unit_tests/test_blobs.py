@@ -0,0 +1,68 @@
+import os
+import time
+
+import pytest
+
+from agent.persistence.blobs import BlobMissingError, BlobStore, INLINE_MAX_CHARS, is_blob_ref
+
+LARGE = "x = 1\n" * INLINE_MAX_CHARS
+
+
+def blob_files(directory):
+    return [name for _, _, names in os.walk(directory) for name in names]
+
+
+def test_large_text_becomes_a_reference_and_resolves_back(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    ref = store.put(LARGE)
+
+    assert is_blob_ref(ref)
+    assert len(ref) < 100
+    assert store.get(ref) == LARGE
+    # A fresh store (new process) reads the blob from disk
+    assert BlobStore(str(tmp_path)).get(ref) == LARGE
+
+
+def test_same_content_is_written_once(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    assert store.put(LARGE) == store.put(LARGE)
+    assert len(blob_files(tmp_path)) == 1
+
+    store.put(LARGE + "y = 2\n")
+    assert len(blob_files(tmp_path)) == 2
+
+
+def test_short_and_plain_values_pass_through(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    assert store.put("short") == "short"
+    assert store.put(None) == ""
+    assert store.get("raw context passed by a caller") == "raw context passed by a caller"
+    assert store.get(None) == ""
+    assert store.put(store.put(LARGE)) == store.put(LARGE)
+    assert len(blob_files(tmp_path)) == 1
+
+
+def test_missing_blob_raises(tmp_path):
+    with pytest.raises(BlobMissingError):
+        BlobStore(str(tmp_path)).get("blob:" + "0" * 64)
+
+
+def test_prune_removes_unused_blobs_only(tmp_path):
+    # Without retention the store starts no background prune, the test prunes explicitly
+    store = BlobStore(str(tmp_path), retention_days=0)
+    old_ref, fresh_ref = store.put(LARGE), store.put(LARGE + "y = 2\n")
+    stale = time.time() - 2 * 86400
+    os.utime(store._path(old_ref[len("blob:"):]), (stale, stale))
+
+    BlobStore(str(tmp_path), retention_days=1).prune()
+
+    with pytest.raises(BlobMissingError):
+        BlobStore(str(tmp_path)).get(old_ref)
+    assert BlobStore(str(tmp_path)).get(fresh_ref) == LARGE + "y = 2\n"
+
+    # Putting pruned content again writes it back, even while the text is still cached
+    assert store.put(LARGE) == old_ref
+    assert BlobStore(str(tmp_path)).get(old_ref) == LARGE
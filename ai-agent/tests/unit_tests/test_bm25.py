@@ -0,0 +1,80 @@
+import os
+
+from agent.indexing import BM25Index, get_bm25_index
+from agent.indexing import bm25
+from agent.indexing.bm25 import chunk_file
+
+
+def _project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "payments.py").write_text(
+        "import os\n\n"
+        "def refund_payment(payment_id):\n    return gateway.refund(payment_id)\n\n\n"
+        "class Invoice:\n    total = 0\n\n    def render_pdf(self):\n        return pdf.render(self)\n"
+    )
+    (root / "README.md").write_text("# Setup\nInstall the dependencies.\n\n# Deployment\nRun docker compose up.\n")
+    (root / "notes.txt").write_text("Unrelated notes about the office coffee machine.\n")
+    return root
+
+
+def test_chunks_follow_functions_and_sections(tmp_path) -> None:
+    root = _project(tmp_path)
+    _, _, _, chunks = chunk_file(str(root / "payments.py"))
+    assert [(start, end, title) for start, end, title, _ in chunks] == [
+        (3, 4, "refund_payment"), (7, 9, "class Invoice"), (10, 11, "Invoice.render_pdf"), (1, 2, "module"),
+    ]
+
+    _, _, _, chunks = chunk_file(str(root / "README.md"))
+    assert [title for _, _, title, _ in chunks] == ["# Setup", "# Deployment"]
+
+
+def test_search_ranks_matching_chunk_first(tmp_path) -> None:
+    root = _project(tmp_path)
+    index = BM25Index(str(root))
+    index.update()
+
+    hit = index.search("refund a payment")[0]
+    assert (hit.path, hit.title) == (os.path.join(str(root), "payments.py"), "refund_payment")
+    assert index.search("docker deployment")[0].title == "# Deployment"
+    assert index.search("nonexistentterm") == []
+    assert index.rank_files("render invoice pdf", limit=1)[0][0].endswith("payments.py")
+
+
+def test_update_reindexes_only_changed_files(tmp_path) -> None:
+    root = _project(tmp_path)
+    index = BM25Index(str(root))
+    assert index.update() == {"indexed": 3, "unchanged": 0, "removed": 0}
+
+    (root / "notes.txt").write_text("Rotate the webhook signing secret every month, more words.\n")
+    (root / "README.md").unlink()
+    assert index.update() == {"indexed": 1, "unchanged": 1, "removed": 1}
+    assert index.search("webhook secret")[0].path.endswith("notes.txt")
+    assert index.search("docker deployment") == []
+
+
+def test_parallel_build_matches_serial_build(tmp_path, monkeypatch) -> None:
+    root = _project(tmp_path)
+    serial = BM25Index(str(root))
+    serial.update()
+
+    monkeypatch.setattr(bm25, "PARALLEL_BUILD_MIN_FILES", 1)
+    parallel = BM25Index(str(root))
+    assert parallel.update()["indexed"] == 3
+    assert parallel.search("refund a payment") == serial.search("refund a payment")
+
+
+def test_shared_indexes_are_keyed_by_real_path_and_bounded(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(bm25, "bm25_indexes", bm25.OrderedDict())
+    monkeypatch.setattr(bm25, "BM25_MAX_INDEXES", 2)
+    root = _project(tmp_path)
+    os.symlink(root, tmp_path / "link")
+
+    index = get_bm25_index(str(root))
+    assert get_bm25_index(str(root) + "/./") is index
+    assert get_bm25_index(str(tmp_path / "link")) is index
+
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        get_bm25_index(str(tmp_path / name))
+    assert list(bm25.bm25_indexes) == [os.path.realpath(tmp_path / name) for name in ("a", "b")]
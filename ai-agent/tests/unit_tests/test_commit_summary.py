@@ -0,0 +1,46 @@
+from agent.utils.commit_summary import commit_message, compact_diff, diffstat, summarize_changes, template_message
+
+ORIGINAL = "".join(f"line {i}\n" for i in range(1, 41))
+
+
+def test_summarize_changes_counts_lines_per_file():
+    changes = summarize_changes(
+        {"app.py": ORIGINAL, "old.py": "x = 1\n", "new.py": None, "same.py": "y\n"},
+        {"app.py": ORIGINAL.replace("line 5\n", "line five\n"), "old.py": None, "new.py": "a\nb\n", "same.py": "y\n"},
+    )
+
+    by_path = {c.path: c for c in changes}
+    assert set(by_path) == {"app.py", "old.py", "new.py"}
+    assert (by_path["app.py"].status, by_path["app.py"].added, by_path["app.py"].removed) == ("modified", 1, 1)
+    assert (by_path["new.py"].status, by_path["new.py"].added) == ("added", 2)
+    assert (by_path["old.py"].status, by_path["old.py"].removed) == ("deleted", 1)
+    assert "3 files changed, 3 insertions(+), 2 deletions(-)" in diffstat(changes)
+
+
+def test_simple_commits_are_templated():
+    one_line = summarize_changes({"src/app.py": ORIGINAL}, {"src/app.py": ORIGINAL.replace("line 5", "line V")})
+    new_files = summarize_changes({"a.py": None, "b.py": None}, {"a.py": ORIGINAL, "b.py": ORIGINAL})
+    mixed = summarize_changes({"a.py": None, "b.py": "x\n"}, {"a.py": "a\n", "b.py": "y\n"})
+
+    assert template_message(one_line) == "Update app.py"
+    assert template_message(new_files) == "Add a.py and b.py"
+    assert template_message(mixed) == "Add a.py; Update b.py"
+    assert template_message([]) is None
+
+
+def test_large_commits_go_to_the_llm_with_a_bounded_diff():
+    before = {f"module_{i}.py": ORIGINAL for i in range(5)}
+    after = {path: ORIGINAL.replace("line 1\n", "first\n").replace("line 30\n", "thirty\n") + "end\n" * 30
+             for path in before}
+    changes = summarize_changes(before, after)
+    prompts = []
+
+    message = commit_message(changes, "Rename lines", lambda task, diff: prompts.append((task, diff)) or "LLM message")
+
+    assert message == "LLM message"
+    task, diff = prompts[0]
+    assert task == "Rename lines"
+    assert diff.startswith(" module_0.py |")
+    assert "more lines" in diff
+    assert len(compact_diff(changes, max_chars=500)) <= 520
+    assert compact_diff(changes, max_chars=500).endswith("... diff truncated")
@@ -0,0 +1,99 @@
+import subprocess
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agent.core.agent import tool_node
+from agent.tools.touched_files import merge_touched_files, touched_under
+from agent.utils.git_service import GitService, start_background_push, wait_for_push
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    remote = tmp_path / "remote.git"
+    work = tmp_path / "work"
+    git(tmp_path, "init", "-q", "--bare", str(remote))
+    git(tmp_path, "init", "-q", str(work))
+    git(work, "config", "user.email", "agent@example.com")
+    git(work, "config", "user.name", "agent")
+    (work / "README.md").write_text("readme\n")
+    git(work, "add", "README.md")
+    git(work, "commit", "-q", "-m", "initial")
+    git(work, "remote", "add", "origin", str(remote))
+    git(work, "push", "-q", "-u", "origin", "HEAD")
+    return work, remote
+
+
+@pytest.mark.anyio
+async def test_commits_only_touched_files_and_pushes_in_background(repo):
+    work, remote = repo
+    (work / "edited.py").write_text("x = 1\n")
+    (work / "unrelated.txt").write_text("local notes\n")
+
+    service = GitService(str(work))
+    result = await service.commit([str(work / "edited.py")], "Add edited module")
+
+    assert result.ok and result.commit
+    assert git(work, "show", "--name-only", "--format=", "HEAD") == "edited.py"
+    assert "unrelated.txt" in git(work, "status", "--porcelain")
+
+    start_background_push(service, result.commit)
+    push = await wait_for_push(result.commit, timeout=30)
+
+    assert push.ok and push.commit == result.commit
+    assert git(remote, "rev-parse", "HEAD") == result.commit
+    assert await wait_for_push(result.commit) is None
+
+
+@pytest.mark.anyio
+async def test_nothing_to_commit(repo):
+    work, _ = repo
+    service = GitService(str(work))
+
+    no_files = await service.commit([], "Nothing")
+    unchanged = await service.commit([str(work / "README.md")], "Unchanged")
+    outside = await service.commit(["/somewhere/else.py"], "Outside")
+
+    assert no_files.ok and no_files.commit is None
+    assert unchanged.ok and unchanged.commit is None
+    assert outside.ok and outside.files == []
+
+
+@pytest.mark.anyio
+async def test_not_a_repository(tmp_path):
+    result = await GitService(str(tmp_path)).commit([str(tmp_path / "a.py")], "Message")
+
+    assert not result.ok and result.stage == "check"
+
+
+def test_touched_files_are_scoped_to_a_directory(tmp_path):
+    touched = merge_touched_files(set(), [str(tmp_path / "project" / "a.py")])
+    touched = merge_touched_files(touched, [str(tmp_path / "other" / "b.py")])
+
+    assert touched_under(touched, str(tmp_path / "project")) == [str(tmp_path / "project" / "a.py")]
+    assert merge_touched_files(touched, None) == set()
+
+
+@pytest.mark.anyio
+async def test_pending_changes_against_last_commit(repo):
+    work, _ = repo
+    (work / "README.md").write_text("readme\nmore\n")
+    (work / "new.py").write_text("x = 1\n")
+
+    changes = await GitService(str(work)).pending_changes([str(work / "README.md"), str(work / "new.py")])
+
+    assert [(c.path, c.status, c.added, c.removed) for c in changes] == [
+        ("README.md", "modified", 1, 0), ("new.py", "added", 1, 0)]
+
+
+def test_tool_node_returns_the_files_it_wrote(tmp_path):
+    path = str(tmp_path / "new.py")
+    call = {"name": "create_file", "args": {"file_path": path, "file_text": "x = 1\n"}, "id": "call_1"}
+    update = tool_node({"messages": [AIMessage(content="", tool_calls=[call])]})
+
+    assert update["touched_files"] == [path]
+    assert update["messages"][0].tool_call_id == "call_1"
@@ -0,0 +1,78 @@
+import time
+from typing import TypedDict
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.graph import END, START, StateGraph
+
+from agent.utils.instrumentation import GraphInstrumentation
+
+
+class RunState(TypedDict):
+    question: str
+    answer: str
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up."""
+    time.sleep(0.01)
+    return query.upper()
+
+
+def build_graph():
+    model = GenericFakeChatModel(messages=iter([
+        AIMessage(content="answer", usage_metadata={"input_tokens": 120, "output_tokens": 7, "total_tokens": 127}),
+    ]))
+
+    def retrieve(state: RunState):
+        return {"question": lookup.invoke({"query": state["question"]})}
+
+    def generate(state: RunState):
+        time.sleep(0.02)
+        return {"answer": model.invoke(state["question"]).content}
+
+    graph = StateGraph(RunState)
+    graph.add_node("retrieve", retrieve)
+    graph.add_node("generate", generate)
+    graph.add_edge(START, "retrieve")
+    graph.add_edge("retrieve", "generate")
+    graph.add_edge("generate", END)
+    return graph.compile()
+
+
+def test_report_breaks_down_time_and_tokens_per_node():
+    handler = GraphInstrumentation(write_reports=False)
+
+    build_graph().with_config(callbacks=[handler]).invoke(
+        {"question": "what?"}, {"configurable": {"thread_id": "t", "run_id": "r"}})
+
+    [report] = handler.recent_reports()
+    assert (report["run_id"], report["thread_id"], report["error"]) == ("r", "t", None)
+    generate, retrieve = report["nodes"]["generate"], report["nodes"]["retrieve"]
+    assert generate["calls"] == 1 and generate["wall_seconds"] >= 0.02
+    assert (generate["llm_calls"], generate["input_tokens"], generate["output_tokens"]) == (1, 120, 7)
+    assert generate["context_bytes"] == len("WHAT?")
+    assert retrieve["tool_calls"] == 1 and retrieve["tool_seconds"] >= 0.01
+    assert report["totals"]["input_tokens"] == 120
+    assert list(report["nodes"])[0] == "generate"
+
+
+def test_failed_runs_are_reported():
+    handler = GraphInstrumentation(write_reports=False)
+
+    def fail(state: RunState):
+        raise ValueError("boom")
+
+    graph = StateGraph(RunState)
+    graph.add_node("fail", fail)
+    graph.add_edge(START, "fail")
+    try:
+        graph.compile().invoke({"question": "q"}, {"callbacks": [handler]})
+    except ValueError:
+        pass
+
+    [report] = handler.recent_reports()
+    assert "boom" in report["error"]
+    assert report["nodes"]["fail"]["errors"] == 1
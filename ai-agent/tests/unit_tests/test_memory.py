@@ -0,0 +1,61 @@
+from typing import List
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.memory import advance_memory, estimate_tokens, format_message, select_window_start
+
+
+def _conversation(turns: int, first: int = 0) -> List:
+    messages = []
+    for i in range(first, first + turns):
+        messages.append(HumanMessage(content=f"question {i} " + "x" * 36))
+        messages.append(AIMessage(content=f"answer {i} " + "y" * 36))
+    return messages
+
+
+def _cost(messages: List) -> int:
+    return sum(estimate_tokens(format_message(m)) for m in messages)
+
+
+def test_select_window_start_fits_budget() -> None:
+    messages = _conversation(5)
+    start = select_window_start(messages, token_budget=_cost(messages[-3:]))
+
+    assert start == len(messages) - 3
+    assert select_window_start(messages, token_budget=10 ** 6) == 0
+
+
+def test_select_window_start_respects_floor_and_keeps_last_message() -> None:
+    messages = _conversation(5)
+    assert select_window_start(messages, token_budget=10 ** 6, floor=4) == 4
+    assert select_window_start(messages, token_budget=0) == len(messages) - 1
+
+
+@pytest.mark.anyio
+async def test_advance_memory_summarises_only_evicted_messages() -> None:
+    calls = []
+
+    async def summarize(summary: str, new_messages: str) -> str:
+        calls.append(new_messages)
+        return f"{summary}|{new_messages.count('Human:')}"
+
+    messages = _conversation(5)
+    budget = _cost(messages[-4:])
+
+    update = await advance_memory(messages, None, 0, budget, summarize)
+    assert update.summarized_count == len(messages) - 4
+    assert update.evicted == len(messages) - 4
+    assert len(calls) == 1
+
+    # The next turn only sends the newly evicted messages to the summariser
+    messages += _conversation(1, first=5)
+    update = await advance_memory(messages, update.summary, update.summarized_count, budget, summarize)
+    assert update.summarized_count == len(messages) - 4
+    assert update.evicted == 2
+    assert "question 3" in calls[1] and "question 2" not in calls[1]
+
+    # Nothing new fell out of the window, no summariser call
+    repeat = await advance_memory(messages, update.summary, update.summarized_count, budget, summarize)
+    assert (repeat.summary, repeat.summarized_count, repeat.evicted) == (update.summary, update.summarized_count, 0)
+    assert len(calls) == 2
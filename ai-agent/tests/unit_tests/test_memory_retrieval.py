@@ -0,0 +1,56 @@
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.memory import HashingEmbedder, MessageIndexStore
+
+TOPICS = [
+    ("How do I configure the postgres connection pool?", "Set the pool size in the database settings."),
+    ("What is a good recipe for banana bread?", "Mash three ripe bananas and mix them with flour."),
+    ("Which hiking trails are near the lake?", "The north ridge trail starts at the lake parking lot."),
+    ("Can you explain python decorators?", "A decorator wraps a function and returns a new one."),
+]
+
+
+def _thread():
+    messages = []
+    for question, answer in TOPICS:
+        messages += [HumanMessage(content=question), AIMessage(content=answer)]
+    return messages
+
+
+def test_hashing_embedder_is_deterministic_and_normalised() -> None:
+    vectors = HashingEmbedder(dim=64).embed(["banana bread", "banana bread", "postgres"])
+    assert vectors.shape == (3, 64)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert np.array_equal(vectors[0], vectors[1])
+
+
+def test_relevant_turns_returns_matching_turn(tmp_path) -> None:
+    store = MessageIndexStore(str(tmp_path), embedder=HashingEmbedder())
+    messages = _thread()
+
+    positions = store.relevant_turns("thread", messages, "banana bread baking time", k=1, end=len(messages))
+    assert positions == [2, 3]
+
+    positions = store.relevant_turns("thread", messages, "postgres pool size", k=1, end=4)
+    assert positions == [0, 1]
+
+
+def test_index_is_persisted_and_extended_incrementally(tmp_path) -> None:
+    embedder = HashingEmbedder()
+    calls = []
+    original_embed = embedder.embed
+
+    def counting_embed(texts):
+        calls.append(len(texts))
+        return original_embed(texts)
+
+    embedder.embed = counting_embed
+    messages = _thread()
+    MessageIndexStore(str(tmp_path), embedder=embedder).sync("thread", messages[:4])
+
+    # A fresh store loads the saved index and only embeds the new messages
+    store = MessageIndexStore(str(tmp_path), embedder=embedder)
+    index = store.sync("thread", messages)
+    assert index.size == len(messages)
+    assert calls == [4, 4]
@@ -0,0 +1,73 @@
+from agent.core.plan_stream import StepStreamParser, chunk_text, parse_step_stream, render_plan
+from agent.models.step_models import Step
+
+
+class Chunk:
+    def __init__(self, content):
+        self.content = content
+
+
+def feed_in_pieces(text: str, size: int):
+    parser = StepStreamParser()
+    steps = []
+    for start in range(0, len(text), size):
+        steps.extend(parser.feed(text[start:start + size]))
+    return steps
+
+
+def test_json_lines_are_parsed_whatever_the_chunking():
+    text = (
+        '<think>Two independent edits {maybe}</think>\n'
+        '{"id": 1, "description": "Add the \\"slug\\" field", "files": ["models.py"], "depends_on": []}\n'
+        '{"id": 2, "description": "Use } in a route", "files": ["routes.py"], "depends_on": [1]}\n'
+    )
+
+    for size in (1, 7, len(text)):
+        steps = feed_in_pieces(text, size)
+        assert [s.id for s in steps] == [1, 2]
+        assert steps[0].description == 'Add the "slug" field'
+        assert steps[1].description == "Use } in a route"
+        assert steps[1].depends_on == [1]
+
+
+def test_a_step_is_available_as_soon_as_it_is_closed():
+    parser = StepStreamParser()
+
+    assert parser.feed('{"id": 1, "description": "first"') == []
+    assert [s.id for s in parser.feed('}\n{"id": 2, "desc')] == [1]
+    assert [s.id for s in parser.feed('ription": "second"}')] == [2]
+
+
+def test_wrapped_and_pretty_printed_steps_and_invalid_objects():
+    text = '''```json
+{"steps": [
+  {
+    "id": 1,
+    "description": "first"
+  },
+  {"id": "x", "description": "bad id"},
+  {"note": "not a step"}
+]}
+```'''
+
+    steps = feed_in_pieces(text, 5)
+
+    assert [(s.id, s.description) for s in steps] == [(1, "first")]
+
+
+def test_parse_step_stream_keeps_the_transcript():
+    chunks = [Chunk('{"description": "a"}'), Chunk([{"type": "text", "text": '{"description": "b"}'}])]
+    transcript = []
+
+    steps = list(parse_step_stream(chunks, transcript))
+
+    assert [s.description for s in steps] == ["a", "b"]
+    assert "".join(transcript) == '{"description": "a"}{"description": "b"}'
+    assert chunk_text(Chunk(None)) == ""
+
+
+def test_render_plan():
+    plan = render_plan([Step(id=1, description="first", files=["a.py"]),
+                        Step(id=2, description="second", depends_on=[1])])
+
+    assert plan == "1. first\n   Files: a.py\n2. second\n   After steps: 1"
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from agent.core.racing import RaceStats, has_answer_text, race_stream
+
+
+class StreamingFake:
+    def __init__(self, pieces, first_token: float = 0.0, delay: float = 0.0, fail: bool = False):
+        self.pieces = pieces
+        self.first_token = first_token
+        self.delay = delay
+        self.fail = fail
+        self.cancelled = False
+
+    async def astream(self, prompt):
+        try:
+            await asyncio.sleep(self.first_token)
+            if self.fail:
+                raise ConnectionError("provider is down")
+            for position, piece in enumerate(self.pieces):
+                if position:
+                    await asyncio.sleep(self.delay)
+                yield AIMessageChunk(content=piece)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def test_reasoning_is_not_an_answer() -> None:
+    assert not has_answer_text("<think>let me see")
+    assert not has_answer_text("  \n")
+    assert has_answer_text("<think>hmm</think> Paris")
+
+
+@pytest.mark.anyio
+async def test_first_good_answer_wins_and_the_rest_are_cancelled() -> None:
+    fast = StreamingFake(["Paris", " is the capital"], delay=0.01)
+    slow = StreamingFake(["Lyon"], first_token=1.0)
+    stats = RaceStats()
+
+    race = await race_stream({"fast": fast, "slow": slow}, "capital?", stats=stats)
+
+    assert race.model == "fast"
+    assert race.message.content == "Paris is the capital"
+    assert slow.cancelled
+    assert stats.snapshot()["fast"]["wins"] == 1
+    assert stats.snapshot()["slow"]["win_rate"] == 0.0
+
+
+@pytest.mark.anyio
+async def test_thinking_model_loses_to_an_answer() -> None:
+    thinker = StreamingFake(["<think>", "step one", "step two", "</think>", "Rome"], delay=0.05)
+    answerer = StreamingFake(["Rome"], first_token=0.02)
+
+    race = await race_stream({"thinker": thinker, "answerer": answerer}, "capital?", stats=RaceStats())
+
+    assert race.model == "answerer"
+    assert thinker.cancelled
+
+
+@pytest.mark.anyio
+async def test_failing_models_are_skipped_until_all_fail() -> None:
+    stats = RaceStats()
+    race = await race_stream({"broken": StreamingFake([], fail=True), "backup": StreamingFake(["ok"], first_token=0.01)},
+                             "hi", stats=stats)
+    assert race.model == "backup"
+    assert race.failed == ["broken"]
+    assert stats.snapshot()["broken"]["errors"] == 1
+
+    with pytest.raises(ConnectionError):
+        await race_stream({"a": StreamingFake([], fail=True), "b": StreamingFake([], fail=True)}, "hi", stats=stats)
+
+
+@pytest.mark.anyio
+async def test_without_a_good_answer_the_first_finished_model_wins() -> None:
+    race = await race_stream({"a": StreamingFake(["<think>only thoughts"])}, "hi", stats=RaceStats())
+    assert race.model == "a"
+    assert race.message.content == "<think>only thoughts"
+
+
+@pytest.mark.anyio
+async def test_cancelling_the_race_cancels_every_stream() -> None:
+    models = {"a": StreamingFake(["x"], first_token=1.0), "b": StreamingFake(["y"], first_token=1.0)}
+    race = asyncio.ensure_future(race_stream(models, "hi", stats=RaceStats()))
+    await asyncio.sleep(0.02)
+
+    race.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await race
+    assert all(model.cancelled for model in models.values())
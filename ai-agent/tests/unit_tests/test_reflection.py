@@ -0,0 +1,56 @@
+from agent.core.reflection import ReflectionEngine
+from agent.models.models import FileReflectionList
+
+
+def _files(tmp_path, *names):
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_text(f"contents of {name}")
+        paths.append(str(path))
+    return paths
+
+
+class ScriptedProposer:
+    def __init__(self, *proposals):
+        self.proposals = list(proposals)
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        added, removed = self.proposals.pop(0)
+        return FileReflectionList(additional_file_paths=added, remove_file_paths=removed)
+
+
+def test_applies_additions_and_removals_and_stops_when_stable(tmp_path) -> None:
+    a, b, c = _files(tmp_path, "a.py", "b.py", "c.py")
+    proposer = ScriptedProposer(([c], [b]), ([], []), ([a], []))
+
+    result = ReflectionEngine(proposer, max_rounds=5).run("task", str(tmp_path), "tree", [a, b])
+
+    assert result.file_paths == [a, c]
+    assert result.converged
+    assert len(result.rounds) == 2
+    assert "contents of b.py" not in result.context and "contents of c.py" in result.context
+
+
+def test_later_rounds_only_send_the_diff(tmp_path) -> None:
+    a, b, c = _files(tmp_path, "a.py", "b.py", "c.py")
+    proposer = ScriptedProposer(([b], []), ([c], []), ([], []))
+
+    ReflectionEngine(proposer).run("task", str(tmp_path), "tree", [a])
+
+    assert "contents of a.py" in proposer.prompts[0]
+    assert "contents of b.py" in proposer.prompts[1] and "contents of a.py" not in proposer.prompts[1]
+    assert "contents of c.py" in proposer.prompts[2] and "contents of b.py" not in proposer.prompts[2]
+
+
+def test_stops_on_oscillation_and_reports_stats(tmp_path) -> None:
+    a, b = _files(tmp_path, "a.py", "b.py")
+    proposer = ScriptedProposer(([b], []), ([], [b]), ([b], []))
+
+    result = ReflectionEngine(proposer, max_rounds=5).run("task", str(tmp_path), "tree", [a, "x/.env"])
+
+    assert result.file_paths == [a, b]
+    assert len(result.rounds) == 2
+    assert all(r["prompt_tokens"] > 0 and r["seconds"] >= 0 for r in result.round_stats())
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from agent.core.ai_models import ModelRegistry
+from agent.core.router import ModelRouter
+
+
+class FakeModel:
+    def __init__(self, name: str, latency: float = 0.0, fail: bool = False):
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return f"{self.name}: {prompt}"
+
+    def stream(self, prompt):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        yield from f"{self.name}: {prompt}".split(" ")
+
+
+def _router(*models: FakeModel) -> ModelRouter:
+    registry = ModelRegistry()
+    for model in models:
+        registry.register(model.name, lambda model=model: model)
+    return ModelRouter(registry, classes={"fast": [model.name for model in models]})
+
+
+def test_invoke_falls_back_and_avoids_failing_model() -> None:
+    broken, backup = FakeModel("broken", fail=True), FakeModel("backup")
+    router = _router(broken, backup)
+
+    assert router.invoke("fast", "hi") == "backup: hi"
+    assert router.invoke("fast", "hi") == "backup: hi"
+    # The failure made the broken model unhealthy, so it is no longer tried first
+    assert router.rank("fast") == ["backup", "broken"]
+    assert broken.calls == 1
+
+
+def test_rank_prefers_lower_p50() -> None:
+    slow, fast = FakeModel("slow"), FakeModel("fast")
+    router = _router(slow, fast)
+    for _ in range(5):
+        router.stats_for("slow").record(1.0, ok=True)
+        router.stats_for("fast").record(0.1, ok=True)
+
+    assert router.rank("fast") == ["fast", "slow"]
+    assert router.snapshot()["slow"]["p50"] == 1.0
+
+
+def test_hedged_invoke_returns_first_answer() -> None:
+    stalled, quick = FakeModel("stalled", latency=1.0), FakeModel("quick", latency=0.01)
+    router = _router(stalled, quick)
+
+    started = time.perf_counter()
+    assert router.hedged_invoke("fast", "hi", hedge_delay=0.05) == "quick: hi"
+    assert time.perf_counter() - started < 0.5
+    assert stalled.calls == 1 and quick.calls == 1
+
+
+def test_unknown_class_raises() -> None:
+    with pytest.raises(KeyError):
+        _router(FakeModel("a")).rank("missing")
+
+
+def test_stream_falls_back_before_the_first_chunk() -> None:
+    broken, backup = FakeModel("broken", fail=True), FakeModel("backup")
+    router = _router(broken, backup)
+
+    assert list(router.stream("fast", "hi")) == ["backup:", "hi"]
+    assert router.snapshot()["broken"]["error_rate"] == 1.0
+    assert router.snapshot()["backup"]["calls"] == 1
+
+
+def test_structured_calls_reuse_the_wrapper_and_warm_up() -> None:
+    class Structured(FakeModel):
+        wrapped = 0
+
+        def with_structured_output(self, schema):
+            Structured.wrapped += 1
+            return self
+
+    model = Structured("structured")
+    router = _router(model)
+
+    assert router.warm_structured_outputs({"fast": [dict], "unknown": [dict]}) == {"built": 1, "failed": 0}
+    assert router.invoke("fast", "a", schema=dict) == "structured: a"
+    assert router.hedged_invoke("fast", "b", schema=dict) == "structured: b"
+    assert Structured.wrapped == 1
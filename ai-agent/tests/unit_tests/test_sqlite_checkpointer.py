@@ -0,0 +1,99 @@
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.constants import START, END
+from langgraph.graph import StateGraph
+
+from agent.persistence.sqlite_checkpointer import SqliteCheckpointSaver
+
+LARGE_CONTEXT = "def handler(request):\n    return process(request)\n" * 2000
+
+
+class RunState(TypedDict):
+    context: str
+    steps: Annotated[list, operator.add]
+
+
+def build(fail_at_push: dict) -> StateGraph:
+    def explore(state: RunState):
+        return {"context": LARGE_CONTEXT, "steps": ["explore"]}
+
+    def plan(state: RunState):
+        return {"steps": ["plan"]}
+
+    def push(state: RunState):
+        if fail_at_push["fail"]:
+            raise RuntimeError("remote rejected the push")
+        return {"steps": ["push"]}
+
+    graph = StateGraph(RunState)
+    graph.add_node("explore", explore)
+    graph.add_node("plan", plan)
+    graph.add_node("push", push)
+    graph.add_edge(START, "explore")
+    graph.add_edge("explore", "plan")
+    graph.add_edge("plan", "push")
+    graph.add_edge("push", END)
+    return graph
+
+
+def test_failed_run_resumes_without_repeating_finished_nodes(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    fail = {"fail": True}
+    graph = build(fail).compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "run-1"}}
+
+    with pytest.raises(RuntimeError):
+        graph.invoke({"context": "", "steps": []}, config)
+    assert graph.get_state(config).next == ("push",)
+
+    fail["fail"] = False
+    # A fresh saver on the same file, like a new process after a crash
+    resumed = build(fail).compile(checkpointer=SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite")))
+    state = resumed.invoke(None, config)
+
+    assert state["steps"] == ["explore", "plan", "push"]
+    assert state["context"] == LARGE_CONTEXT
+
+
+def test_large_values_are_stored_once(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = build({"fail": False}).compile(checkpointer=saver)
+
+    for thread_id in ("a", "b"):
+        graph.invoke({"context": "", "steps": []}, {"configurable": {"thread_id": thread_id}})
+
+    stats = saver.storage_stats()
+    assert stats["checkpoints"] > 2
+    # The same context in every checkpoint of both threads is one compressed blob
+    assert stats["blob_bytes"] < len(LARGE_CONTEXT)
+
+
+def test_history_and_delete_thread(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = build({"fail": False}).compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "run-1"}}
+    graph.invoke({"context": "", "steps": []}, config)
+
+    history = list(graph.get_state_history(config))
+    assert history[0].values["steps"] == ["explore", "plan", "push"]
+    assert [h.config["configurable"]["checkpoint_id"] for h in history] == \
+           sorted((h.config["configurable"]["checkpoint_id"] for h in history), reverse=True)
+    assert len(list(saver.list(config, limit=2))) == 2
+
+    saver.delete_thread("run-1")
+    assert saver.get_tuple(config) is None
+    assert saver.storage_stats()["blobs"] == 0
+
+
+@pytest.mark.anyio
+async def test_async_run(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = build({"fail": False}).compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "async"}}
+
+    state = await graph.ainvoke({"context": "", "steps": []}, config)
+
+    assert state["steps"] == ["explore", "plan", "push"]
+    assert (await saver.aget_tuple(config)).checkpoint["channel_values"]["context"] == LARGE_CONTEXT
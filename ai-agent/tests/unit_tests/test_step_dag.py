@@ -0,0 +1,170 @@
+import threading
+import time
+
+from agent.core.step_dag import dag_depth, normalize_steps, run_step_dag
+from agent.models.step_models import Step
+
+STEP_SECONDS = 0.1
+
+
+def sleeping_executor(log):
+    active = set()
+    lock = threading.Lock()
+
+    def execute(step, finished):
+        with lock:
+            # No two running steps may share a file
+            assert not any(set(step.files) & set(files) for files in active), step.id
+            active.add(tuple(step.files))
+            log.append(("start", step.id, sorted(s.id for s in finished)))
+        time.sleep(STEP_SECONDS)
+        with lock:
+            active.discard(tuple(step.files))
+        return f"done {step.id}"
+
+    return execute
+
+
+def test_independent_steps_run_in_parallel():
+    steps = [Step(id=i, description=f"edit module {i}", files=[f"m{i}.py"]) for i in range(1, 7)]
+    log = []
+
+    started = time.perf_counter()
+    run = run_step_dag(steps, sleeping_executor(log), max_workers=6)
+    elapsed = time.perf_counter() - started
+
+    assert run.depth == 1
+    assert run.max_parallel == 6
+    assert elapsed < STEP_SECONDS * 3
+    assert not run.failed
+    assert run.outcomes[3].result == "done 3"
+
+
+def test_wall_time_follows_dag_depth_and_dependencies_are_respected():
+    steps = [
+        Step(id=1, description="add model", files=["models.py"]),
+        Step(id=2, description="add route", files=["routes.py"], depends_on=[1]),
+        Step(id=3, description="add service", files=["service.py"], depends_on=[1]),
+        Step(id=4, description="register route", files=["app.py"], depends_on=[2, 3]),
+    ]
+    log = []
+
+    started = time.perf_counter()
+    run = run_step_dag(steps, sleeping_executor(log), max_workers=4)
+    elapsed = time.perf_counter() - started
+
+    assert run.depth == 3
+    assert STEP_SECONDS * 3 <= elapsed < STEP_SECONDS * 4.5
+    starts = {step_id: finished for _, step_id, finished in log}
+    assert starts[1] == []
+    assert starts[4] == [1, 2, 3]
+    assert run.completion_order[0] == 1 and run.completion_order[-1] == 4
+
+
+def test_steps_touching_the_same_file_are_serialised_in_plan_order():
+    steps = [Step(id=i, description=f"edit {i}", files=["shared.py"]) for i in range(1, 4)]
+    log = []
+
+    run = run_step_dag(steps, sleeping_executor(log), max_workers=3)
+
+    assert run.max_parallel == 1
+    assert [step_id for _, step_id, _ in log] == [1, 2, 3]
+
+
+def test_failed_step_skips_its_dependents_only():
+    steps = [
+        Step(id=1, description="breaks"),
+        Step(id=2, description="needs 1", depends_on=[1]),
+        Step(id=3, description="needs 2", depends_on=[2]),
+        Step(id=4, description="independent"),
+    ]
+
+    def execute(step, finished):
+        if step.id == 1:
+            raise RuntimeError("tool failed")
+        return step.id
+
+    run = run_step_dag(steps, execute)
+
+    assert run.failed
+    assert run.outcomes[1].error == "tool failed"
+    assert run.outcomes[2].skipped and run.outcomes[3].skipped
+    assert run.outcomes[4].result == 4
+
+
+def test_normalize_steps_repairs_ids_and_dependencies():
+    steps = normalize_steps([
+        Step(description="no id"),
+        Step(id=1, description="duplicate id", depends_on=[1, 9]),
+        Step(id=3, description="cycle a", depends_on=[4]),
+        Step(id=4, description="cycle b", depends_on=[3]),
+    ])
+
+    ids = [step.id for step in steps]
+    assert len(set(ids)) == 4
+    by_description = {step.description: step for step in steps}
+    assert by_description["duplicate id"].depends_on == [by_description["no id"].id]
+    assert by_description["cycle a"].depends_on == [4]
+    assert by_description["cycle b"].depends_on == []
+    # Dependencies come first
+    assert ids.index(4) < ids.index(3)
+    assert dag_depth(steps) == 2
+
+
+def test_streamed_steps_start_before_the_stream_ends():
+    log = []
+    stream_finished = []
+
+    def streamed():
+        yield Step(id=1, description="first", files=["a.py"])
+        time.sleep(STEP_SECONDS * 2)
+        yield Step(id=2, description="second", files=["b.py"], depends_on=[1, 7])
+        stream_finished.append(time.perf_counter())
+
+    def execute(step, finished):
+        log.append((step.id, time.perf_counter()))
+        return step.id
+
+    run = run_step_dag(streamed(), execute)
+
+    assert log[0][0] == 1 and log[0][1] < stream_finished[0]
+    # Dependencies on steps that had not been streamed yet are dropped
+    assert run.outcomes[2].step.depends_on == [1]
+    assert run.completion_order == [1, 2]
+
+
+def test_stream_failure_marks_the_run_failed():
+    def streamed():
+        yield Step(id=1, description="first")
+        raise ConnectionError("stream interrupted")
+
+    run = run_step_dag(streamed(), lambda step, finished: step.id)
+
+    assert run.outcomes[1].result == 1
+    assert run.stream_error == "stream interrupted"
+    assert run.failed
+
+
+def test_steps_without_files_run_alone():
+    steps = [
+        Step(id=1, description="edit a", files=["a.py"]),
+        Step(id=2, description="edit anything"),
+        Step(id=3, description="edit b", files=["b.py"]),
+    ]
+    spans = {}
+
+    def execute(step, finished):
+        started = time.perf_counter()
+        time.sleep(STEP_SECONDS)
+        spans[step.id] = (started, time.perf_counter())
+
+    run = run_step_dag(steps, execute, max_workers=3)
+
+    assert run.max_parallel == 1
+    assert spans[1][1] <= spans[2][0] and spans[2][1] <= spans[3][0]
+
+
+def test_equivalent_paths_conflict():
+    steps = [Step(id=1, description="edit", files=["./pkg/a.py"]), Step(id=2, description="edit", files=["pkg/a.py"])]
+    run = run_step_dag(steps, lambda step, finished: time.sleep(STEP_SECONDS), max_workers=2)
+    assert run.max_parallel == 1
@@ -0,0 +1,46 @@
+import os
+
+from agent.indexing import SymbolIndex, tokenize
+
+
+def _project(tmp_path):
+    root = tmp_path / "project"
+    (root / "services").mkdir(parents=True)
+    (root / "node_modules").mkdir()
+    (root / "services" / "upload.py").write_text(
+        "class FileUploader:\n    def upload_file(self, content):\n        return content\n"
+    )
+    (root / "services" / "billing.py").write_text("def create_invoice(customer):\n    return customer\n")
+    (root / "web.ts").write_text("export function renderInvoiceTable(rows) { return rows }\n")
+    (root / "node_modules" / "lib.js").write_text("function uploadFile() {}\n")
+    return root
+
+
+def test_tokenize_splits_identifiers() -> None:
+    assert tokenize("FileUploader.upload_file") == ["fileuploader", "uploader", "upload_file", "upload"]
+
+
+def test_rank_finds_files_by_symbol(tmp_path) -> None:
+    root = _project(tmp_path)
+    index = SymbolIndex(str(root), db_path=str(tmp_path / "index.sqlite"))
+    assert index.update() == {"indexed": 3, "unchanged": 0, "removed": 0}
+
+    best = index.rank("fix the FileUploader upload")[0]
+    assert best.path == os.path.join(str(root), "services", "upload.py")
+    assert best.symbols == ["FileUploader", "upload_file"]
+
+    paths = [c.path for c in index.rank("invoice")]
+    assert set(paths) == {os.path.join(str(root), "services", "billing.py"), os.path.join(str(root), "web.ts")}
+
+
+def test_update_is_incremental(tmp_path) -> None:
+    root = _project(tmp_path)
+    index = SymbolIndex(str(root), db_path=str(tmp_path / "index.sqlite"))
+    index.update()
+
+    (root / "services" / "billing.py").write_text("def refund_payment(payment):\n    return payment\n" * 2)
+    (root / "web.ts").unlink()
+
+    assert index.update() == {"indexed": 1, "unchanged": 1, "removed": 1}
+    assert index.rank("invoice") == []
+    assert index.rank("refund")[0].path.endswith("billing.py")
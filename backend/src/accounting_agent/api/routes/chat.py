@@ -12,6 +12,7 @@ from accounting_agent.models.chat import Chat
 from accounting_agent.api.routes.auth import get_current_user
 from accounting_agent.container import container
 from accounting_agent.services.chat import ChatService
+from accounting_agent.services.single_flight import input_hash
 
 router = APIRouter()
 load_dotenv()
@@ -36,6 +37,8 @@ class SendMessageRequest(BaseModel):
     message: Optional[str] = None
     audio_path: Optional[str] = None
     ai_model: Optional[str] = None
+    # sequential, skip, parallel or inline - see the agent's chat_graph
+    enhancement_strategy: Optional[str] = None
 
 
 
@@ -133,6 +136,9 @@ async def send_message_to_thread(
         if request.ai_model:
             run_input["ai_model"] = request.ai_model
 
+        if request.enhancement_strategy:
+            run_input["enhancement_strategy"] = request.enhancement_strategy
+
         # Validate that at least one input is provided
         if not request.message and not request.audio_path:
             raise HTTPException(status_code=400, detail="Either message or audio_path must be provided")
@@ -140,12 +146,19 @@ async def send_message_to_thread(
         # Use a default assistant_id - this should be configurable
         assistant_id = "fe096781-5601-53d2-b2f6-0d3403f7e9ca"
 
+        # A double submit or a retry while the first send is still running joins that run
+        # instead of answering the same message twice
+        coalescer = container.chat_run_coalescer()
+        run_key = (thread_id, input_hash(run_input))
+        if coalescer.in_flight(run_key):
+            print(f"Joining the in-flight run for thread {thread_id}")
+
         # Send the message and wait for response
-        await client.runs.wait(
+        await coalescer.do(run_key, lambda: client.runs.wait(
             thread_id=thread_id,
             assistant_id=assistant_id,
             input=run_input,
-        )
+        ))
 
         return {"status": "success", "message": "Message sent successfully"}
     except Exception as e:
@@ -1,5 +1,3 @@
-import os
-import aiohttp
 import asyncio
 import uuid
 import time
@@ -11,14 +9,11 @@ from accounting_agent.models import User
 from accounting_agent.models.file import File, ProcessingStatus
 from accounting_agent.api.routes.auth import get_current_user
 from accounting_agent.container import container
+from accounting_agent.services.file_service import FileServiceError
 from accounting_agent.utils.file_processor import process_file, poll_for_results
-from aiohttp import ClientTimeout
 
 router = APIRouter()
 
-# External file service URL
-FILE_SERVICE_URL = "https://files.nikolanikolovski.com"
-
 
 def generate_unique_filename(original_filename: str) -> str:
     """
@@ -59,39 +54,24 @@ async def upload_file(
     try:
         # Generate a unique filename for storage
         unique_filename = generate_unique_filename(file.filename)
-        timeout = ClientTimeout(total=300)
-
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            form = aiohttp.FormData()
-            form.add_field('file',
-                           await file.read(),  # <--- READ the file content here and pass it as bytes
-                           filename=unique_filename,
-                           content_type=file.content_type)
-
-            # Reset the file pointer in case you need to use it again (good practice)
-            await file.seek(0)
-
-            # Add the password header
-            headers = {
-                'password': os.getenv("UPLOAD_PASSWORD")
-            }
-
-            upload_url = f"{FILE_SERVICE_URL}/test/upload"
-            print(f"Attempting to upload to external service: {upload_url}") # DEBUG LOG
+        file_service = container.file_service_client()
 
-            async with session.post(upload_url,
-                                    data=form,
-                                    headers=headers) as response:
-                if response.status != 200:
-                    raise HTTPException(status_code=response.status,
-                                        detail="Failed to upload file to external service")
+        print(f"Attempting to upload to external service: {file_service.base_url}")  # DEBUG LOG
+        try:
+            await file_service.upload(await file.read(),
+                                      filename=unique_filename,
+                                      content_type=file.content_type)
+        except FileServiceError as e:
+            raise HTTPException(status_code=e.status,
+                                detail="Failed to upload file to external service")
 
-                result = await response.json()
+        # Reset the file pointer in case you need to use it again (good practice)
+        await file.seek(0)
 
         # Create file record in database
         file_record = File(
             user_id=current_user.email,
-            url=f"{FILE_SERVICE_URL}/test/download/{unique_filename}",  # Use unique filename in URL
+            url=file_service.download_url(unique_filename),  # Use unique filename in URL
             filename=file.filename,  # Store original filename
             unique_filename=unique_filename,  # Store unique filename
             content_type=file.content_type
@@ -8,6 +8,8 @@ from accounting_agent.auth.services.user import UserService
 from accounting_agent.databases.mongo_db import MongoDBDatabase
 # Import the new async database class
 from accounting_agent.databases.postgres_db import AsyncPostgreSQLDatabase
+from accounting_agent.services.file_service import FileServiceClient
+from accounting_agent.services.single_flight import SingleFlight
 
 
 def create_fernet():
@@ -25,6 +27,12 @@ class Container(containers.DeclarativeContainer):
 
     fernet = providers.Singleton(create_fernet)
 
+    # Shared HTTP client for the external file service, opened/closed in the app lifespan
+    file_service_client = providers.Singleton(FileServiceClient)
+
+    # In-flight agent runs, so identical concurrent sends to a thread share one run
+    chat_run_coalescer = providers.Singleton(SingleFlight)
+
     user_service = providers.Factory(
         UserService,
         postgres_db=postgres_db,
@@ -13,6 +13,7 @@ from accounting_agent.api.routes.chat import router as chat_router
 
 # The postgres_db instance is created here, which is fine
 postgres_db = container.postgres_db()
+file_service_client = container.file_service_client()
 
 
 # 2. REMOVE THE OLD SYNCHRONOUS CALL
@@ -29,6 +30,8 @@ async def lifespan(app: FastAPI):
     # Call the async function correctly
     await postgres_db.create_tables()
     print("INFO:     Application startup: Database tables created/verified.")
+    await file_service_client.start()
+    print("INFO:     Application startup: File service client connection pool opened.")
 
     yield  # The application runs while the lifespan is in this 'yield' state
 
@@ -36,6 +39,8 @@ async def lifespan(app: FastAPI):
     # You can add cleanup code here if needed, like closing the engine pool
     print("INFO:     Application shutdown: Disposing database engine.")
     await postgres_db.engine.dispose()
+    print("INFO:     Application shutdown: Closing file service client.")
+    await file_service_client.close()
 
 
 # 4. ATTACH THE LIFESPAN TO THE APP INSTANCE
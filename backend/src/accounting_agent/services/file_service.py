@@ -0,0 +1,133 @@
+import asyncio
+import os
+from typing import Optional, Dict, Any
+
+import aiohttp
+from aiohttp import ClientTimeout, TCPConnector
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# External file service URL
+FILE_SERVICE_URL = "https://files.nikolanikolovski.com"
+
+# Status codes that are worth retrying - the file service is behind a proxy that
+# answers with these while it is restarting or overloaded.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FileServiceError(Exception):
+    """Raised when the external file service rejects a request."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class FileServiceClient:
+    """
+    Long-lived HTTP client for the external file service.
+
+    A single aiohttp session (and its connection pool) is shared by every upload, so
+    requests reuse keep-alive connections instead of paying a new TCP+TLS handshake
+    each time. The session is opened in the FastAPI lifespan via `start()` and closed
+    via `close()`.
+    """
+
+    def __init__(
+            self,
+            base_url: str = FILE_SERVICE_URL,
+            password: Optional[str] = None,
+            connection_limit: int = 20,
+            connection_limit_per_host: int = 10,
+            keepalive_timeout: float = 30.0,
+            connect_timeout: float = 10.0,
+            request_timeout: float = 300.0,
+            max_retries: int = 3,
+            backoff_factor: float = 0.5,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.password = password if password is not None else os.getenv("UPLOAD_PASSWORD")
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = ClientTimeout(total=request_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        """Open the shared session. Safe to call more than once."""
+        if self._session is not None and not self._session.closed:
+            return
+
+        connector = TCPConnector(
+            limit=self.connection_limit,
+            limit_per_host=self.connection_limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def close(self) -> None:
+        """Close the shared session and release pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("FileServiceClient is not started. Call start() in the application lifespan.")
+        return self._session
+
+    def download_url(self, unique_filename: str) -> str:
+        """Return the public download URL for a stored file."""
+        return f"{self.base_url}/test/download/{unique_filename}"
+
+    async def upload(
+            self,
+            content: bytes,
+            filename: str,
+            content_type: Optional[str] = None,
+            timeout: Optional[ClientTimeout] = None,
+    ) -> Dict[str, Any]:
+        """
+        Upload file content to the file service, retrying transient failures with exponential backoff.
+
+        Args:
+            content: The raw file bytes
+            filename: The (unique) filename to store the file under
+            content_type: The MIME type of the file
+            timeout: Optional per-request timeout overriding the session default
+
+        Returns:
+            The JSON response of the file service
+
+        Raises:
+            FileServiceError: If the service answers with a non-retryable status or retries are exhausted
+        """
+        upload_url = f"{self.base_url}/test/upload"
+        headers = {'password': self.password} if self.password else {}
+
+        attempt = 0
+        while True:
+            # The form has to be rebuilt for every attempt, aiohttp consumes it on send
+            form = aiohttp.FormData()
+            form.add_field('file', content, filename=filename, content_type=content_type)
+
+            try:
+                async with self.session.post(upload_url, data=form, headers=headers,
+                                             timeout=timeout or self.timeout) as response:
+                    if response.status == 200:
+                        return await response.json()
+
+                    if response.status not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+                        raise FileServiceError(response.status, f"Upload failed with status {response.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise FileServiceError(503, f"Upload failed after {attempt + 1} attempts: {e}")
+
+            delay = self.backoff_factor * (2 ** attempt)
+            attempt += 1
+            print(f"Upload to {upload_url} failed, retrying in {delay:.1f}s (attempt {attempt}/{self.max_retries})")
+            await asyncio.sleep(delay)
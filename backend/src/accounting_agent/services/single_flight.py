@@ -0,0 +1,54 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+def input_hash(run_input: Dict[str, Any]) -> str:
+    """Stable hash of a run input, independent of key order."""
+    encoded = json.dumps(run_input, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one.
+
+    The first call for a key starts the work as a task; calls with the same key arriving
+    while it runs wait for that task instead of starting their own, and all of them get its
+    result or exception. Once it finishes the key is free again, so a later call runs anew.
+
+    Callers wait through `asyncio.shield`, so a caller that goes away (e.g. a client
+    disconnecting) does not cancel the work the others are waiting for.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `work()` for `key`, or join the run already in flight for it.
+
+        Args:
+            key: Identifies calls that are interchangeable
+            work: Starts the work, only called when nothing is in flight for `key`
+
+        Returns:
+            The result of the shared run
+        """
+        task: Optional[asyncio.Task] = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Nobody may be left waiting, retrieving the exception keeps asyncio from logging it
+        if not task.cancelled():
+            task.exception()
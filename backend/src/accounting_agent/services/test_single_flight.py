@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from accounting_agent.services.single_flight import SingleFlight, input_hash
+
+
+def test_input_hash_ignores_key_order():
+    assert input_hash({"text_input": "hi", "ai_model": "m"}) == input_hash({"ai_model": "m", "text_input": "hi"})
+    assert input_hash({"text_input": "hi"}) != input_hash({"text_input": "hi!"})
+
+
+def test_concurrent_identical_calls_share_one_run():
+    calls = []
+
+    async def run(text):
+        calls.append(text)
+        await asyncio.sleep(0.05)
+        return f"answer to {text}"
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(
+            flight.do(("thread", "a"), lambda: run("a")),
+            flight.do(("thread", "a"), lambda: run("a")),
+            flight.do(("thread", "b"), lambda: run("b")),
+        )
+        assert not flight.in_flight(("thread", "a"))
+        # Once the first run finished, the same key runs again
+        await flight.do(("thread", "a"), lambda: run("a"))
+        return results
+
+    results = asyncio.run(main())
+    assert results == ["answer to a", "answer to a", "answer to b"]
+    assert calls == ["a", "b", "a"]
+
+
+def test_errors_reach_every_caller_and_cancelled_callers_do_not_cancel_the_run():
+    async def failing():
+        await asyncio.sleep(0.02)
+        raise ConnectionError("agent is down")
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("key", failing))
+        second = asyncio.ensure_future(flight.do("key", failing))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(ConnectionError):
+            await second
+
+    asyncio.run(main())